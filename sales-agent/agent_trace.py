@@ -0,0 +1,295 @@
+"""
+Record & replay of browser-agent navigation
+===========================================
+Every hunt used to let the agent plan each click with the LLM, although
+for an (industry, city) we have hunted before the Google Maps navigation
+(open Maps, type the query, submit) is the same every time.
+
+After a successful hunt, the leading run of plain navigation steps from
+the agent's history is saved in leads.db, keyed by the normalised
+(industry, city). The next hunt for that key replays those steps on the
+agent's browser without any LLM call, then hands the agent a page that
+already shows the results. The LLM still reads, rates and drafts.
+
+Each element step stores a fingerprint of the element it acted on (tag
+plus stable attributes such as id, name and aria-label). Before acting,
+replay waits for a matching element. If none appears (Maps was
+redesigned, a consent wall came up) or an action fails, the page has
+diverged: replay stops and the agent carries on from wherever the
+browser is. The trace is then re-recorded from the replayed steps plus
+what the agent did next.
+"""
+
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from urllib.parse import quote_plus
+
+from lead_store import LeadWriter, connect_readonly
+
+# Agent actions that only move the browser; the first action outside this
+# set (extract_content, done, …) ends the recorded prefix.
+NAVIGATION_ACTIONS = frozenset({
+    "go_to_url",
+    "search_google",
+    "open_tab",
+    "input_text",
+    "click_element",
+    "click_element_by_index",
+    "send_keys",
+    "scroll_down",
+    "scroll_up",
+    "wait",
+})
+ELEMENT_ACTIONS = frozenset({"input_text", "click_element", "click_element_by_index"})
+FINGERPRINT_ATTRIBUTES = ("id", "name", "type", "role", "aria-label", "placeholder")
+ELEMENT_TIMEOUT_S = 5.0
+DEFAULT_SCROLL_PX = 600
+
+
+def trace_key(industry: str, city: str) -> tuple[str, str]:
+    """``("logistics", "warsaw")`` for ``(" Logistics", "WARSAW ")``."""
+    return tuple(" ".join(value.split()).casefold() for value in (industry, city))
+
+
+@dataclass
+class Step:
+    action: str
+    params: dict
+    element: dict | None = None  # {"tag": …, "attributes": {…}, "xpath": …} for element actions
+
+    @property
+    def selector(self) -> str | None:
+        return selector_for(self.element) if self.element else None
+
+
+@dataclass
+class Replay:
+    steps: int  # in the trace
+    replayed: int  # completed before the end or the divergence
+    reason: str = ""  # why replay stopped early
+
+    @property
+    def diverged(self) -> bool:
+        return self.replayed < self.steps
+
+
+# ──────────────────────────────────────────────
+# Recording
+# ──────────────────────────────────────────────
+
+def _fingerprint(element: dict | None) -> dict | None:
+    """The stable part of a browser-use ``DOMHistoryElement.to_dict()``."""
+    if not element:
+        return None
+    attributes = element.get("attributes") or {}
+    return {
+        "tag": (element.get("tag_name") or "").lower(),
+        "attributes": {k: attributes[k] for k in FINGERPRINT_ATTRIBUTES if attributes.get(k)},
+        "xpath": element.get("xpath") or "",
+    }
+
+
+def steps_from_history(history: dict) -> list[Step]:
+    """
+    The navigation prefix of a recorded hunt, from browser-use's
+    ``AgentHistoryList.model_dump()``: steps up to the first one that failed,
+    did something other than navigate, or acted on an element it can't
+    fingerprint.
+    """
+    steps: list[Step] = []
+    for item in history.get("history", []):
+        actions = [action for action in ((item.get("model_output") or {}).get("action") or []) if action]
+        if not actions or any((result or {}).get("error") for result in item.get("result") or []):
+            break
+        elements = (item.get("state") or {}).get("interacted_element") or []
+        for i, action in enumerate(actions):
+            name, params = next(iter(action.items()))
+            if name not in NAVIGATION_ACTIONS:
+                return steps
+            element = _fingerprint(elements[i] if i < len(elements) else None)
+            if name in ELEMENT_ACTIONS and not (element and (element["attributes"] or element["xpath"])):
+                return steps
+            steps.append(Step(name, params or {}, element if name in ELEMENT_ACTIONS else None))
+    return steps
+
+
+def selector_for(element: dict) -> str:
+    """
+    A selector that only matches the recorded element: its tag with every
+    stable attribute, or its XPath when it had none.
+    """
+    attributes = element.get("attributes") or {}
+    if not attributes:
+        return f"xpath=/{element['xpath'].lstrip('/')}"
+    quoted = "".join(f'[{name}="{_escape(value)}"]' for name, value in attributes.items())
+    return f"{element.get('tag') or '*'}{quoted}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# ──────────────────────────────────────────────
+# Replay
+# ──────────────────────────────────────────────
+
+class PlaywrightPage:
+    """The page interface ``replay`` drives, over a Playwright page."""
+
+    def __init__(self, page):
+        self.page = page
+
+    @property
+    def url(self) -> str:
+        return self.page.url
+
+    async def goto(self, url: str) -> None:
+        await self.page.goto(url, wait_until="domcontentloaded")
+
+    async def exists(self, selector: str, timeout: float) -> bool:
+        try:
+            await self.page.locator(selector).first.wait_for(state="visible", timeout=timeout * 1000)
+        except Exception:  # playwright TimeoutError
+            return False
+        return True
+
+    async def fill(self, selector: str, text: str) -> None:
+        await self.page.locator(selector).first.fill(text)
+
+    async def click(self, selector: str) -> None:
+        await self.page.locator(selector).first.click()
+
+    async def press(self, keys: str) -> None:
+        await self.page.keyboard.press(keys)
+
+    async def scroll(self, pixels: int) -> None:
+        await self.page.mouse.wheel(0, pixels)
+
+    async def wait(self, seconds: float) -> None:
+        await self.page.wait_for_timeout(seconds * 1000)
+
+
+async def agent_page(agent) -> PlaywrightPage:
+    """The current page of a browser-use ``Agent``'s browser, launched if needed."""
+    session = getattr(agent, "browser_session", None) or agent.browser_context
+    return PlaywrightPage(await session.get_current_page())
+
+
+async def _perform(page, step: Step) -> None:
+    params = step.params
+    if step.action in ("go_to_url", "open_tab"):
+        await page.goto(params["url"])
+    elif step.action == "search_google":
+        await page.goto(f"https://www.google.com/search?q={quote_plus(params['query'])}&udm=14")
+    elif step.action == "input_text":
+        await page.fill(step.selector, params.get("text", ""))
+    elif step.action in ("click_element", "click_element_by_index"):
+        await page.click(step.selector)
+    elif step.action == "send_keys":
+        await page.press(params["keys"])
+    elif step.action in ("scroll_down", "scroll_up"):
+        pixels = params.get("amount") or DEFAULT_SCROLL_PX
+        await page.scroll(pixels if step.action == "scroll_down" else -pixels)
+    elif step.action == "wait":
+        await page.wait(params.get("seconds", 1))
+
+
+async def replay(steps: list[Step], page, element_timeout: float = ELEMENT_TIMEOUT_S) -> Replay:
+    """
+    Run ``steps`` on ``page`` without the LLM, stopping at the first step
+    whose element doesn't show up or whose action fails.
+    """
+    for done, step in enumerate(steps):
+        if step.selector and not await page.exists(step.selector, element_timeout):
+            return Replay(len(steps), done, f"{step.action}: no element matches {step.selector}")
+        try:
+            await _perform(page, step)
+        except Exception as e:
+            return Replay(len(steps), done, f"{step.action}: {type(e).__name__}: {e}")
+    return Replay(len(steps), len(steps))
+
+
+async def replay_on_agent(agent, steps: list[Step], element_timeout: float = ELEMENT_TIMEOUT_S) -> Replay:
+    """
+    ``replay`` on a browser-use ``Agent``'s page. Any failure to reach the
+    page (browser launch, an attribute renamed by a browser-use release)
+    counts as a divergence at step 0, so the hunt falls back to the agent.
+    """
+    try:
+        page = await agent_page(agent)
+        return await replay(steps, page, element_timeout)
+    except Exception as e:
+        return Replay(len(steps), 0, f"{type(e).__name__}: {e}")
+
+
+def merge_route(replayed: list[Step], agent_steps: list[Step]) -> list[Step]:
+    """
+    The route to store after a diverged replay: the steps replay got
+    through, then the agent's own navigation without what it repeated. An
+    agent that started over (opened a URL first) recorded the whole route.
+    """
+    if not agent_steps or agent_steps[0].action in ("go_to_url", "search_google", "open_tab"):
+        return agent_steps or replayed
+    overlap = next(
+        (k for k in range(min(len(replayed), len(agent_steps)), 0, -1) if agent_steps[:k] == replayed[-k:]), 0
+    )
+    return replayed + agent_steps[overlap:]
+
+
+# ──────────────────────────────────────────────
+# Storage (leads.db)
+# ──────────────────────────────────────────────
+
+def save_trace(writer: LeadWriter, industry: str, city: str, steps: list[Step]) -> None:
+    """Record (or re-record) the navigation for ``(industry, city)``; resets its replay counts."""
+    payload = json.dumps([asdict(step) for step in steps], ensure_ascii=False)
+    now = datetime.utcnow().isoformat()
+    writer.submit(lambda conn: conn.execute(
+        "INSERT OR REPLACE INTO agent_traces (industry, city, steps, recorded_at) VALUES (?, ?, ?, ?)",
+        (*trace_key(industry, city), payload, now),
+    )).result()
+
+
+def record_replay(writer: LeadWriter, industry: str, city: str, result: Replay) -> None:
+    now = datetime.utcnow().isoformat()
+    writer.submit(lambda conn: conn.execute(
+        "UPDATE agent_traces SET replays = replays + 1, divergences = divergences + ?, last_replayed_at = ?"
+        " WHERE industry = ? AND city = ?",
+        (int(result.diverged), now, *trace_key(industry, city)),
+    )).result()
+
+
+def forget_traces(writer: LeadWriter) -> int:
+    return writer.submit(lambda conn: conn.execute("DELETE FROM agent_traces;").rowcount).result()
+
+
+def load_trace(path: str, industry: str, city: str) -> list[Step] | None:
+    """The recorded navigation for ``(industry, city)``, or None."""
+    conn = connect_readonly(path)
+    try:
+        row = conn.execute(
+            "SELECT steps FROM agent_traces WHERE industry = ? AND city = ?", trace_key(industry, city)
+        ).fetchone()
+    except sqlite3.OperationalError:  # no table yet
+        row = None
+    finally:
+        conn.close()
+    return [Step(**step) for step in json.loads(row[0])] if row else None
+
+
+def list_traces(path: str) -> list[dict]:
+    """One row per recorded (industry, city) with its replay counts, newest first."""
+    conn = connect_readonly(path)
+    try:
+        cursor = conn.execute(
+            "SELECT industry, city, json_array_length(steps) AS steps, recorded_at, replays, divergences,"
+            " last_replayed_at FROM agent_traces ORDER BY recorded_at DESC"
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
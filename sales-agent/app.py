@@ -2,85 +2,59 @@
 ANTONI SALES OS — Cold Outreach Automation Dashboard
 =====================================================
 Tech: Streamlit · browser-use Agent · ChatAnthropic · SQLite · Pandas
+
+browser-use and langchain-anthropic (a whole browser automation stack) are
+imported when a hunt starts, not when the dashboard renders.
 """
 
 import asyncio
-import json
-import re
-import sqlite3
 import os
+import sys
+from contextlib import nullcontext
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
-from langchain_anthropic import ChatAnthropic
-from browser_use import Agent
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sales_common.llm_json import extract_json
+from sales_common.profiling import RunProfile, profiled, render_profile
+from sales_common.resilience import CircuitOpenError, RetryPolicy, acall, breaker, breaker_states
+import agent_trace
+import lead_store
+from lead_store import LeadWriter
+
+# A hunt is minutes of browsing: retry a transient failure once, and after two
+# failed hunts in a row refuse new ones for a while instead of burning more.
+AGENT_BREAKER = breaker(
+    "browser-agent", failure_threshold=2, reset_timeout=120.0,
+    policy=RetryPolicy(attempts=2, base_delay=5.0, max_delay=30.0),
+)
 
 # ──────────────────────────────────────────────
 # Database helpers
 # ──────────────────────────────────────────────
 DB_PATH = os.path.join(os.path.dirname(__file__), "leads.db")
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
 
 
-def _get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    return conn
-
-
-def init_db() -> None:
-    """Create the leads table if it doesn't exist."""
-    conn = _get_connection()
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS leads (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            company     TEXT,
-            website     TEXT,
-            phone       TEXT,
-            rating      INTEGER,
-            email_draft TEXT,
-            industry    TEXT,
-            city        TEXT,
-            created_at  TEXT
-        );
-        """
-    )
-    conn.commit()
-    conn.close()
+@st.cache_resource(show_spinner=False)
+def _writer() -> LeadWriter:
+    """The process-wide leads.db writer, shared by every session."""
+    return LeadWriter(DB_PATH)
 
 
 def save_leads(leads: list[dict], industry: str, city: str) -> None:
-    """Insert a batch of leads into SQLite."""
-    conn = _get_connection()
-    now = datetime.utcnow().isoformat()
-    for lead in leads:
-        conn.execute(
-            """
-            INSERT INTO leads (company, website, phone, rating, email_draft, industry, city, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                lead.get("company", ""),
-                lead.get("website", ""),
-                lead.get("phone", ""),
-                lead.get("rating", 0),
-                lead.get("email_draft", ""),
-                industry,
-                city,
-                now,
-            ),
-        )
-    conn.commit()
-    conn.close()
+    """Insert a batch of leads into SQLite (group-committed by the writer thread)."""
+    _writer().save_leads(leads, industry, city)
 
 
-def load_leads() -> pd.DataFrame:
+def load_leads() -> "pd.DataFrame":
     """Return all saved leads as a DataFrame."""
-    conn = _get_connection()
-    df = pd.read_sql_query("SELECT * FROM leads ORDER BY created_at DESC", conn)
-    conn.close()
-    return df
+    return lead_store.load_leads(DB_PATH)
 
 
 # ──────────────────────────────────────────────
@@ -115,63 +89,101 @@ IMPORTANT: Return your final answer as ONLY a valid JSON array of objects. Examp
 Do NOT wrap the JSON in markdown code fences. Return ONLY the JSON array.
 """
 
+# Appended when recorded navigation is replayed first; replay may have stopped part-way.
+REPLAY_NOTE = """
+NOTE: The browser has already been navigated along the route of an earlier search.
+If it is already showing the Google Maps results for this search, continue from there instead of searching again.
+"""
+
 
 def _extract_json(text: str) -> list[dict]:
     """
-    Robustly extract a JSON array from the agent's output.
-    Handles cases where the agent wraps JSON in markdown fences or adds extra text.
+    Robustly extract a JSON array of leads from the agent's output.
+    Handles markdown fences, extra prose and nested arrays. An answer cut
+    off mid-array yields nothing rather than a half-finished last lead.
     """
-    # Try direct parse first
-    text = text.strip()
-    try:
-        result = json.loads(text)
-        if isinstance(result, list):
-            return result
-    except json.JSONDecodeError:
-        pass
-
-    # Try to find a JSON array within the text
-    pattern = r'\[[\s\S]*?\]'
-    matches = re.findall(pattern, text)
-    for match in reversed(matches):  # try the last (most likely) match first
-        try:
-            result = json.loads(match)
-            if isinstance(result, list):
-                return result
-        except json.JSONDecodeError:
-            continue
+    leads = extract_json(
+        text,
+        list,
+        accept=lambda value: any(isinstance(item, dict) for item in value),
+        allow_partial=False,
+    )
+    if not leads:
+        return []
+    return [item for item in leads if isinstance(item, dict)]
 
-    return []
 
+@st.cache_resource(show_spinner=False)
+def _get_llm(api_key: str):
+    """ChatAnthropic client, built once per key and reused across reruns."""
+    from langchain_anthropic import ChatAnthropic
 
-async def run_agent(api_key: str, industry: str, city: str, max_leads: int, log_placeholder) -> list[dict]:
-    """
-    Launch the browser-use Agent, stream status updates into the
-    Streamlit placeholder, and return parsed leads.
-    """
-    llm = ChatAnthropic(
+    return ChatAnthropic(
         model="claude-3-5-sonnet-20240620",
         api_key=api_key,
         timeout=120,
         temperature=0.0,
     )
 
+
+async def run_agent(
+    api_key: str, industry: str, city: str, max_leads: int, log_placeholder, replay: bool = True
+) -> list[dict]:
+    """
+    Launch the browser-use Agent, stream status updates into the
+    Streamlit placeholder, and return parsed leads.
+
+    With ``replay``, navigation recorded by an earlier hunt for the same
+    industry and city is replayed without the LLM before the agent starts.
+    """
+    from browser_use import Agent
+
+    llm = _get_llm(api_key)
+
     task = AGENT_TASK_TEMPLATE.format(
         industry=industry,
         city=city,
         max_leads=max_leads,
     )
+    trace = agent_trace.load_trace(DB_PATH, industry, city) if replay else None
 
     log_placeholder.info("🚀 Initializing Agent & launching browser …")
 
     agent = Agent(
-        task=task,
+        task=task + REPLAY_NOTE if trace else task,
         llm=llm,
     )
 
+    replayed = None
+    if trace:
+        log_placeholder.info(f"♻️ Replaying {len(trace)} recorded navigation steps (no LLM) …")
+        replayed = await agent_trace.replay_on_agent(agent, trace)
+        try:
+            agent_trace.record_replay(_writer(), industry, city, replayed)
+        except Exception:
+            pass  # replay counts are diagnostics; never fail the hunt over them
+        if replayed.diverged:
+            log_placeholder.warning(
+                f"↪️ Page changed after step {replayed.replayed}/{replayed.steps} ({replayed.reason}) "
+                "— the agent takes over."
+            )
+
     log_placeholder.info("🔍 Agent is browsing — this can take a few minutes …")
 
-    result = await agent.run()
+    def on_retry(retry: int, delay: float, exc: BaseException) -> None:
+        log_placeholder.warning(f"⏳ {type(exc).__name__}: {exc} — retrying in {delay:.0f}s …")
+
+    fresh = [agent]
+
+    async def hunt():
+        nonlocal replayed
+        if not fresh:
+            # A retry gets a new Agent (and browser): the failed one keeps its history and session.
+            replayed = None  # the new browser starts from scratch, so its history is the whole route
+            return await Agent(task=task, llm=llm).run()
+        return await fresh.pop().run()
+
+    result = await acall(AGENT_BREAKER, hunt, on_retry=on_retry)
 
     log_placeholder.info("✅ Agent finished — parsing results …")
 
@@ -187,6 +199,15 @@ async def run_agent(api_key: str, industry: str, city: str, max_leads: int, log_
         )
         # Return a single-entry list so the user can still see what came back
         leads = [{"company": "PARSE_ERROR", "website": "", "phone": "", "rating": 0, "email_draft": raw_output}]
+    elif any(lead.get("company") for lead in leads) and hasattr(result, "model_dump") and (
+        replayed is None or replayed.diverged
+    ):
+        # Only a hunt that produced leads records (or repairs) the route.
+        steps = agent_trace.steps_from_history(result.model_dump())
+        if replayed is not None:
+            steps = agent_trace.merge_route(trace[: replayed.replayed], steps)
+        if steps:
+            agent_trace.save_trace(_writer(), industry, city, steps)
 
     return leads
 
@@ -322,15 +343,56 @@ def main():
         industry = st.text_input("Target Industry", value="Logistics", placeholder="e.g. Logistics, Manufacturing")
         city = st.text_input("City", value="Warsaw", placeholder="e.g. Warsaw, Kraków")
         max_leads = st.slider("Max Leads to Find", min_value=1, max_value=20, value=5, step=1)
+        replay_route = st.toggle(
+            "♻️ Replay recorded navigation",
+            value=True,
+            help="Repeat hunts replay the Maps navigation recorded last time without LLM calls; "
+                 "the agent takes over where the page differs.",
+        )
+
+        health = [state for state in breaker_states() if state["calls"]]
+        if health:
+            st.divider()
+            st.markdown("## 🩺 BACKENDS")
+            for state in health:
+                icon = {"closed": "🟢", "half-open": "🟡"}.get(state["state"], "🔴")
+                st.caption(
+                    f"{icon} {state['endpoint']}: {state['state']} · {state['calls']} calls · "
+                    f"{state['retries']} retries · {state['rejected']} rejected"
+                )
+                if state["state"] != "closed" and state["last_error"]:
+                    st.caption(f"last error: {state['last_error']}")
 
         st.divider()
         st.markdown("## 📊 DATABASE")
         if st.button("🗑️ Clear Database", use_container_width=True):
-            conn = _get_connection()
-            conn.execute("DELETE FROM leads;")
-            conn.commit()
-            conn.close()
+            _writer().clear()
             st.success("Database cleared.")
+        traces = agent_trace.list_traces(DB_PATH)
+        if traces and st.button(f"🧭 Forget {len(traces)} Recorded Routes", use_container_width=True):
+            agent_trace.forget_traces(_writer())
+            st.success("Recorded routes removed.")
+        if st.button("🧹 Archive & Compact", use_container_width=True,
+                     help=f"Move leads older than {lead_store.RETENTION_DAYS} days to the archive, then reclaim space"):
+            report = lead_store.maintain(_writer())
+            st.success(
+                f"Archived {report.archived} leads, kept {report.kept}, "
+                f"reclaimed {report.reclaimed_bytes / 1024:.0f} KiB."
+            )
+
+        st.divider()
+        st.markdown("## 🔬 PROFILING")
+        profile_hunt = st.toggle(
+            "Profile this hunt",
+            value=False,
+            help="Sample stacks (agent loop, API waits, the leads.db writer); a flamegraph is saved "
+                 "per hunt. Off: no overhead.",
+        )
+        trace_allocations = profile_hunt and st.checkbox(
+            "Trace allocations instead",
+            help="A separate pass: the top allocation sites per phase, no flamegraph. "
+                 "tracemalloc slows the hunt 2-3x, so its times aren't comparable.",
+        )
 
     # ── Main area ──
     col_btn, col_status = st.columns([1, 2])
@@ -346,23 +408,40 @@ def main():
             st.error("🔑 **API Key is required.** Enter your Anthropic API key in the sidebar.")
         else:
             log_area.info("⏳ Preparing mission …")
-            try:
-                leads = asyncio.run(
-                    run_agent(
-                        api_key=api_key,
-                        industry=industry,
-                        city=city,
-                        max_leads=max_leads,
-                        log_placeholder=log_area,
-                    )
+            profiler = (
+                RunProfile(
+                    f"hunt-{datetime.utcnow():%Y%m%d-%H%M%S}", PROFILES_DIR,
+                    threads=("leads-db-writer",), trace_allocations=trace_allocations,
                 )
-
-                # Save to DB
-                save_leads(leads, industry, city)
-                log_area.success(f"✅ Hunt complete — **{len(leads)}** leads captured and saved!")
-
-            except Exception as exc:
-                log_area.error(f"❌ Agent error: {exc}")
+                if profile_hunt else nullcontext()
+            )
+            with profiler as profile:
+                try:
+                    with profiled(profile, "run_agent"):
+                        leads = asyncio.run(
+                            run_agent(
+                                api_key=api_key,
+                                industry=industry,
+                                city=city,
+                                max_leads=max_leads,
+                                log_placeholder=log_area,
+                                replay=replay_route,
+                            )
+                        )
+
+                    # Save to DB
+                    with profiled(profile, "save_leads"):
+                        save_leads(leads, industry, city)
+                    log_area.success(f"✅ Hunt complete — **{len(leads)}** leads captured and saved!")
+
+                except CircuitOpenError as exc:
+                    log_area.error(f"⛔ Not starting: {exc}. Recent hunts failed — check the API key / status page.")
+                except Exception as exc:
+                    log_area.error(f"❌ Agent error: {exc}")
+            st.session_state.hunt_profile = profile.summary if profile is not None else None
+
+    if st.session_state.get("hunt_profile"):
+        render_profile(st.session_state.hunt_profile)
 
     # ── Display saved leads ──
     st.divider()
@@ -411,5 +490,5 @@ def main():
 # Entry-point
 # ──────────────────────────────────────────────
 if __name__ == "__main__":
-    init_db()
+    _writer()  # creates leads.db / the table before the first read
     main()
@@ -0,0 +1,435 @@
+"""
+leads.db access for the sales-agent dashboard
+=============================================
+Every Streamlit session used to open its own connection to write, so
+concurrent hunts and "Clear Database" raced for SQLite's single write lock
+and failed with "database is locked".
+
+Now all writes go through one ``LeadWriter`` thread per process. Sessions
+put write jobs on a queue and wait for their result; the writer drains
+whatever has queued up and commits it as one transaction (group commit),
+so N concurrent saves cost one fsync instead of N lock handoffs. Reads
+use separate read-only connections, which WAL lets run alongside the
+writer.
+
+Maintenance keeps the file small and ``load_leads`` fast:
+- the writer runs a PASSIVE checkpoint whenever it has been idle for a
+  while after writing (it never waits on readers), and
+  ``journal_size_limit`` trims leads.db-wal when SQLite next resets it,
+  so the file doesn't grow without bound
+- ``maintain()`` moves leads older than the retention window into a
+  zlib-compressed archive database, then runs an incremental vacuum and
+  a TRUNCATE checkpoint, and reports the space reclaimed and load-time
+  change. It is not scheduled: run it from the dashboard ("Archive &
+  Compact") or the command line. The first run converts an existing
+  leads.db to incremental auto-vacuum, which rebuilds the file once.
+
+    python lead_store.py maintain --days 90
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    company     TEXT,
+    website     TEXT,
+    phone       TEXT,
+    rating      INTEGER,
+    email_draft TEXT,
+    industry    TEXT,
+    city        TEXT,
+    created_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leads_created_at ON leads (created_at);
+CREATE TABLE IF NOT EXISTS agent_traces (
+    industry         TEXT,
+    city             TEXT,
+    steps            TEXT,
+    recorded_at      TEXT,
+    replays          INTEGER NOT NULL DEFAULT 0,
+    divergences      INTEGER NOT NULL DEFAULT 0,
+    last_replayed_at TEXT,
+    PRIMARY KEY (industry, city)
+);
+"""
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_leads (
+    id          INTEGER PRIMARY KEY,
+    created_at  TEXT,
+    industry    TEXT,
+    city        TEXT,
+    payload     BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_archived_created_at ON archived_leads (created_at);
+"""
+
+BUSY_TIMEOUT_MS = 5000
+MAX_BATCH = 256  # jobs per group commit
+CHECKPOINT_IDLE_S = 30.0  # checkpoint after this long without writes
+WAL_SIZE_LIMIT = 4 * 1024 * 1024  # bytes leads.db-wal is trimmed to after a checkpoint
+RETENTION_DAYS = 90
+ARCHIVE_SUFFIX = "-archive.db"
+
+_STOP = object()
+
+
+def _configure(conn: sqlite3.Connection) -> sqlite3.Connection:
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+    return conn
+
+
+def connect_readonly(path: str) -> sqlite3.Connection:
+    """A read-only connection; it never takes the write lock."""
+    return _configure(sqlite3.connect(f"file:{path}?mode=ro", uri=True))
+
+
+# ──────────────────────────────────────────────
+# Writer thread
+# ──────────────────────────────────────────────
+
+class LeadWriter:
+    """
+    The only writer to ``path`` in this process.
+
+    ``submit(fn)`` queues ``fn(conn)`` and returns a ``Future`` for its result.
+    Queued jobs run in order, and each batch is committed together. If a
+    batch fails, its jobs are retried one per transaction, so one bad job
+    fails only its own future.
+    """
+
+    def __init__(self, path: str, max_batch: int = MAX_BATCH, checkpoint_idle: float = CHECKPOINT_IDLE_S):
+        self.path = path
+        self.max_batch = max_batch
+        self.checkpoint_idle = checkpoint_idle
+        self._queue: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        # Counters for the load test / diagnostics.
+        self.commits = 0
+        self.jobs = 0
+        self.checkpoints = 0
+        self._thread = threading.Thread(target=self._run, name="leads-db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    # ── Public API ──
+
+    def submit(self, fn: Callable[[sqlite3.Connection], object], transaction: bool = True) -> Future:
+        """
+        Queue ``fn(conn)``. With ``transaction=False`` it runs on its own,
+        outside any transaction (for PRAGMAs like ``incremental_vacuum``).
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("leads.db writer is closed")
+        future: Future = Future()
+        self._queue.put((fn, future, transaction))
+        return future
+
+    def save_leads(self, leads: list[dict], industry: str, city: str) -> int:
+        """Insert a batch of leads; blocks until committed and returns the row count."""
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (
+                lead.get("company", ""),
+                lead.get("website", ""),
+                lead.get("phone", ""),
+                lead.get("rating", 0),
+                lead.get("email_draft", ""),
+                industry,
+                city,
+                now,
+            )
+            for lead in leads
+        ]
+
+        def insert(conn: sqlite3.Connection) -> int:
+            conn.executemany(
+                """
+                INSERT INTO leads (company, website, phone, rating, email_draft, industry, city, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            return len(rows)
+
+        return self.submit(insert).result()
+
+    def clear(self) -> int:
+        """Delete every lead; returns how many were removed."""
+        return self.submit(lambda conn: conn.execute("DELETE FROM leads;").rowcount).result()
+
+    def close(self) -> None:
+        """Finish queued jobs, then stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # ── Thread ──
+
+    def _run(self) -> None:
+        try:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            _configure(conn)
+            # Takes effect only on a new, empty file; maintain() converts older ones.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            conn.execute("PRAGMA journal_mode=WAL;")
+            # Safe with WAL: a power cut may lose the last commits, never the file.
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT};")
+            conn.executescript(SCHEMA)
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        dirty = False
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.checkpoint_idle if dirty else None)
+            except queue.Empty:
+                self._checkpoint(conn)
+                dirty = False
+                continue
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [job for job in batch if job is not _STOP]
+
+            group = []
+            for fn, future, transaction in batch:
+                if transaction:
+                    group.append((fn, future))
+                    continue
+                self._commit(conn, group)
+                group = []
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(conn))
+                    except BaseException as e:
+                        future.set_exception(e)
+            self._commit(conn, group)
+            dirty = True
+        self._checkpoint(conn)
+        conn.close()
+
+    def _checkpoint(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE);").fetchall()
+            self.checkpoints += 1
+        except sqlite3.Error:
+            pass  # the next idle period tries again
+
+    def _commit(self, conn: sqlite3.Connection, batch: list) -> None:
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            results = [fn(conn) for fn, _ in batch]
+            conn.execute("COMMIT;")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK;")
+            for job in batch:
+                self._commit_one(conn, *job)
+            return
+        self.commits += 1
+        self.jobs += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit_one(self, conn: sqlite3.Connection, fn, future: Future) -> None:
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            result = fn(conn)
+            conn.execute("COMMIT;")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK;")
+            future.set_exception(e)
+            return
+        self.commits += 1
+        self.jobs += 1
+        future.set_result(result)
+
+
+# ──────────────────────────────────────────────
+# Reads
+# ──────────────────────────────────────────────
+
+def load_leads(path: str) -> "pd.DataFrame":
+    """Return all saved leads as a DataFrame, read over a read-only connection."""
+    import pandas as pd
+
+    conn = connect_readonly(path)
+    try:
+        return pd.read_sql_query("SELECT * FROM leads ORDER BY created_at DESC", conn)
+    finally:
+        conn.close()
+
+
+# ──────────────────────────────────────────────
+# Maintenance
+# ──────────────────────────────────────────────
+
+@dataclass
+class MaintenanceReport:
+    archived: int
+    kept: int
+    db_bytes_before: int
+    db_bytes_after: int
+    wal_bytes_before: int
+    wal_bytes_after: int
+    pages_freed: int
+    load_ms_before: float
+    load_ms_after: float
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return (self.db_bytes_before + self.wal_bytes_before) - (self.db_bytes_after + self.wal_bytes_after)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "reclaimed_bytes": self.reclaimed_bytes}
+
+
+def archive_path_for(path: str) -> str:
+    return path[:-3] + ARCHIVE_SUFFIX if path.endswith(".db") else path + ARCHIVE_SUFFIX
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _load_ms(path: str, repeat: int = 3) -> float:
+    """Best-of-``repeat`` time for the dashboard's ``load_leads`` query."""
+    best = float("inf")
+    for _ in range(repeat):
+        conn = connect_readonly(path)
+        started = time.perf_counter()
+        conn.execute("SELECT * FROM leads ORDER BY created_at DESC").fetchall()
+        best = min(best, time.perf_counter() - started)
+        conn.close()
+    return best * 1000
+
+
+def maintain(
+    writer: LeadWriter,
+    retention_days: int = RETENTION_DAYS,
+    archive_path: str | None = None,
+    now: datetime | None = None,
+) -> MaintenanceReport:
+    """
+    Archive leads older than ``retention_days``, then incremental-vacuum and
+    checkpoint. Runs on the writer thread, so it never races a save.
+
+    The archive is written and committed first (idempotent by lead id), then
+    the rows are deleted from leads.db: a crash in between leaves a
+    duplicate in the archive, never a lost lead.
+    """
+    path = writer.path
+    archive_path = archive_path or archive_path_for(path)
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=retention_days)).isoformat()
+    db_before, wal_before = _file_size(path), _file_size(path + "-wal")
+    load_before = _load_ms(path)
+
+    def archive(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute("SELECT * FROM leads WHERE created_at < ? ORDER BY id", (cutoff,))
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return 0
+        archive_conn = sqlite3.connect(archive_path)
+        try:
+            archive_conn.executescript(ARCHIVE_SCHEMA)
+            with archive_conn:
+                archive_conn.executemany(
+                    "INSERT OR IGNORE INTO archived_leads VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            row["id"], row["created_at"], row["industry"], row["city"],
+                            zlib.compress(json.dumps(row, ensure_ascii=False).encode("utf-8"), 6),
+                        )
+                        for row in rows
+                    ],
+                )
+        finally:
+            archive_conn.close()
+        conn.execute("DELETE FROM leads WHERE created_at < ?", (cutoff,))
+        return len(rows)
+
+    def compact(conn: sqlite3.Connection) -> int:
+        free = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+            # One-off for a file created without it: set the mode, rebuild.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            conn.execute("VACUUM;")
+        # Each step of incremental_vacuum frees one page; executescript steps it to the end.
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchall()
+        return free - conn.execute("PRAGMA freelist_count;").fetchone()[0]
+
+    archived = writer.submit(archive).result()
+    pages_freed = writer.submit(compact, transaction=False).result()
+    kept = writer.submit(lambda conn: conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]).result()
+
+    return MaintenanceReport(
+        archived=archived,
+        kept=kept,
+        db_bytes_before=db_before,
+        db_bytes_after=_file_size(path),
+        wal_bytes_before=wal_before,
+        wal_bytes_after=_file_size(path + "-wal"),
+        pages_freed=pages_freed,
+        load_ms_before=load_before,
+        load_ms_after=_load_ms(path),
+    )
+
+
+def load_archived(archive_path: str, limit: int | None = None) -> list[dict]:
+    """Decompressed archived leads, newest first."""
+    conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+    try:
+        sql = "SELECT payload FROM archived_leads ORDER BY created_at DESC"
+        rows = conn.execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+    finally:
+        conn.close()
+    return [json.loads(zlib.decompress(payload)) for (payload,) in rows]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="leads.db maintenance: archive old leads, vacuum, checkpoint.")
+    parser.add_argument("command", choices=["maintain"])
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "leads.db"))
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Keep leads newer than this in leads.db")
+    args = parser.parse_args()
+
+    writer = LeadWriter(args.db)
+    report = maintain(writer, args.days)
+    writer.close()
+    print(json.dumps(report.as_dict(), indent=2))
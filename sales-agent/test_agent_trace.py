@@ -0,0 +1,250 @@
+"""
+Replay of recorded agent navigation against a local fixture "Maps" page,
+served over HTTP and driven through the same page interface as Playwright.
+"""
+
+import asyncio
+import re
+import threading
+import urllib.request
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
+
+import pytest
+
+from agent_trace import (
+    Step,
+    list_traces,
+    load_trace,
+    merge_route,
+    record_replay,
+    replay,
+    replay_on_agent,
+    save_trace,
+    selector_for,
+    steps_from_history,
+)
+from lead_store import LeadWriter
+
+SEARCH_PAGE = """<html><body>
+<div role="dialog"><a href="/maps/about">About</a></div>
+<form action="/maps/search" method="get">
+  <input id="{box_id}" name="q" class="x3AX1-LfntMc" aria-label="Search Google Maps">
+  <button id="searchbutton" type="submit" aria-label="Search"></button>
+</form>
+</body></html>"""
+
+RESULTS_PAGE = """<html><body>
+<div role="feed" aria-label="Results for {q}">
+  <a class="hfpxzc" href="/maps/place/1">Trans-Pol Sp. z o.o.</a>
+  <a class="hfpxzc" href="/maps/place/2">Logimax Warszawa</a>
+</div>
+</body></html>"""
+
+
+class FixtureMaps(ThreadingHTTPServer):
+    """A two-page stand-in for Google Maps: a search form and a results feed."""
+
+    def __init__(self):
+        self.box_id = "searchboxinput"
+        super().__init__(("127.0.0.1", 0), _MapsHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/maps"
+
+
+class _MapsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/maps":
+            body = SEARCH_PAGE.format(box_id=self.server.box_id)
+        elif url.path == "/maps/search":
+            body = RESULTS_PAGE.format(q=parse_qs(url.query).get("q", [""])[0])
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Elements(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.elements: list[dict] = []
+        self.forms: list[dict] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: v or "" for k, v in attrs}
+        if tag == "form":
+            self.forms.append(attrs)
+        self.elements.append({"tag": tag, "attrs": attrs, "form": len(self.forms) - 1 if self.forms else None})
+
+
+class FixturePage:
+    """
+    ``replay``'s page interface over plain HTTP: enough of a browser to fill
+    inputs, submit forms and follow links on the fixture pages.
+    """
+
+    _SELECTOR = re.compile(r'^(\w+|\*)((?:\[[\w-]+="[^"]*"\])*)$')
+    _ATTRIBUTE = re.compile(r'\[([\w-]+)="([^"]*)"\]')
+
+    def __init__(self):
+        self.url = ""
+        self.values: dict[int, str] = {}
+        self.dom = _Elements()
+
+    async def goto(self, url: str) -> None:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            html = response.read().decode("utf-8")
+        self.url, self.values, self.dom = url, {}, _Elements()
+        self.dom.feed(html)
+
+    def _find(self, selector: str) -> int | None:
+        tag, attributes = self._SELECTOR.match(selector).groups()
+        wanted = dict(self._ATTRIBUTE.findall(attributes))
+        for i, element in enumerate(self.dom.elements):
+            if tag in ("*", element["tag"]) and all(element["attrs"].get(k) == v for k, v in wanted.items()):
+                return i
+        return None
+
+    async def exists(self, selector: str, timeout: float) -> bool:
+        return self._find(selector) is not None
+
+    async def fill(self, selector: str, text: str) -> None:
+        self.values[self._find(selector)] = text
+
+    async def click(self, selector: str) -> None:
+        element = self.dom.elements[self._find(selector)]
+        if element["tag"] == "a":
+            await self.goto(urljoin(self.url, element["attrs"]["href"]))
+        elif element["form"] is not None:
+            form = element["form"]
+            fields = {
+                e["attrs"]["name"]: self.values.get(i, "")
+                for i, e in enumerate(self.dom.elements)
+                if e["form"] == form and e["tag"] == "input" and e["attrs"].get("name")
+            }
+            action = urljoin(self.url, self.dom.forms[form].get("action", ""))
+            await self.goto(f"{action}?{urlencode(fields)}")
+
+    async def press(self, keys: str) -> None:
+        pass
+
+    async def scroll(self, pixels: int) -> None:
+        pass
+
+    async def wait(self, seconds: float) -> None:
+        pass
+
+
+def _element(tag: str, xpath: str, **attributes) -> dict:
+    """A ``DOMHistoryElement.to_dict()`` as browser-use records it."""
+    return {"tag_name": tag, "xpath": xpath, "highlight_index": 3, "attributes": attributes}
+
+
+def _recorded_hunt(maps_url: str) -> dict:
+    """``AgentHistoryList.model_dump()`` of a hunt: navigate, then extract and finish."""
+
+    def step(action: dict, element: dict | None = None, error: str | None = None) -> dict:
+        return {
+            "model_output": {"current_state": {}, "action": [action]},
+            "result": [{"error": error} if error else {"is_done": False}],
+            "state": {"url": maps_url, "interacted_element": [element]},
+        }
+
+    return {"history": [
+        step({"go_to_url": {"url": maps_url}}),
+        step(
+            {"input_text": {"index": 3, "text": "Logistics in Warsaw"}},
+            _element("input", "html/body/form/input", id="searchboxinput", name="q",
+                     **{"class": "x3AX1-LfntMc", "aria-label": "Search Google Maps"}),
+        ),
+        step(
+            {"click_element_by_index": {"index": 4}},
+            _element("button", "html/body/form/button", id="searchbutton", type="submit", **{"aria-label": "Search"}),
+        ),
+        step({"extract_content": {"goal": "company names, websites and phones"}}),
+        step({"done": {"text": "[]", "success": True}}),
+    ]}
+
+
+@pytest.fixture
+def maps():
+    server = FixtureMaps()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_records_only_the_navigation_prefix(maps):
+    steps = steps_from_history(_recorded_hunt(maps.url))
+    assert [step.action for step in steps] == ["go_to_url", "input_text", "click_element_by_index"]
+    # Obfuscated class names are not part of the fingerprint.
+    assert selector_for(steps[1].element) == 'input[id="searchboxinput"][name="q"][aria-label="Search Google Maps"]'
+
+    hunt = _recorded_hunt(maps.url)
+    hunt["history"][1]["result"] = [{"error": "Element not found"}]
+    assert [step.action for step in steps_from_history(hunt)] == ["go_to_url"]
+
+
+def test_replay_reaches_the_results_without_the_agent(maps):
+    page = FixturePage()
+    result = asyncio.run(replay(steps_from_history(_recorded_hunt(maps.url)), page))
+    assert not result.diverged and result.replayed == 3
+    assert urlparse(page.url).path == "/maps/search"
+    assert parse_qs(urlparse(page.url).query) == {"q": ["Logistics in Warsaw"]}
+
+
+def test_replay_stops_where_the_page_diverges(maps):
+    steps = steps_from_history(_recorded_hunt(maps.url))
+    maps.box_id = "searchbox-v2"  # the search box was redesigned
+
+    page = FixturePage()
+    result = asyncio.run(replay(steps, page, element_timeout=0.1))
+    assert result.diverged and result.replayed == 1
+    assert result.reason.startswith("input_text: no element matches")
+    assert urlparse(page.url).path == "/maps"  # left where the agent takes over
+
+
+def test_replay_on_an_unusable_agent_counts_as_divergence(maps):
+    steps = steps_from_history(_recorded_hunt(maps.url))
+    result = asyncio.run(replay_on_agent(object(), steps))  # no browser_session / browser_context
+    assert result.diverged and result.replayed == 0 and "AttributeError" in result.reason
+
+
+def test_rerecorded_route_has_no_repeated_navigation(maps):
+    steps = steps_from_history(_recorded_hunt(maps.url))
+    submit = Step("send_keys", {"keys": "Enter"})
+    # Diverged after typing; the agent picked up from there, re-typing once.
+    assert merge_route(steps[:2], [steps[1], submit]) == [*steps[:2], submit]
+    # Diverged at the search box; the agent started over from the URL.
+    assert merge_route(steps[:1], steps) == steps
+    assert merge_route(steps[:1], []) == steps[:1]
+
+
+def test_traces_are_stored_per_normalised_target(maps, tmp_path):
+    path = str(tmp_path / "leads.db")
+    writer = LeadWriter(path)
+    steps = steps_from_history(_recorded_hunt(maps.url))
+
+    save_trace(writer, "Logistics", "Warsaw", steps)
+    assert load_trace(path, "  logistics ", "WARSAW") == steps
+    assert load_trace(path, "Logistics", "Kraków") is None
+
+    record_replay(writer, "logistics", "warsaw", asyncio.run(replay(steps, FixturePage())))
+    (row,) = list_traces(path)
+    assert (row["industry"], row["city"], row["steps"], row["replays"], row["divergences"]) == (
+        "logistics", "warsaw", 3, 1, 0,
+    )
+    writer.close()
@@ -0,0 +1,27 @@
+"""
+Parsing of the agent's final answer (the rest of app.py is Streamlit UI).
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from app import _extract_json
+
+LEADS = [
+    {"company": "Trans-Pol", "website": "https://transpol.pl", "phone": "+48 22 123 45 67", "rating": 8},
+    {"company": "Logimax", "website": "https://logimax.pl", "phone": "", "rating": 6},
+]
+
+
+def test_final_answer_is_parsed_from_prose():
+    answer = f"Here are the leads:\n```json\n{json.dumps(LEADS)}\n```\nDone."
+    assert _extract_json(answer) == LEADS
+
+
+def test_truncated_final_answer_saves_no_half_finished_lead():
+    answer = json.dumps(LEADS)
+    cut = answer[: answer.index("Logimax") + 3]  # ... {"company": "Log
+    assert _extract_json(cut) == []
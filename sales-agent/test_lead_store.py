@@ -0,0 +1,178 @@
+"""
+Load test for the leads.db writer: N concurrent "sessions" save hunts while
+others read the table, as several dashboard users would.
+
+``python test_lead_store.py [sessions]`` prints write throughput and p50/p99
+save latency for the writer thread next to the old per-session-connection
+approach (which is where "database is locked" came from).
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from lead_store import LeadWriter, archive_path_for, connect_readonly, load_archived, maintain
+
+LEADS_PER_HUNT = 5
+HUNTS_PER_SESSION = 20
+
+
+def _leads(session: int, hunt: int) -> list[dict]:
+    return [
+        {"company": f"Firma {session}-{hunt}-{i}", "website": f"https://f{session}-{hunt}-{i}.pl", "rating": 7}
+        for i in range(LEADS_PER_HUNT)
+    ]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def _legacy_save(path: str, leads: list[dict], industry: str, city: str) -> None:
+    """The pre-writer ``save_leads``: its own connection and transaction per call."""
+    conn = sqlite3.connect(path, timeout=0.5)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    now = datetime.utcnow().isoformat()
+    for lead in leads:
+        conn.execute(
+            "INSERT INTO leads (company, website, phone, rating, email_draft, industry, city, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (lead["company"], lead["website"], "", lead["rating"], "", industry, city, now),
+        )
+    conn.commit()
+    conn.close()
+
+
+def run_load(path: str, sessions: int, save) -> dict:
+    """``sessions`` threads each save HUNTS_PER_SESSION hunts and read the table in between."""
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    start = threading.Barrier(sessions)
+
+    def session(n: int) -> None:
+        start.wait()
+        for hunt in range(HUNTS_PER_SESSION):
+            began = time.perf_counter()
+            try:
+                save(_leads(n, hunt), "Logistics", "Warsaw")
+            except sqlite3.OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - began
+            reader = connect_readonly(path)
+            reader.execute("SELECT COUNT(*) FROM leads").fetchone()
+            reader.close()
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - began
+
+    reader = connect_readonly(path)
+    rows = reader.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+    reader.close()
+    return {
+        "sessions": sessions,
+        "saves": len(latencies),
+        "errors": len(errors),
+        "rows": rows,
+        "rows_per_s": rows / wall,
+        "p50_ms": _percentile(latencies, 50) * 1000 if latencies else 0.0,
+        "p99_ms": _percentile(latencies, 99) * 1000 if latencies else 0.0,
+    }
+
+
+def test_concurrent_sessions_never_hit_the_lock(tmp_path):
+    path = str(tmp_path / "leads.db")
+    writer = LeadWriter(path)
+    sessions = 16
+
+    report = run_load(path, sessions, writer.save_leads)
+
+    assert report["errors"] == 0
+    assert report["rows"] == sessions * HUNTS_PER_SESSION * LEADS_PER_HUNT
+    assert writer.commits < writer.jobs  # saves were group-committed
+    assert report["p99_ms"] < 1000
+
+    assert writer.clear() == report["rows"]
+    writer.close()
+
+
+def test_failed_job_only_fails_itself(tmp_path):
+    writer = LeadWriter(str(tmp_path / "leads.db"))
+    bad = writer.submit(lambda conn: conn.execute("INSERT INTO missing VALUES (1)"))
+    good = writer.submit(lambda conn: conn.execute("INSERT INTO leads (company) VALUES ('ok')").rowcount)
+    assert good.result() == 1
+    assert isinstance(bad.exception(), sqlite3.OperationalError)
+    writer.close()
+
+
+def test_maintain_archives_old_leads_and_reclaims_space(tmp_path):
+    path = str(tmp_path / "leads.db")
+    writer = LeadWriter(path)
+    for hunt in range(40):
+        writer.save_leads([{**lead, "email_draft": "Dzień dobry, " * 200} for lead in _leads(0, hunt)], "IT", "Kraków")
+    # The first 30 hunts happened last year.
+    writer.submit(lambda conn: conn.execute(
+        "UPDATE leads SET created_at = '2025-01-01T00:00:00' WHERE id <= ?", (30 * LEADS_PER_HUNT,)
+    )).result()
+
+    report = maintain(writer, retention_days=90, now=datetime(2025, 6, 1))
+
+    assert report.archived == 30 * LEADS_PER_HUNT and report.kept == 10 * LEADS_PER_HUNT
+    assert report.pages_freed > 0 and report.reclaimed_bytes > 0
+    assert report.wal_bytes_after == 0  # checkpointed with TRUNCATE
+    archived = load_archived(archive_path_for(path))
+    assert len(archived) == report.archived and archived[0]["city"] == "Kraków"
+    # Compressed: the archive is smaller than the space the rows took up.
+    assert os.path.getsize(archive_path_for(path)) < report.reclaimed_bytes
+
+    # Running it again is a no-op.
+    assert maintain(writer, retention_days=90, now=datetime(2025, 6, 1)).archived == 0
+    writer.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make_save in (
+            ("writer thread", lambda path: LeadWriter(path).save_leads),
+            ("per-session connections", lambda path: lambda *a: _legacy_save(path, *a)),
+        ):
+            path = f"{tmp}/{name.split()[0]}.db"
+            LeadWriter(path).close()  # schema
+            r = run_load(path, sessions, make_save(path))
+            print(
+                f"{name:24s} {r['sessions']} sessions  {r['rows_per_s']:8.0f} rows/s  "
+                f"p50 {r['p50_ms']:6.1f} ms  p99 {r['p99_ms']:6.1f} ms  locked errors {r['errors']}"
+            )
+
+
+def test_only_maintain_converts_an_old_file_to_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "leads.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY)")  # created before auto_vacuum existed
+    conn.close()
+
+    writer = LeadWriter(path)  # starting the writer doesn't rebuild the file
+    assert writer.submit(lambda conn: conn.execute("PRAGMA auto_vacuum;").fetchone()[0]).result() == 0
+    maintain(writer)
+    assert writer.submit(lambda conn: conn.execute("PRAGMA auto_vacuum;").fetchone()[0]).result() == 2
+    writer.close()
+
+    fresh = LeadWriter(str(tmp_path / "new.db"))
+    assert fresh.submit(lambda conn: conn.execute("PRAGMA auto_vacuum;").fetchone()[0]).result() == 2
+    fresh.close()
@@ -0,0 +1,73 @@
+"""
+Cold start of the sales-agent dashboard.
+
+The first render (via streamlit's AppTest, in a fresh interpreter) must not
+import browser-use, LangChain or Playwright: they load when a hunt starts.
+The check is on what got loaded, not on wall time; the render time is
+recorded as a test property (``--junitxml``) and printed by
+``python test_startup.py``.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# Imported by a hunt, never by rendering.
+PHASE_ONLY = ("browser_use", "langchain_anthropic", "playwright")
+
+_RENDER_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": sorted(m for m in sys.modules if "." not in m),
+}))
+"""
+
+
+def _app_copy(tmp_dir: str) -> str:
+    """The app next to the shared package, so the real leads.db stays untouched."""
+    os.makedirs(os.path.join(tmp_dir, "sales-agent"))
+    for name in ("app.py", "lead_store.py", "agent_trace.py"):
+        shutil.copy(os.path.join(HERE, name), os.path.join(tmp_dir, "sales-agent", name))
+    os.symlink(os.path.join(ROOT, "sales_common"), os.path.join(tmp_dir, "sales_common"))
+    return os.path.join(tmp_dir, "sales-agent", "app.py")
+
+
+def _first_render(tmp_dir: str) -> dict:
+    path = _app_copy(tmp_dir)
+    out = subprocess.run(
+        [sys.executable, "-c", _RENDER_PROBE, path],
+        cwd=os.path.dirname(path), capture_output=True, text=True, timeout=120, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_first_render_is_light(tmp_path, record_property):
+    pytest.importorskip("streamlit.testing.v1")
+    result = _first_render(str(tmp_path))
+    record_property("first_render_s", round(result["seconds"], 3))
+    assert result["exceptions"] == []
+    assert not set(PHASE_ONLY) & set(result["loaded"])
+
+
+if __name__ == "__main__":
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        print("first render: streamlit not installed, skipped")
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"first render: {_first_render(tmp)['seconds']:.2f} s")
@@ -5,271 +5,127 @@ Cold Outreach Automation Dashboard
 Phase 1: Google Search + Trafilatura (Low-Cost Scanner)
 Phase 2: Claude 3.5 Sonnet (AI Brain)
 Phase 3: Gmail SMTP (Email Sender)
-"""
 
-import json
-import re
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+The phases live in pipeline.py; this file is the Streamlit UI around them.
+Headless runs: python batch.py --help
+"""
 
 import os
+from contextlib import nullcontext
+from functools import partial
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-import pandas as pd
-
 import streamlit as st
-import anthropic
-from duckduckgo_search import DDGS
-import trafilatura
 
-# ══════════════════════════════════════════════════════
-# CONFIGURATION & CONSTANTS
-# ══════════════════════════════════════════════════════
-
-CLAUDE_MODEL = "claude-4-6-opus-20260205"
-
-ANALYSIS_PROMPT = """You are an elite B2B sales strategist for ANTONI LAB.
-Your goal is to identify high-value targets based on specific criteria.
-
-TARGET CRITERIA:
-- Location: {location}
-- Target Audience: {target_group}
-- Budget Level: {ticket_size}
-
-ADDITIONAL CONTEXT / ASSETS:
-The following context/links must be naturally integrated into the outreach (e.g., "I wanted to share..."):
-{context_links}
-
-Analyze the website text below.
-1. Does this company match the Target Criteria?
-2. Identify specific operational inefficiencies or outdated digital presence.
-
-If they are a MATCH, write a high-converting Cold Email to the decision-maker.
-The email must:
-- Be 3-4 sentences max.
-- Reference a specific observation from their site (show you did your homework).
-- Propose a concrete value-add related to their specific situation.
-- Tone: Professional, direct, "Founder-to-Founder". No marketing fluff.
-
-Return JSON:
-{{
-  "is_fit": true/false,
-  "company_name": "Name",
-  "weakness": "Specific weakness identified",
-  "email_subject": "Subject",
-  "email_body": "Body",
-  "fit_score": 1-10
-}}
-
---- WEBSITE TEXT ---
-{website_text}
-"""
+from cascade import CascadeStats
+from telemetry import MetricsStore, RunMetrics, timed
+from run_store import RunStore
+from lookalike import LookalikeIndex, index_agent_leads, index_scans, load_or_build
+from pipeline import (
+    CLAUDE_MODEL,
+    TRIAGE_MODEL,
+    analyze_leads,
+    find_contacts,
+    rank_lookalikes,
+    scan_leads,
+    send_email,
+)
+from sales_common.profiling import RunProfile, profiled, render_profile
+from sales_common.resilience import breaker_states
+
+SEARCH_REGIONS = ["pl-pl", "wt-wt", "us-en", "de-de"]
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
 
 # ══════════════════════════════════════════════════════
-# PHASE 1: THE SCANNER (Low-Cost)
+# PIPELINE ↔ STREAMLIT ADAPTERS
 # ══════════════════════════════════════════════════════
 
-def scan_leads(query: str, max_leads: int, progress_bar, status_text, region="wt-wt") -> list[dict]:
-    """
-    Use duckduckgo-search to find URLs, then trafilatura to extract text.
-    Returns a list of dicts: [{url, text}, ...]
-    """
-    leads = []
-    urls_found = []
-
-    status_text.markdown(f"🔍 **PHASE 1** — Scanning Network ({region})...")
-
-    try:
-        ddgs = DDGS()
-        # Use a region setting if specific to Poland later, but generally 'wt-wt' is fine or 'pl-pl'
-        # Defaulting to no region or safe search for broad results
-        results = ddgs.text(query, region=region, max_results=max_leads * 2)
-        
-        for r in results:
-            urls_found.append(r['href'])
-            if len(urls_found) >= max_leads * 2:
-                break
-                
-    except Exception as e:
-        status_text.error(f"⚠️ Search error: {e}")
-        return leads
-
-    if not urls_found:
-        status_text.warning("⚠️ No URLs found. Try a simpler query (e.g. 'Software House Warsaw').")
-        return leads
-
-    status_text.markdown(
-        f"📡 Found **{len(urls_found)}** URLs — extracting text..."
-    )
-
-    processed = 0
-    for i, url in enumerate(urls_found):
-        if len(leads) >= max_leads:
-            break
-
-        progress_bar.progress(
-            (i + 1) / len(urls_found),
-            text=f"Scanning {i + 1}/{len(urls_found)}: {url[:60]}..."
-        )
-
-        try:
-            downloaded = trafilatura.fetch_url(url)
-            if not downloaded:
-                continue
+def _status_writer(placeholder):
+    """Route pipeline ``status(message, level)`` callbacks into a placeholder."""
+    writers = {
+        "info": placeholder.markdown,
+        "success": placeholder.success,
+        "warning": placeholder.warning,
+        "error": placeholder.error,
+    }
 
-            text = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
-            if not text or len(text.strip()) < 100:
-                continue
+    def write(message: str, level: str = "info") -> None:
+        writers.get(level, placeholder.markdown)(message)
 
-            # Truncate to ~3000 chars to save tokens
-            truncated_text = text[:3000]
+    return write
 
-            leads.append({
-                "url": url,
-                "text": truncated_text,
-            })
-            processed += 1
-
-        except Exception:
-            continue
 
-    progress_bar.progress(1.0, text="✅ Scan complete!")
-    status_text.markdown(
-        f"✅ **Scan complete** — Extracted text from **{len(leads)}** / {len(urls_found)} URLs"
+def _render_draft(placeholder, draft: dict) -> None:
+    """Show a streaming email draft in a Streamlit placeholder."""
+    placeholder.markdown(
+        f"**{draft.get('company_name', '…')}** · fit {draft.get('fit_score', '…')}  \n"
+        f"*{draft.get('email_subject', '')}*\n\n"
+        f"{draft.get('email_body', '')}▌"
     )
-    return leads
 
 
-# ══════════════════════════════════════════════════════
-# PHASE 2: THE BRAIN (Claude 3.5 Sonnet)
-# ══════════════════════════════════════════════════════
+@st.cache_resource
+def _stores() -> tuple[MetricsStore, RunStore]:
+    """Open (and migrate) the SQLite stores once per process, not on every rerun."""
+    return MetricsStore(), RunStore()
 
-def generate_email(api_key: str, website_text: str) -> dict | None:
-    """
-    Send extracted website text to Claude and get back a structured
-    cold email analysis.
-    """
-    client = anthropic.Anthropic(api_key=api_key)
-
-    try:
-        message = client.messages.create(
-            model=CLAUDE_MODEL,
-            max_tokens=1024,
-            messages=[
-                {
-                    "role": "user",
-                    "content": ANALYSIS_PROMPT.format(
-                        website_text=website_text,
-                        location=st.session_state.get("target_location", "Global"),
-                        target_group=st.session_state.get("target_group", "General Business"),
-                        ticket_size=st.session_state.get("target_ticket", "Any"),
-                        context_links=st.session_state.get("context_links", "")
-                    ),
-                }
-            ],
-        )
 
-        raw = message.content[0].text.strip()
-
-        # Robust JSON extraction
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            # Try to find JSON object in the response
-            match = re.search(r'\{[\s\S]*\}', raw)
-            if match:
-                return json.loads(match.group())
-            return None
-
-    except Exception as e:
-        st.error(f"Claude API error: {e}")
-        return None
-
-
-def analyze_leads(api_key: str, raw_leads: list[dict], progress_bar, status_text) -> list[dict]:
-    """
-    Run Phase 2 on each raw lead: send text to Claude, get email drafts back.
-    """
-    analyzed = []
-    status_text.markdown("🧠 **PHASE 2** — Claude is analyzing targets and drafting emails...")
-
-    for i, lead in enumerate(raw_leads):
-        progress_bar.progress(
-            (i + 1) / len(raw_leads),
-            text=f"Analyzing lead {i + 1}/{len(raw_leads)}..."
-        )
+@st.cache_resource
+def _lookalike_index() -> LookalikeIndex:
+    """Loaded from lookalike.idx and caught up with runs.db + leads.db, then updated as pages arrive."""
+    return load_or_build(_stores()[1])
 
-        result = generate_email(api_key, lead["text"])
-
-        if result and result.get("is_fit"):
-            analyzed.append({
-                "company": result.get("company_name", "Unknown"),
-                "url": lead["url"],
-                "weakness": result.get("weakness", "—"),
-                "fit_score": result.get("fit_score", 0),
-                "email_subject": result.get("email_subject", ""),
-                "email_body": result.get("email_body", ""),
-            })
-
-    progress_bar.progress(1.0, text="✅ Analysis complete!")
-    status_text.markdown(
-        f"🧠 **Analysis complete** — **{len(analyzed)}** qualified leads out of {len(raw_leads)}"
-    )
-    return analyzed
 
+def _render_lookalikes(run_store: RunStore) -> None:
+    """Search the lookalike index by a stored URL or free text."""
+    with st.expander("Find Lookalikes (similar companies already scanned or saved)"):
+        probe = st.text_input(
+            "Company URL or description",
+            placeholder="https://… of a lead we won, or a few words about the ideal client",
+        )
+        l1, l2 = st.columns([3, 1])
+        with l1:
+            k = st.slider("Matches", 5, 50, 10)
+        with l2:
+            refresh = st.button("🔄 Refresh", use_container_width=True, help="Pick up companies saved by the agent")
+        if not probe and not refresh:
+            st.caption(f"{len(run_store.converted())} leads marked as converted.")
+            return
+        index = _lookalike_index()
+        if refresh:
+            added = index_agent_leads(index)
+            if added:
+                index.save()
+            st.caption(f"Added {added} companies from leads.db.")
+        if probe:
+            matches = index.similar_to(probe, k) if probe in index else index.query(probe, k)
+            st.dataframe(
+                [m.as_dict() for m in matches],
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "url": st.column_config.LinkColumn("Link"),
+                    "score": st.column_config.ProgressColumn("Similarity", min_value=0, max_value=1),
+                },
+            )
+            st.caption(f"{len(index):,} documents indexed.")
 
-# ══════════════════════════════════════════════════════
-# PHASE 3: THE SENDER (SMTP)
-# ══════════════════════════════════════════════════════
 
-def send_email(
-    sender_email: str,
-    app_password: str,
-    to_email: str,
-    subject: str,
-    body: str,
-) -> bool:
-    """
-    Send a single email via Gmail SMTP with TLS.
-    """
-    msg = MIMEMultipart("alternative")
-    msg["From"] = sender_email
-    msg["To"] = to_email
-    msg["Subject"] = subject
-
-    # Build a styled HTML version
-    html_body = f"""
-    <html>
-    <body style="font-family: 'Segoe UI', Arial, sans-serif; color: #222; line-height: 1.6;">
-        <p>{body.replace(chr(10), '<br>')}</p>
-        <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
-        <p style="font-size: 11px; color: #999;">
-            Sent via ANTONI SALES OS // AUTO-PILOT
-        </p>
-    </body>
-    </html>
-    """
-
-    msg.attach(MIMEText(body, "plain"))
-    msg.attach(MIMEText(html_body, "html"))
-
-    try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            server.ehlo()
-            server.login(sender_email, app_password)
-            server.sendmail(sender_email, to_email, msg.as_string())
-        return True
-    except Exception as e:
-        st.error(f"SMTP Error: {e}")
-        return False
+def _render_backend_health() -> None:
+    """Circuit-breaker state and retry counts of the external backends."""
+    states = breaker_states()
+    for state in states:
+        if state["state"] != "closed":
+            st.warning(
+                f"⛔ **{state['endpoint']}** circuit {state['state']} "
+                f"(next probe in {state['retry_in_s']:.0f}s) — {state['last_error']}"
+            )
+    if any(state["calls"] for state in states):
+        with st.expander("Backend Health (circuit breakers · retries)"):
+            st.dataframe(states, use_container_width=True, hide_index=True)
 
 
 # ══════════════════════════════════════════════════════
@@ -431,9 +287,11 @@ def main():
     )
 
     inject_custom_css()
+    metrics_store, run_store = _stores()
 
     # ── Header ──
     st.markdown("<h1 style='text-align: center; margin-bottom: 2rem;'>Antoni Sales OS</h1>", unsafe_allow_html=True)
+    _render_backend_health()
 
     # ── Mission Control (Expander) ──
     with st.expander("Mission Control (Settings & Credentials)", expanded=False):
@@ -496,12 +354,71 @@ def main():
     # Advanced Options (Hidden by default to keep clean)
     with st.expander("Advanced Scan Settings"):
         max_leads = st.slider("Max Leads", 1, 20, 5)
-        search_region = st.selectbox("Search Region", ["pl-pl", "wt-wt", "us-en", "de-de"], index=0)
-        
-        # Cost Estimation (Approximate for Claude 3 Opus)
-        # Price: ~$15 / 1M input, ~$75 / 1M output
-        est_cost = ((4000 * 15) + (500 * 75)) / 1_000_000 * max_leads
-        st.caption(f"💰 Est. Cost: ${est_cost:.4f} USD")
+        search_region = st.selectbox("Search Region", SEARCH_REGIONS, index=0)
+        fan_out = st.toggle(
+            "Fan-out search",
+            value=False,
+            help="Search query variants (synonyms, city, Location / Target fields) across regions in parallel "
+                 "and merge the ranked results.",
+        )
+        extra_regions = []
+        if fan_out:
+            extra_regions = st.multiselect(
+                "Also search regions", [r for r in SEARCH_REGIONS if r != search_region]
+            )
+        crawl_contacts = st.toggle(
+            "Find contact addresses",
+            value=True,
+            help="After the scan, visit a few likely pages per site (Kontakt, About, footer links) "
+                 "and collect emails and phones.",
+        )
+        stream_analysis = st.toggle(
+            "Stream analysis",
+            value=True,
+            help="Parse Claude's answer as it arrives: non-fit leads are cut off early, fits show a live draft.",
+        )
+        use_cascade = st.toggle(
+            "Model cascade",
+            value=False,
+            help="A fast triage model screens every lead; only strong fits go to the drafting model.",
+        )
+        if use_cascade:
+            cc1, cc2 = st.columns(2)
+            with cc1:
+                triage_model = st.text_input("Triage Model", value=TRIAGE_MODEL)
+            with cc2:
+                cascade_threshold = st.slider("Escalate at Fit ≥", 1, 10, 6)
+        converted = run_store.converted()
+        use_lookalikes = st.toggle(
+            "Rank by lookalikes",
+            value=bool(converted),
+            disabled=not converted,
+            help=f"Before Phase 2, order leads by similarity to the {len(converted)} leads marked converted "
+                 "(no Claude calls).",
+        )
+        lookalike_top = 0
+        if use_lookalikes:
+            lookalike_top = st.slider("Analyze only the top N lookalikes (0 = all)", 0, 20, 0)
+        profile_run = st.toggle(
+            "Profile this run",
+            value=False,
+            help="Sample stacks during the scan; a flamegraph is saved per run. Off: no overhead.",
+        )
+        trace_allocations = profile_run and st.checkbox(
+            "Trace allocations instead",
+            help="A separate pass: the top allocation sites per phase, no flamegraph. "
+                 "tracemalloc slows the run 2-3x, so its times aren't comparable.",
+        )
+
+        # Cost Estimation — from the actual usage of recent runs
+        cost_per_lead = metrics_store.cost_per_lead()
+        if cost_per_lead is None:
+            st.caption("💰 Est. Cost: no run history yet — actual cost is tracked after the first scan.")
+        else:
+            st.caption(
+                f"💰 Est. Cost: ${cost_per_lead * max_leads:.4f} USD "
+                f"(${cost_per_lead:.4f}/lead, actual usage of recent runs)"
+            )
 
     st.markdown("---")
 
@@ -512,41 +429,135 @@ def main():
         scan_clicked = st.button("🚀 EXECUTE SCAN", use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # ── Saved Runs (resume) ──
+    resume_run_id = None
+    saved_runs = run_store.recent_runs()
+    if saved_runs:
+        with st.expander("Saved Runs"):
+            st.dataframe(saved_runs, use_container_width=True, hide_index=True)
+            labels = {
+                r["run_id"]: f"{r['created_at'][:16]} · {r['query']} · {r['status']} ({r['analyzed']}/{r['fetched']} analyzed)"
+                for r in saved_runs
+            }
+            selected = st.selectbox("Run", list(labels), format_func=labels.get)
+            if st.button("▶️ Resume Run", use_container_width=True):
+                resume_run_id = selected
 
     # ── Session State Init ──
     if "leads_df" not in st.session_state:
-        st.session_state.leads_df = pd.DataFrame()
+        st.session_state.leads_df = None
     if "scan_complete" not in st.session_state:
         st.session_state.scan_complete = False
 
     # ── Execution Logic ──
-    if scan_clicked:
-        if not api_key:
-            st.error("Missing API Key. Check Mission Control.")
+    if (scan_clicked or resume_run_id) and not api_key:
+        st.error("Missing API Key. Check Mission Control.")
+    elif scan_clicked or resume_run_id:
+        if resume_run_id:
+            run = run_store.open_run(resume_run_id)
+            # Restore the original targeting so prompts match the first attempt.
+            for key in ("target_location", "target_group", "target_ticket", "context_links"):
+                st.session_state[key] = run.params.get(key, "")
         else:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
+            st.session_state.context_links = context_links
+            run = run_store.create_run({
+                "query": target_query,
+                "region": search_region,
+                "max_leads": max_leads,
+                "fan_out": fan_out,
+                "extra_regions": extra_regions,
+                "crawl_contacts": crawl_contacts,
+                "target_location": st.session_state.target_location,
+                "target_group": st.session_state.target_group,
+                "target_ticket": st.session_state.target_ticket,
+                "context_links": context_links,
+            })
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        run_metrics = RunMetrics(run.params["query"], run.params["region"], run_id=run.run_id)
+        st.session_state.run_metrics = run_metrics
+
+        targeting = {
+            "location": st.session_state.target_location,
+            "target_group": st.session_state.target_group,
+            "ticket_size": st.session_state.target_ticket,
+            "context_links": st.session_state.context_links,
+        }
+
+        profiler = (
+            RunProfile(run.run_id, PROFILES_DIR, trace_allocations=trace_allocations)
+            if profile_run else nullcontext()
+        )
+        with profiler as profile:
             # Phase 1
-            raw_leads = scan_leads(target_query, max_leads, progress_bar, status_text, region=search_region)
-            
+            status = _status_writer(status_text)
+            with profiled(profile, "scan_leads"):
+                raw_leads = scan_leads(
+                    run.params["query"],
+                    run.params["max_leads"],
+                    progress_bar.progress,
+                    status,
+                    region=run.params["region"],
+                    metrics=run_metrics,
+                    run=run,
+                    fan_out=run.params.get("fan_out", False),
+                    targeting=targeting,
+                    extra_regions=run.params.get("extra_regions", []),
+                    index=_lookalike_index() if use_lookalikes else None,
+                )
+
+            if raw_leads and run.params.get("crawl_contacts", True):
+                with profiled(profile, "find_contacts"):
+                    find_contacts(raw_leads, progress_bar.progress, status, metrics=run_metrics, run=run)
+
+            if raw_leads and use_lookalikes:
+                index = _lookalike_index()
+                # Conversions marked since the index was built may be pages it has not seen.
+                index_scans(index, run_store, [doc_id for doc_id in converted if doc_id not in index])
+                raw_leads = rank_lookalikes(raw_leads, index, converted, status, top=lookalike_top)
+
+            analyzed_leads = []
             if raw_leads:
                 # Phase 2
+                run.set_status("analyzing")
                 progress_bar_2 = st.progress(0, text="Analyzing...")
-                # Pass context_links to session state for prompt access if needed, 
-                # OR pass it directly. app.py's generate_email reads from session_state in previous impl.
-                # Let's save it to session_state to be safe since generate_email might expect it
-                st.session_state.context_links = context_links
-                
-                analyzed_leads = analyze_leads(api_key, raw_leads, progress_bar_2, status_text)
-                
-                if analyzed_leads:
-                    st.session_state.leads_df = pd.DataFrame(analyzed_leads)
-                    st.session_state.scan_complete = True
-                    st.rerun()
+
+                cascade = None
+                if use_cascade:
+                    cascade = CascadeStats.for_models(triage_model, CLAUDE_MODEL, cascade_threshold)
+                st.session_state.cascade_stats = cascade
+
+                draft_preview = st.empty()
+                with profiled(profile, "analyze_leads"):
+                    analyzed_leads = analyze_leads(
+                        api_key,
+                        raw_leads,
+                        progress_bar_2.progress,
+                        status,
+                        targeting=targeting,
+                        stream=stream_analysis,
+                        on_partial=partial(_render_draft, draft_preview) if stream_analysis else None,
+                        cascade=cascade,
+                        metrics=run_metrics,
+                        run=run,
+                    )
+                draft_preview.empty()
+
+        run.finish([lead["url"] for lead in raw_leads or []])
+        run_metrics.finish()
+        metrics_store.save(run_metrics)
+        st.session_state.run_profile = profile.summary if profile is not None else None
+
+        if analyzed_leads:
+            import pandas as pd  # only needed once there are results
+
+            st.session_state.leads_df = pd.DataFrame(analyzed_leads)
+            st.session_state.scan_complete = True
+            st.rerun()
 
     # ── Results View ──
-    if st.session_state.scan_complete and not st.session_state.leads_df.empty:
+    if st.session_state.scan_complete and st.session_state.leads_df is not None:
         df = st.session_state.leads_df
         
         st.markdown("### Results")
@@ -563,10 +574,32 @@ def main():
             use_container_width=True,
             column_config={
                 "url": st.column_config.LinkColumn("Link"),
+                "contact_email": st.column_config.TextColumn("Contact"),
                 "fit_score": st.column_config.ProgressColumn("Fit", min_value=0, max_value=10, format="%d"),
+                "lookalike": st.column_config.ProgressColumn("Lookalike", min_value=0, max_value=1),
             }
         )
 
+        won = st.multiselect("Converted leads", list(df["url"]), default=[u for u in df["url"] if u in converted])
+        if st.button("✅ Save Conversions", help="Seeds for 'Rank by lookalikes' on the next scans"):
+            run_store.mark_converted(won)
+            run_store.mark_converted([u for u in df["url"] if u not in won], converted=False)
+            st.success(f"{len(won)} leads marked as converted.")
+
+        cascade = st.session_state.get("cascade_stats")
+        if cascade is not None:
+            with st.expander("Model Cascade Stats"):
+                k1, k2, k3 = st.columns(3)
+                k1.metric("Escalated", f"{cascade.escalation_rate:.0%}")
+                k2.metric("Tier Agreement", f"{cascade.agreement_rate:.0%}")
+                k3.metric("Actual Cost", f"${cascade.total_cost:.4f}")
+                st.dataframe(
+                    [cascade.triage.summary(), cascade.draft.summary()],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+                st.caption(f"Mean fit-score shift (draft − triage): {cascade.mean_score_delta:+.1f}")
+
         # Actions
         c1, c2 = st.columns(2)
         with c1:
@@ -575,20 +608,63 @@ def main():
         
         with c2:
             if sender_email and app_password:
+                live_send = st.toggle(
+                    "Send to discovered contacts",
+                    value=False,
+                    disabled="contact_email" not in df.columns,
+                    help="Off: every draft goes to the Test Recipient with a [TEST] prefix. "
+                         "On: drafts go to each lead's contact address; leads without one are skipped.",
+                )
                 st.markdown('<div class="send-btn">', unsafe_allow_html=True)
                 if st.button("📧 Auto-Send Emails", use_container_width=True):
                     # Sending Logic
                     sent = 0
                     prog = st.progress(0)
+                    run_metrics = st.session_state.get("run_metrics")
                     for i, row in df.iterrows():
-                        if row.get("email_subject") and row.get("email_body"):
-                            if send_email(sender_email, app_password, test_recipient, f"[TEST] {row['email_subject']}", row['email_body']):
+                        recipient = row.get("contact_email") if live_send else test_recipient
+                        if recipient and row.get("email_subject") and row.get("email_body"):
+                            with timed(run_metrics, "send"):
+                                ok = send_email(
+                                    sender_email,
+                                    app_password,
+                                    recipient,
+                                    row["email_subject"] if live_send else f"[TEST] {row['email_subject']}",
+                                    row['email_body'],
+                                    status=_status_writer(st),
+                                )
+                            if ok:
                                 sent += 1
                                 st.session_state.emails_sent = st.session_state.get("emails_sent", 0) + 1
                         prog.progress((i+1)/len(df))
+                    if run_metrics is not None:
+                        run_metrics.emails_sent += sent
+                        metrics_store.save(run_metrics)
                     st.success(f"Sent {sent} emails.")
                 st.markdown("</div>", unsafe_allow_html=True)
 
+    if st.session_state.get("run_profile"):
+        render_profile(st.session_state.run_profile)
+
+    _render_lookalikes(run_store)
+
+    # ── Run History (telemetry) ──
+    runs = metrics_store.recent_runs()
+    if runs:
+        with st.expander("Run History (latency · tokens · cost)"):
+            h1, h2, h3 = st.columns(3)
+            h1.metric("Runs", len(runs))
+            h2.metric("Tokens", f"{sum(r['input_tokens'] + r['output_tokens'] for r in runs):,}")
+            h3.metric("Actual Cost", f"${sum(r['cost_usd'] for r in runs):.4f}")
+            st.markdown("##### Phase latency")
+            st.dataframe(metrics_store.phase_stats(), use_container_width=True, hide_index=True)
+            st.markdown("##### Runs")
+            st.dataframe(runs, use_container_width=True, hide_index=True)
+            host_rates = metrics_store.host_rates()
+            if host_rates:
+                st.markdown("##### Host health (block / timeout rates)")
+                st.dataframe(host_rates, use_container_width=True, hide_index=True)
+
     # ── Footer ──
     st.markdown(
         '<div class="os-footer mono-font">'
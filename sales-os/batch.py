@@ -0,0 +1,320 @@
+"""
+ANTONI SALES OS // BATCH RUNNER
+═══════════════════════════════════════════════════════
+Headless entry point for scheduled / overnight jobs. Reads a file of jobs
+(one query + region + targeting row per line), runs the pipeline for each
+job in a pool of worker processes and writes the qualified leads as JSONL
+or Parquet.
+
+Input (.csv with a header row, or .jsonl), columns/keys:
+    query, region, max_leads, location, target, budget, context_links
+Only ``query`` is required. With --fan-out, ``region`` may list several
+regions separated by "|" (e.g. ``pl-pl|wt-wt``).
+
+Usage:
+    python batch.py jobs.csv -o leads.jsonl --workers 4
+    python batch.py jobs.jsonl -o leads.parquet --cascade 6 --persist
+    python batch.py jobs.csv --lookalikes --lookalike-top 10
+"""
+
+import argparse
+import csv
+import importlib.util
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from cascade import CascadeStats
+from fetcher import FETCH_DEADLINE, MAX_BYTES
+from lookalike import LookalikeIndex, load_or_build
+from pipeline import (
+    CLAUDE_MODEL,
+    DEFAULT_TARGETING,
+    TRIAGE_MODEL,
+    analyze_leads,
+    find_contacts,
+    rank_lookalikes,
+    scan_leads,
+    send_email,
+)
+from telemetry import MetricsStore, RunMetrics, timed
+from run_store import RunStore
+
+log = logging.getLogger("sales-os.batch")
+
+_LOG_LEVELS = {
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+# ══════════════════════════════════════════════════════
+# JOB FILES
+# ══════════════════════════════════════════════════════
+
+def load_jobs(path: str, default_region: str = "pl-pl", default_max_leads: int = 5) -> list[dict]:
+    """Read jobs from a .csv or .jsonl file and normalise their fields."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs = []
+    for i, row in enumerate(rows):
+        query = (row.get("query") or "").strip()
+        if not query:
+            log.warning("Skipping row %d: no query", i + 1)
+            continue
+        jobs.append({
+            "job": len(jobs),
+            "query": query,
+            "regions": (row.get("region") or default_region).split("|"),
+            "max_leads": int(row.get("max_leads") or default_max_leads),
+            "targeting": {
+                "location": row.get("location") or DEFAULT_TARGETING["location"],
+                "target_group": row.get("target") or DEFAULT_TARGETING["target_group"],
+                "ticket_size": row.get("budget") or DEFAULT_TARGETING["ticket_size"],
+                "context_links": row.get("context_links") or DEFAULT_TARGETING["context_links"],
+            },
+        })
+    return jobs
+
+
+def write_results(rows: list[dict], path: str) -> None:
+    """Write result rows as Parquet (needs pandas + pyarrow) or JSONL."""
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+# ══════════════════════════════════════════════════════
+# WORKER
+# ══════════════════════════════════════════════════════
+
+@lru_cache(maxsize=1)
+def _lookalikes() -> tuple[LookalikeIndex, list[str]]:
+    """The lookalike index and converted-lead seeds, built once per worker process."""
+    store = RunStore()
+    return load_or_build(store), store.converted()
+
+
+def run_job(job: dict, options: dict) -> tuple[dict, list[dict]]:
+    """
+    Run Phase 1 → 2 (→ 3 with ``send``) for one job inside a worker process.
+    Returns the job summary and its qualified leads.
+    """
+    prefix = f"[job {job['job']}] "
+
+    def status(message: str, level: str = "info") -> None:
+        log.log(_LOG_LEVELS.get(level, logging.INFO), prefix + message.replace("**", ""))
+
+    region, *extra_regions = job["regions"]
+    run = None
+    if options["persist"]:
+        run = RunStore().create_run({
+            "query": job["query"],
+            "region": region,
+            "max_leads": job["max_leads"],
+            "fan_out": options["fan_out"],
+            "extra_regions": extra_regions,
+            "crawl_contacts": options["contacts"],
+            "target_location": job["targeting"]["location"],
+            "target_group": job["targeting"]["target_group"],
+            "target_ticket": job["targeting"]["ticket_size"],
+            "context_links": job["targeting"]["context_links"],
+        })
+    metrics = RunMetrics(job["query"], region, run_id=run.run_id if run is not None else None)
+
+    raw_leads = scan_leads(
+        job["query"],
+        job["max_leads"],
+        status=status,
+        region=region,
+        metrics=metrics,
+        run=run,
+        fan_out=options["fan_out"],
+        targeting=job["targeting"],
+        extra_regions=extra_regions,
+        fetch_limits=options["fetch_limits"],
+    )
+
+    if raw_leads and options["contacts"]:
+        find_contacts(raw_leads, status=status, metrics=metrics, run=run)
+
+    if raw_leads and options["lookalikes"]:
+        index, seeds = _lookalikes()
+        raw_leads = rank_lookalikes(raw_leads, index, seeds, status, top=options["lookalike_top"])
+
+    leads = []
+    if raw_leads:
+        if run is not None:
+            run.set_status("analyzing")
+        cascade = None
+        if options["cascade_threshold"]:
+            cascade = CascadeStats.for_models(options["triage_model"], CLAUDE_MODEL, options["cascade_threshold"])
+        leads = analyze_leads(
+            options["api_key"],
+            raw_leads,
+            status=status,
+            targeting=job["targeting"],
+            stream=options["stream"],
+            cascade=cascade,
+            metrics=metrics,
+            run=run,
+        )
+
+    if options["send"]:
+        for lead in leads:
+            if not (lead.get("email_subject") and lead.get("email_body")):
+                continue
+            with timed(metrics, "send"):
+                ok = send_email(
+                    options["sender_email"],
+                    options["app_password"],
+                    options["send_to"],
+                    f"[TEST] {lead['email_subject']}",
+                    lead["email_body"],
+                    status=status,
+                )
+            metrics.emails_sent += int(ok)
+
+    if run is not None:
+        run.finish([lead["url"] for lead in raw_leads or []])
+    metrics.finish()
+    if options["persist"]:
+        MetricsStore().save(metrics)
+
+    summary = {
+        "job": job["job"],
+        "query": job["query"],
+        "region": "|".join(job["regions"]),
+        "scanned": len(raw_leads),
+        "qualified": len(leads),
+        "with_contact": sum(1 for lead in leads if lead.get("contact_email")),
+        "blocked": sum(h["blocked"] for h in metrics.host_stats),
+        "timeouts": sum(h["timeouts"] for h in metrics.host_stats),
+        "skipped": sum(h["skipped"] for h in metrics.host_stats),
+        "truncated": sum(h["truncated"] for h in metrics.host_stats),
+        "input_tokens": metrics.input_tokens,
+        "output_tokens": metrics.output_tokens,
+        "cost_usd": round(metrics.cost, 4),
+        "wall_s": round(metrics.wall_seconds, 1),
+    }
+    rows = [{"job": job["job"], "query": job["query"], "region": summary["region"], **lead} for lead in leads]
+    return summary, rows
+
+
+def _init_worker(level: int) -> None:
+    logging.basicConfig(level=level, format="%(asctime)s %(processName)s %(message)s", stream=sys.stderr)
+
+
+# ══════════════════════════════════════════════════════
+# ENTRY POINT
+# ══════════════════════════════════════════════════════
+
+def main(argv: list[str] | None = None) -> int:
+    from dotenv import load_dotenv  # CLI only; importing batch (tests, workers) doesn't need it
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run Sales OS scans headlessly over a file of jobs.")
+    parser.add_argument("jobs", help="Jobs file (.csv with header or .jsonl)")
+    parser.add_argument("-o", "--output", default="leads.jsonl", help="Output file (.jsonl or .parquet)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 2, help="Worker processes")
+    parser.add_argument("--region", default="pl-pl", help="Default search region for rows without one")
+    parser.add_argument("--max-leads", type=int, default=5, help="Default max leads for rows without one")
+    parser.add_argument("--fan-out", action="store_true",
+                        help="Expand each query into variants and search all of its regions in parallel")
+    parser.add_argument("--stream", action="store_true", help="Stream analysis and abort non-fit leads early")
+    parser.add_argument("--cascade", type=int, default=0, metavar="THRESHOLD",
+                        help="Enable the triage cascade; escalate at fit_score >= THRESHOLD")
+    parser.add_argument("--triage-model", default=TRIAGE_MODEL)
+    parser.add_argument("--no-contacts", dest="contacts", action="store_false",
+                        help="Skip the contact-page crawl between Phase 1 and Phase 2")
+    parser.add_argument("--max-page-kb", type=int, default=MAX_BYTES // 1024,
+                        help="Stop downloading a page after this many KB")
+    parser.add_argument("--fetch-deadline", type=float, default=FETCH_DEADLINE,
+                        help="Give up on a page after this many seconds in total")
+    parser.add_argument("--lookalikes", action="store_true",
+                        help="Rank leads by similarity to the ones marked converted before Phase 2")
+    parser.add_argument("--lookalike-top", type=int, default=0, metavar="N",
+                        help="With --lookalikes, analyze only the N closest leads per job")
+    parser.add_argument("--persist", action="store_true",
+                        help="Record runs in runs.db / metrics.db like the dashboard does")
+    parser.add_argument("--send", action="store_true", help="Send drafts via Gmail SMTP to --send-to")
+    parser.add_argument("--send-to", default=os.getenv("TEST_RECIPIENT", ""))
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    level = logging.DEBUG if args.verbose else logging.INFO
+    _init_worker(level)
+
+    # Checked up front: pandas only needs pyarrow once every job has run.
+    if args.output.endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+        log.error("Parquet output needs pyarrow (pip install pyarrow); or write .jsonl instead.")
+        return 2
+
+    api_key = os.getenv("ANTHROPIC_API_KEY", "")
+    if not api_key:
+        log.error("ANTHROPIC_API_KEY is not set (.env or environment).")
+        return 2
+    options = {
+        "api_key": api_key,
+        "fan_out": args.fan_out,
+        "stream": args.stream,
+        "cascade_threshold": args.cascade,
+        "triage_model": args.triage_model,
+        "contacts": args.contacts,
+        "fetch_limits": {"max_bytes": args.max_page_kb * 1024, "deadline": args.fetch_deadline},
+        "lookalikes": args.lookalikes or args.lookalike_top > 0,
+        "lookalike_top": args.lookalike_top,
+        "persist": args.persist,
+        "send": args.send,
+        "send_to": args.send_to,
+        "sender_email": os.getenv("GMAIL_SENDER_EMAIL", ""),
+        "app_password": os.getenv("GMAIL_APP_PASSWORD", ""),
+    }
+    if args.send and not (options["sender_email"] and options["app_password"] and args.send_to):
+        log.error("--send needs GMAIL_SENDER_EMAIL, GMAIL_APP_PASSWORD and a recipient (--send-to).")
+        return 2
+
+    jobs = load_jobs(args.jobs, args.region, args.max_leads)
+    if not jobs:
+        log.error("No jobs in %s", args.jobs)
+        return 1
+    log.info("Running %d jobs on %d workers", len(jobs), args.workers)
+
+    rows: list[dict] = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(level,)) as pool:
+        futures = {pool.submit(run_job, job, options): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                summary, job_rows = future.result()
+            except Exception as e:
+                failed += 1
+                log.error("[job %d] failed: %s", job["job"], e)
+                continue
+            rows.extend(job_rows)
+            log.info("[job %d] done: %s", job["job"], json.dumps(summary))
+
+    rows.sort(key=lambda row: row["job"])
+    write_results(rows, args.output)
+    log.info("Wrote %d leads to %s (%d/%d jobs failed)", len(rows), args.output, failed, len(jobs))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
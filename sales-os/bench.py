@@ -0,0 +1,217 @@
+"""
+ANTONI SALES OS // BENCHMARK
+═══════════════════════════════════════════════════════
+Offline end-to-end benchmark: scan_leads → analyze_leads → send_email
+against the local stand-ins in standins.py — no network, API key or mail.
+Only the services are faked; trafilatura and the Anthropic SDK run for real.
+
+Usage:
+    python bench.py                          # 10, 100 and 1000 leads
+    python bench.py 10 100 --time-scale 0.1  # all simulated delays 10x shorter
+    python bench.py 100 --stream --contacts --json > bench.json
+
+Each size runs in a fresh interpreter, so peak memory (max RSS) and the
+process-wide caches (robots.txt, circuit breakers, SDK client) start
+clean. Reported per size: leads per minute end to end, wall time per
+phase, p50 / p90 / p99 / max latency of each step (search, fetch,
+extract, analyze, send…) and peak RSS.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from cascade import percentile
+from standins import FakeAnthropic, FakeSearch, FixtureSites, SmtpSink
+from telemetry import RunMetrics, timed
+
+DEFAULT_SIZES = [10, 100, 1000]
+QUERY = "Logistics Warsaw"
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def _wall(phases: dict, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = round(time.perf_counter() - started, 2)
+
+
+def latency_table(metrics: RunMetrics) -> dict[str, dict]:
+    """``{step: {n, p50_ms, p90_ms, p99_ms, max_ms}}`` from the run's timings."""
+    by_step: dict[str, list[float]] = {}
+    for step, seconds in metrics.timings:
+        by_step.setdefault(step, []).append(seconds * 1000)
+    return {
+        step: {
+            "n": len(values),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p90_ms": round(percentile(values, 90), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+            "max_ms": round(max(values), 1),
+        }
+        for step, values in by_step.items()
+    }
+
+
+def run_size(
+    leads: int,
+    time_scale: float = 1.0,
+    stream: bool = False,
+    contacts: bool = False,
+    page_kb: int = 80,
+    site_latency: float = 0.3,
+    ttft: float = 0.6,
+    tokens_per_s: float = 80.0,
+) -> dict:
+    """One end-to-end run for ``leads`` leads in this process; returns the report."""
+    from pipeline import analyze_leads, find_contacts, scan_leads, send_email
+
+    errors: list[str] = []
+
+    def status(message: str, level: str = "info") -> None:
+        if level == "error":
+            errors.append(message)
+
+    sites = FixtureSites(latency=site_latency, page_kb=page_kb, time_scale=time_scale)
+    llm = FakeAnthropic(ttft=ttft, tokens_per_s=tokens_per_s, time_scale=time_scale)
+    smtp = SmtpSink(time_scale=time_scale)
+    search = FakeSearch(time_scale=time_scale)
+    with sites, llm, smtp:
+        # urllib sends every http:// fetch through the fixture proxy; the SDK talks to the fake API.
+        os.environ["http_proxy"] = sites.proxy_url
+        os.environ["no_proxy"] = "127.0.0.1,localhost"
+        os.environ["ANTHROPIC_BASE_URL"] = llm.url
+
+        metrics = RunMetrics(QUERY, "wt-wt")
+        phases: dict[str, float] = {}
+        started = time.perf_counter()
+        with _wall(phases, "scan"):
+            raw_leads = scan_leads(QUERY, leads, status=status, metrics=metrics, search_fn=search)
+        if contacts:
+            with _wall(phases, "contacts"):
+                find_contacts(raw_leads, status=status, metrics=metrics)
+        for lead in raw_leads:
+            lead.pop("html", None)
+        with _wall(phases, "analyze"):
+            analyzed = analyze_leads("sk-ant-bench", raw_leads, status=status, stream=stream, metrics=metrics)
+        sent = 0
+        with _wall(phases, "send"):
+            for lead in analyzed:
+                with timed(metrics, "send"):
+                    sent += send_email(
+                        "bench@antoni.lab", "bench", lead.get("contact_email") or "sink@bench.test",
+                        lead["email_subject"], lead["email_body"], status=status,
+                        smtp_host="127.0.0.1", smtp_port=smtp.port, starttls=False,
+                    )
+        wall = time.perf_counter() - started
+
+    return {
+        "leads": leads,
+        "scanned": len(raw_leads),
+        "qualified": len(analyzed),
+        "sent": sent,
+        "wall_s": round(wall, 2),
+        "leads_per_min": round(len(raw_leads) / wall * 60, 1) if wall else 0.0,
+        "phases_s": phases,
+        "latency": latency_table(metrics),
+        "peak_rss_mb": _peak_rss_mb(),
+        "llm": {
+            "requests": llm.requests,
+            "aborted_streams": llm.aborted,
+            "input_tokens": metrics.input_tokens,
+            "output_tokens": metrics.output_tokens,
+            "cost_usd": round(metrics.cost, 4),
+        },
+        "site_requests": sites.requests,
+        "smtp_messages": smtp.messages,
+        "errors": errors[:5],
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(
+        f"── {report['leads']} leads: {report['scanned']} scanned, {report['qualified']} qualified, "
+        f"{report['sent']} sent in {report['wall_s']:.1f} s → {report['leads_per_min']:.1f} leads/min, "
+        f"peak RSS {report['peak_rss_mb']} MB"
+    )
+    print("   phases: " + ", ".join(f"{name} {seconds:.1f} s" for name, seconds in report["phases_s"].items()))
+    print(f"   {'step':10s} {'n':>6s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for step, row in report["latency"].items():
+        print(
+            f"   {step:10s} {row['n']:6d} {row['p50_ms']:9.1f} {row['p90_ms']:9.1f} "
+            f"{row['p99_ms']:9.1f} {row['max_ms']:9.1f}"
+        )
+    for error in report["errors"]:
+        print(f"   ! {error}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the Sales OS pipeline.")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES, help="Lead counts to run")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Multiply every simulated delay (site, Claude, SMTP, search) by this")
+    parser.add_argument("--stream", action="store_true", help="Stream analysis (aborts non-fit leads early)")
+    parser.add_argument("--contacts", action="store_true", help="Include the contact-page crawl")
+    parser.add_argument("--page-kb", type=int, default=80, help="Size of each fixture page")
+    parser.add_argument("--site-latency", type=float, default=0.3, help="Median time to first byte (s)")
+    parser.add_argument("--ttft", type=float, default=0.6, help="Claude time to first token (s)")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0, help="Claude output tokens per second")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)  # JSON run_size kwargs, set by the parent
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_size(**json.loads(args.child))))
+        return 0
+
+    missing = [name for name in ("trafilatura", "anthropic") if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"bench.py runs the real pipeline: pip install -r requirements.txt (missing {', '.join(missing)})",
+              file=sys.stderr)
+        return 2
+
+    options = {
+        "time_scale": args.time_scale,
+        "stream": args.stream,
+        "contacts": args.contacts,
+        "page_kb": args.page_kb,
+        "site_latency": args.site_latency,
+        "ttft": args.ttft,
+        "tokens_per_s": args.tokens_per_s,
+    }
+    reports = []
+    for size in args.sizes:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", json.dumps({"leads": size, **options})],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{size} leads: failed\n{out.stderr[-2000:]}", file=sys.stderr)
+            return 1
+        report = json.loads(out.stdout.strip().splitlines()[-1])
+        reports.append(report)
+        if not args.json:
+            _print_report(report)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+ANTONI SALES OS // LOOKALIKE BENCHMARK
+═══════════════════════════════════════════════════════
+Builds a synthetic corpus and prints build, save/load and query timings:
+
+    python bench_lookalike.py            # 100k documents
+    python bench_lookalike.py 20000
+"""
+
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lookalike import LookalikeIndex
+
+
+def synthetic_index(n_docs: int, seed: int = 7) -> tuple[LookalikeIndex, list[str]]:
+    """``n_docs`` page-like texts over a Zipf-distributed vocabulary, plus query texts."""
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice("abcdefghijklmnoprstuwyzłóęą") for _ in range(rng.randint(4, 10)))
+                  for _ in range(50_000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def text(words: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words))
+
+    index = LookalikeIndex()
+    for i in range(n_docs):
+        index.add(f"https://site{i}.pl", text(300), source="scan")
+    return index, [text(300) for _ in range(100)]
+
+
+def main(n_docs: int) -> None:
+    started = time.perf_counter()
+    index, queries = synthetic_index(n_docs)
+    print(f"build: {n_docs} docs in {time.perf_counter() - started:.1f} s")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lookalike.idx")
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        LookalikeIndex.load(path)
+        print(f"save {saved:.2f} s, load {time.perf_counter() - started:.2f} s, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB")
+    for batch in (1, 10, 100):
+        started = time.perf_counter()
+        index.query_many(queries[:batch], k=10)
+        elapsed = time.perf_counter() - started
+        print(f"query_many({batch:3d}): {elapsed * 1000:8.1f} ms  ({elapsed / batch * 1000:.1f} ms/query)")
+    started = time.perf_counter()
+    index.lookalike_scores(queries, [f"https://site{i}.pl" for i in range(50)])
+    print(f"lookalike_scores(100 leads, 50 seeds): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,129 @@
+"""
+ANTONI SALES OS // MODEL CASCADE
+═══════════════════════════════════════════════════════
+Bookkeeping for the two-tier analysis pipeline:
+Tier 1 (triage) — small fast model decides is_fit / fit_score
+Tier 2 (draft)  — expensive model writes weakness + cold email
+"""
+
+import time
+from dataclasses import dataclass, field
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICING = {
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-3-5-sonnet-20240620": (3.00, 15.00),
+    "claude-4-6-opus-20260205": (15.00, 75.00),
+}
+DEFAULT_PRICING = (15.00, 75.00)
+
+
+def usage_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Dollar cost of one call, from the token counts the API reported."""
+    price_in, price_out = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@dataclass
+class TierStats:
+    """Latency / token / cost counters for one model tier."""
+
+    name: str
+    model: str
+    latencies: list[float] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    errors: int = 0
+
+    def record(self, started: float, usage=None) -> None:
+        """
+        Record one call that began at ``started`` (``time.perf_counter()``);
+        ``usage`` is an Anthropic ``Usage``, or None when the call failed.
+        """
+        self.latencies.append(time.perf_counter() - started)
+        if usage is None:
+            self.errors += 1
+            return
+        self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+
+    @property
+    def calls(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def cost(self) -> float:
+        return usage_cost(self.model, self.input_tokens, self.output_tokens)
+
+    def summary(self) -> dict:
+        return {
+            "tier": self.name,
+            "model": self.model,
+            "calls": self.calls,
+            "p50_s": round(percentile(self.latencies, 50), 2),
+            "p95_s": round(percentile(self.latencies, 95), 2),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 4),
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class CascadeStats:
+    """Both tiers plus how often the draft model agreed with triage."""
+
+    triage: TierStats
+    draft: TierStats
+    threshold: int
+    escalated: int = 0
+    agreed: int = 0
+    score_deltas: list[int] = field(default_factory=list)
+
+    @classmethod
+    def for_models(cls, triage_model: str, draft_model: str, threshold: int) -> "CascadeStats":
+        return cls(TierStats("triage", triage_model), TierStats("draft", draft_model), threshold)
+
+    def should_escalate(self, triage: dict | None) -> bool:
+        """Only fits at or above the threshold are worth the expensive model."""
+        if not triage or not triage.get("is_fit"):
+            return False
+        try:
+            return int(triage.get("fit_score", 0)) >= self.threshold
+        except (TypeError, ValueError):
+            return False
+
+    def record_agreement(self, triage: dict, draft: dict | None) -> None:
+        self.escalated += 1
+        if not draft:
+            return
+        if bool(draft.get("is_fit")) == bool(triage.get("is_fit")):
+            self.agreed += 1
+        try:
+            self.score_deltas.append(int(draft.get("fit_score", 0)) - int(triage.get("fit_score", 0)))
+        except (TypeError, ValueError):
+            pass
+
+    @property
+    def agreement_rate(self) -> float:
+        return self.agreed / self.escalated if self.escalated else 0.0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.triage.calls if self.triage.calls else 0.0
+
+    @property
+    def mean_score_delta(self) -> float:
+        return sum(self.score_deltas) / len(self.score_deltas) if self.score_deltas else 0.0
+
+    @property
+    def total_cost(self) -> float:
+        return self.triage.cost + self.draft.cost
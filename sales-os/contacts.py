@@ -0,0 +1,332 @@
+"""
+ANTONI SALES OS // CONTACT CRAWL
+═══════════════════════════════════════════════════════
+Between Phase 1 and Phase 2: find real recipient addresses for each lead.
+- links on the lead's page are ranked by how likely they lead to contact
+  details (/kontakt, /contact, /about, impressum, footer links first)
+- each domain gets a small page and time budget; pages go through the
+  polite FetchScheduler, so domains are crawled concurrently while each
+  host still sees one request at a time
+- emails (mailto:, text, "[at]" obfuscation) and phones (tel:, text) are
+  extracted, validated and ranked — the site's own domain and role
+  addresses (kontakt@, biuro@, info@…) first
+"""
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import unquote, urljoin, urlsplit
+
+from fetcher import FetchScheduler
+from search import url_domain
+
+MAX_PAGES_PER_DOMAIN = 4  # including the lead's own page when it must be refetched
+DOMAIN_BUDGET_S = 20.0
+
+# Substring of a link's path or text → how likely it leads to contact details.
+LINK_HINTS = {
+    "kontakt": 5, "contact": 5, "impressum": 4, "imprint": 4,
+    "o-nas": 3, "o_nas": 3, "onas": 3, "o nas": 3, "about": 3,
+    "firma": 2, "company": 2, "zespol": 1, "zespół": 1, "team": 1,
+}
+FOOTER_BONUS = 1
+
+ROLE_MAILBOXES = ("kontakt", "contact", "biuro", "office", "info", "hello", "sales", "sprzedaz", "handlowy")
+
+_SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".doc", ".docx", ".xls", ".xlsx")
+_ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+# Addresses that show up on pages but never reach the company.
+_PLACEHOLDER_DOMAINS = {"example.com", "example.org", "domain.com", "email.com", "sentry.io", "wixpress.com"}
+_NO_REPLY = re.compile(r"^(no-?reply|donotreply|mailer-daemon|postmaster)\b", re.I)
+
+_EMAIL = re.compile(r"[A-Za-z0-9][A-Za-z0-9._%+-]*@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,24}")
+_OBFUSCATED_AT = re.compile(r"\s*[\[(]\s*(?:at|małpa)\s*[\])]\s*", re.I)
+_OBFUSCATED_DOT = re.compile(r"\s*[\[(]\s*(?:dot|kropka)\s*[\])]\s*", re.I)
+_PHONE = re.compile(r"(?<![\w/.-])(?:\+|00)?\d[\d\s().-]{7,18}\d(?![\w/-])")
+# Dates ("Updated 2024-03-15 14:30", "15.03.2024") and clock times look like
+# formatted numbers, but are not phones.
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}|\d{2}[./-]\d{2}[./-]\d{4}")
+_TIME = re.compile(r"\d:\d\d")
+# Numbers next to these labels are registry ids, not phones.
+_NOT_PHONE_LABELS = re.compile(r"(nip|regon|krs|vat|iban|konto|account|pesel)\W{0,5}$", re.I)
+
+
+@dataclass
+class ContactInfo:
+    """What the crawl found for one lead."""
+
+    emails: list[str] = field(default_factory=list)
+    phones: list[str] = field(default_factory=list)
+    pages: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def best_email(self) -> str:
+        return self.emails[0] if self.emails else ""
+
+    def as_dict(self) -> dict:
+        return {"emails": self.emails, "phones": self.phones, "pages": self.pages, "seconds": round(self.seconds, 3)}
+
+
+# ══════════════════════════════════════════════════════
+# PAGE PARSING
+# ══════════════════════════════════════════════════════
+
+class _PageParser(HTMLParser):
+    """Collects links (with their text and footer flag), mailto/tel targets and visible text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: list[tuple[str, str, bool]] = []
+        self.mailto: list[str] = []
+        self.tel: list[str] = []
+        self.text: list[str] = []
+        self._footer_depth = 0
+        self._div_flags: list[bool] = []
+        self._skip_depth = 0
+        self._href: str | None = None
+        self._link_text: list[str] = []
+        self._link_in_footer = False
+
+    @property
+    def in_footer(self) -> bool:
+        return self._footer_depth > 0 or any(self._div_flags)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("script", "style", "noscript"):
+            self._skip_depth += 1
+        elif tag == "footer":
+            self._footer_depth += 1
+        elif tag == "div":
+            marker = f"{attrs.get('id') or ''} {attrs.get('class') or ''}".lower()
+            self._div_flags.append("footer" in marker or "stopka" in marker)
+        elif tag == "a":
+            href = (attrs.get("href") or "").strip()
+            lowered = href.lower()
+            if lowered.startswith("mailto:"):
+                self.mailto.append(unquote(href[7:].split("?")[0]))
+            elif lowered.startswith("tel:"):
+                self.tel.append(unquote(href[4:]))
+            elif href:
+                self._href, self._link_text, self._link_in_footer = href, [], self.in_footer
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript"):
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == "footer":
+            self._footer_depth = max(self._footer_depth - 1, 0)
+        elif tag == "div" and self._div_flags:
+            self._div_flags.pop()
+        elif tag == "a" and self._href is not None:
+            self.links.append((self._href, " ".join("".join(self._link_text).split()), self._link_in_footer))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.text.append(data)
+        if self._href is not None:
+            self._link_text.append(data)
+
+
+def _parse(html: str) -> _PageParser:
+    parser = _PageParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass  # keep whatever was collected before the markup broke
+    return parser
+
+
+def _link_score(url: str, text: str, in_footer: bool) -> int:
+    haystack = f"{unquote(urlsplit(url).path).lower()} {text.lower()}"
+    score = max((weight for hint, weight in LINK_HINTS.items() if hint in haystack), default=0)
+    return score + FOOTER_BONUS if score and in_footer else score
+
+
+def candidate_links(html: str, base_url: str, limit: int = 10) -> list[str]:
+    """Same-site links likely to hold contact details, best first."""
+    return _rank_links(_parse(html), base_url)[:limit]
+
+
+def _rank_links(page: _PageParser, base_url: str) -> list[str]:
+    site = url_domain(base_url)
+    base = base_url.split("#")[0]
+    scores: dict[str, int] = {}
+    for href, text, in_footer in page.links:
+        url = urljoin(base_url, href).split("#")[0]
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or url_domain(url) != site or url == base:
+            continue
+        if parts.path.lower().endswith(_SKIP_EXTENSIONS):
+            continue
+        score = _link_score(url, text, in_footer)
+        if score:
+            scores[url] = max(scores.get(url, 0), score)
+    return sorted(scores, key=lambda u: (-scores[u], len(u), u))
+
+
+# ══════════════════════════════════════════════════════
+# EXTRACTION & VALIDATION
+# ══════════════════════════════════════════════════════
+
+def valid_email(address: str) -> bool:
+    if not _EMAIL.fullmatch(address) or len(address) > 254:
+        return False
+    local, domain = address.rsplit("@", 1)
+    domain = domain.lower()
+    if domain.endswith(_ASSET_SUFFIXES) or ".." in address:
+        return False  # "logo@2x.png" and friends
+    if domain in _PLACEHOLDER_DOMAINS or any(domain.endswith("." + d) for d in _PLACEHOLDER_DOMAINS):
+        return False
+    return not _NO_REPLY.match(local)
+
+
+def normalize_phone(raw: str) -> str | None:
+    """``+48 22 123 45 67`` / ``(22) 123-45-67`` → digits with a leading "+"; None if implausible."""
+    raw = raw.strip()
+    if _DATE.search(raw) or _TIME.search(raw):
+        return None
+    digits = re.sub(r"\D", "", raw)
+    if raw.startswith("00"):
+        digits, raw = digits[2:], "+" + raw[2:]
+    if not 9 <= len(digits) <= 15 or len(set(digits)) < 3:
+        return None
+    return ("+" if raw.startswith("+") else "") + digits
+
+
+def extract_contacts(html: str) -> tuple[list[str], list[str]]:
+    """``(emails, phones)`` found on one page, deduplicated, in page order."""
+    return _contacts(_parse(html))
+
+
+def _contacts(page: _PageParser) -> tuple[list[str], list[str]]:
+    text = " ".join(page.text)
+    deobfuscated = _OBFUSCATED_DOT.sub(".", _OBFUSCATED_AT.sub("@", text))
+
+    emails: list[str] = []
+    for address in [*page.mailto, *_EMAIL.findall(deobfuscated)]:
+        address = address.strip().strip(".").lower()
+        if valid_email(address) and address not in emails:
+            emails.append(address)
+
+    phones: list[str] = []
+    candidates = [(raw, True) for raw in page.tel]
+    for match in _PHONE.finditer(text):
+        if _TIME.match(text, match.end() - 1):  # "2024-03-15 14" of "… 14:30"
+            continue
+        if not _NOT_PHONE_LABELS.search(text[max(match.start() - 12, 0):match.start()]):
+            candidates.append((match.group(), False))
+    for raw, from_tel in candidates:
+        number = normalize_phone(raw)
+        # Free-text numbers need some phone-like formatting to count.
+        if number and (from_tel or number.startswith("+") or re.search(r"\d[\s.-]\d", raw)):
+            if number not in phones:
+                phones.append(number)
+    return emails, phones
+
+
+def rank_emails(emails: list[str], site: str) -> list[str]:
+    """The site's own domain first, then role mailboxes, then the rest (order kept)."""
+
+    def key(item):
+        i, address = item
+        local, domain = address.rsplit("@", 1)
+        own = domain == site or domain.endswith("." + site) or site.endswith("." + domain)
+        role = local.split(".")[0] in ROLE_MAILBOXES
+        return (not own, not role, i)
+
+    return [address for _, address in sorted(enumerate(emails), key=key)]
+
+
+def _merge(info: ContactInfo, emails: list[str], phones: list[str]) -> None:
+    info.emails.extend(e for e in emails if e not in info.emails)
+    info.phones.extend(p for p in phones if p not in info.phones)
+
+
+# ══════════════════════════════════════════════════════
+# CRAWL
+# ══════════════════════════════════════════════════════
+
+@dataclass
+class _Site:
+    url: str
+    domain: str
+    info: ContactInfo
+    queue: list[str]
+    fetched: int = 0
+
+    def over_budget(self, max_pages: int, budget_s: float) -> bool:
+        return self.fetched >= max_pages or self.info.seconds >= budget_s
+
+    def satisfied(self) -> bool:
+        """An own-domain address and a phone — no need to look further."""
+        domains = (e.rsplit("@", 1)[1] for e in self.info.emails)
+        return bool(self.info.phones) and any(
+            domain == self.domain or domain.endswith("." + self.domain) for domain in domains
+        )
+
+
+def crawl_contacts(
+    leads: list[dict],
+    scheduler_factory=FetchScheduler,
+    max_pages: int = MAX_PAGES_PER_DOMAIN,
+    budget_s: float = DOMAIN_BUDGET_S,
+    on_page=None,
+) -> dict[str, ContactInfo]:
+    """
+    Find contact details for each lead (``{url, html?}``) within a per-domain
+    budget of ``max_pages`` fetches and ``budget_s`` seconds spent fetching.
+
+    A lead that still carries its Phase 1 ``html`` is parsed in place;
+    otherwise its page is fetched first. Then the best-ranked contact links
+    of every domain are fetched in one concurrent round. ``on_page(url,
+    outcome)`` is called for every page fetched. Returns ``{lead_url: ContactInfo}``.
+    """
+    sites: dict[str, _Site] = {}
+    for lead in leads:
+        site = _Site(lead["url"], url_domain(lead["url"]), ContactInfo(), [])
+        sites[lead["url"]] = site
+        if lead.get("html"):
+            _absorb(site, lead["url"], lead["html"], max_pages)
+        else:
+            site.queue = [lead["url"]]
+
+    # Round 1: pages Phase 1 didn't keep. Round 2: ranked contact links.
+    for _ in range(2):
+        by_url: dict[str, _Site] = {}
+        for site in sites.values():
+            if site.satisfied() or site.over_budget(max_pages, budget_s):
+                continue
+            for url in site.queue[:max_pages - site.fetched]:
+                by_url.setdefault(url, site)
+            site.queue = []
+        if not by_url:
+            break
+
+        scheduler = scheduler_factory()
+        for outcome in scheduler.run(list(by_url)):
+            site = by_url[outcome.url]
+            site.fetched += 1
+            site.info.seconds += outcome.seconds
+            if on_page is not None:
+                on_page(outcome.url, outcome)
+            if outcome.html:
+                _absorb(site, outcome.url, outcome.html, max_pages)
+            if site.over_budget(max_pages, budget_s) or site.satisfied():
+                scheduler.drop_host(outcome.host)
+
+    for site in sites.values():
+        site.info.emails = rank_emails(site.info.emails, site.domain)
+    return {url: site.info for url, site in sites.items()}
+
+
+def _absorb(site: _Site, url: str, html: str, max_pages: int) -> None:
+    """Take contacts and (from the lead's own page) follow-up links out of one page."""
+    page = _parse(html)
+    site.info.pages.append(url)
+    _merge(site.info, *_contacts(page))
+    if url == site.url:
+        site.queue = _rank_links(page, url)[:max(max_pages - site.fetched, 0)]
@@ -0,0 +1,483 @@
+"""
+ANTONI SALES OS // POLITE FETCHER
+═══════════════════════════════════════════════════════
+Phase 1 page downloads, scheduled per host:
+- robots.txt is fetched once per host, parsed and cached (process-wide)
+- each host has its own queue and never more than one request in flight;
+  consecutive requests wait for the host's crawl-delay (or a default)
+- a pool of workers interleaves hosts, so one slow or delayed host never
+  stalls the others and global throughput stays high
+- bodies are streamed: non-HTML content types are refused from the headers,
+  downloads stop at a byte cap or a total deadline, and decoding happens
+  chunk by chunk, so one PDF or slow-drip server can't dominate a scan
+- per-host outcomes (ok / blocked / timeout / error / skipped / disallowed)
+  are counted so block and timeout rates can be exported
+"""
+
+import codecs
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+USER_AGENT = "Mozilla/5.0 (compatible; AntoniSalesOS/3.0; +https://anto-lab.framer.website/)"
+
+DEFAULT_DELAY = 1.0  # seconds between requests to one host without a crawl-delay
+MAX_CRAWL_DELAY = 10.0  # longer crawl-delays are capped; we fetch a handful of pages at most
+FETCH_TIMEOUT = 15.0  # per socket read
+FETCH_DEADLINE = 20.0  # whole request, headers to last byte
+MAX_BYTES = 1_500_000  # body cap; the first ~3000 chars of text are all Phase 2 uses
+CHUNK_SIZE = 64 * 1024
+ROBOTS_TIMEOUT = 5.0
+ROBOTS_TTL = 3600.0
+ROBOTS_MAX_BYTES = 500 * 1024  # RFC 9309 lets crawlers stop parsing here
+
+# HTTP statuses that mean "they don't want us here" rather than a broken page.
+BLOCK_STATUSES = {401, 403, 406, 429, 451, 503}
+
+# Content types worth downloading; anything else is refused from the headers.
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+
+SNIFF_BYTES = 4096  # how far into the body a <meta charset> is looked for
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+@dataclass
+class FetchResult:
+    """What one HTTP GET returned; ``status`` is 0 when no response arrived."""
+
+    status: int = 0
+    body: str | None = None
+    error: str = ""
+    timed_out: bool = False
+    skipped: bool = False  # refused by content type, body never read
+    truncated: bool = False  # body cut at the byte cap
+    content_type: str = ""
+    bytes_read: int = 0
+
+
+@dataclass
+class FetchOutcome:
+    """A scheduled URL after it was fetched (or skipped)."""
+
+    url: str
+    host: str
+    outcome: str  # ok | blocked | timeout | error | skipped | disallowed
+    html: str | None = None
+    http_status: int = 0
+    seconds: float = 0.0
+    bytes_read: int = 0
+    truncated: bool = False
+
+
+@dataclass
+class HostStats:
+    host: str
+    requests: int = 0
+    ok: int = 0
+    blocked: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    skipped: int = 0
+    truncated: int = 0
+    disallowed: int = 0
+    seconds: float = 0.0
+    bytes_read: int = 0
+    crawl_delay: float = DEFAULT_DELAY
+
+    def as_row(self) -> dict:
+        attempts = self.requests or 1
+        return {
+            "host": self.host,
+            "requests": self.requests,
+            "ok": self.ok,
+            "blocked": self.blocked,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "truncated": self.truncated,
+            "disallowed": self.disallowed,
+            "block_rate": round(self.blocked / attempts, 3),
+            "timeout_rate": round(self.timeouts / attempts, 3),
+            "seconds": round(self.seconds, 3),
+            "bytes_read": self.bytes_read,
+            "avg_s": round(self.seconds / attempts, 3),
+            "crawl_delay": self.crawl_delay,
+        }
+
+
+def http_fetch(
+    url: str,
+    timeout: float = FETCH_TIMEOUT,
+    user_agent: str = USER_AGENT,
+    max_bytes: int = MAX_BYTES,
+    deadline: float = FETCH_DEADLINE,
+    accept_types: set[str] | None = HTML_TYPES,
+) -> FetchResult:
+    """
+    Streaming GET. Each socket read waits at most ``min(timeout,
+    deadline)``; ``deadline`` is checked between reads, so a stalled body
+    overruns it by one read at most. Responses whose Content-Type isn't in ``accept_types``
+    (None accepts anything) are refused before the body is read; bodies
+    stop at ``max_bytes`` and are kept (``truncated``). Decoding is
+    incremental in the charset the server declares, else the one the page
+    declares (BOM or ``<meta charset>``), else UTF-8.
+    """
+    request = urllib.request.Request(
+        url, headers={"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.1"}
+    )
+    started = time.monotonic()
+    try:
+        with urllib.request.urlopen(request, timeout=min(timeout, deadline)) as response:
+            return _read_body(response, started, max_bytes, deadline, accept_types)
+    except urllib.error.HTTPError as e:
+        return FetchResult(status=e.code, error=str(e))
+    except (socket.timeout, TimeoutError) as e:
+        return FetchResult(error=str(e) or "timeout", timed_out=True)
+    except urllib.error.URLError as e:
+        timed_out = isinstance(e.reason, (socket.timeout, TimeoutError))
+        return FetchResult(error=str(e.reason), timed_out=timed_out)
+    except Exception as e:
+        return FetchResult(error=str(e))
+
+
+def sniff_charset(head: bytes) -> str | None:
+    """The encoding a page declares in its first bytes: a BOM or ``<meta charset>``."""
+    for bom, charset in _BOMS:
+        if head.startswith(bom):
+            return charset
+    match = _META_CHARSET.search(head[:SNIFF_BYTES])
+    return match.group(1).decode("ascii", "replace") if match else None
+
+
+def _decoder(charset: str | None):
+    try:
+        return codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _read_body(response, started: float, max_bytes: int, deadline: float, accept_types) -> FetchResult:
+    """Stream ``response`` into text within the byte cap and deadline."""
+    status = response.status
+    content_type = response.headers.get_content_type() if response.headers.get("Content-Type") else ""
+    if accept_types is not None and content_type and content_type not in accept_types:
+        return FetchResult(status=status, error=f"content type {content_type}", skipped=True, content_type=content_type)
+    length = response.headers.get("Content-Length", "")
+
+    # Without a header charset, the body is held back until SNIFF_BYTES have
+    # arrived (or it ended), and the charset is sniffed from all of them.
+    declared = response.headers.get_content_charset()
+    decoder = _decoder(declared) if declared else None
+    head = b""
+
+    parts: list[str] = []
+    read = 0
+    truncated = False
+    read_chunk = getattr(response, "read1", response.read)
+    while True:
+        if time.monotonic() - started > deadline:
+            return FetchResult(
+                status=status, error=f"deadline {deadline:g}s", timed_out=True,
+                content_type=content_type, bytes_read=read,
+            )
+        chunk = read_chunk(min(CHUNK_SIZE, max_bytes - read))
+        if not chunk:
+            break
+        read += len(chunk)
+        if decoder is None:
+            head += chunk
+            if len(head) < SNIFF_BYTES and read < max_bytes:
+                continue
+            decoder, chunk, head = _decoder(sniff_charset(head)), head, b""
+        parts.append(decoder.decode(chunk))
+        if read >= max_bytes:
+            truncated = not (length.isdigit() and int(length) <= read)
+            break
+    if decoder is None:  # a body shorter than SNIFF_BYTES
+        decoder = _decoder(sniff_charset(head))
+        parts.append(decoder.decode(head))
+    parts.append(decoder.decode(b"", final=True))
+    return FetchResult(
+        status=status, body="".join(parts), truncated=truncated, content_type=content_type, bytes_read=read
+    )
+
+
+class RobotsCache:
+    """
+    Parsed robots.txt per ``scheme://host``, kept for ``ttl`` seconds.
+
+    Following RFC 9309: a 4xx robots.txt allows everything, a 5xx disallows
+    everything (for this TTL). A host whose robots.txt can't be reached at
+    all is treated as allowing everything — small company sites often
+    don't serve one and time out instead.
+    """
+
+    def __init__(self, fetch_fn=http_fetch, ttl: float = ROBOTS_TTL, user_agent: str = USER_AGENT):
+        self.fetch_fn = fetch_fn
+        self.ttl = ttl
+        self.user_agent = user_agent
+        self._entries: dict[str, tuple[float, RobotFileParser, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, url: str) -> tuple[float, RobotFileParser, float | None]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry
+
+        parser = RobotFileParser(origin + "/robots.txt")
+        delay = None
+        result = self.fetch_fn(
+            origin + "/robots.txt", timeout=ROBOTS_TIMEOUT, user_agent=self.user_agent,
+            max_bytes=ROBOTS_MAX_BYTES, deadline=ROBOTS_TIMEOUT, accept_types=None,
+        )
+        if 200 <= result.status < 300 and result.body is not None:
+            lines = result.body.splitlines()
+            parser.parse(lines)
+            delay = _crawl_delay(lines, self.user_agent)
+        elif 500 <= result.status < 600:
+            parser.disallow_all = True
+        else:
+            parser.allow_all = True
+        parser.modified()
+
+        entry = (time.monotonic(), parser, delay)
+        with self._lock:
+            self._entries[origin] = entry
+        return entry
+
+    def allowed(self, url: str) -> bool:
+        return self._entry(url)[1].can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> float | None:
+        _, parser, delay = self._entry(url)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            if rate:
+                delay = rate.seconds / max(rate.requests, 1)
+        return delay
+
+
+def _crawl_delay(lines: list[str], user_agent: str) -> float | None:
+    """
+    Crawl-delay for ``user_agent`` (or ``*``). ``RobotFileParser`` only
+    accepts whole seconds, but "Crawl-delay: 0.5" is common in the wild.
+    """
+    token = user_agent.lower()
+    own = wildcard = None
+    agents: list[str] = []
+    in_rules = False
+    for raw in lines:
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, value = (part.strip() for part in line.split(":", 1))
+        key = key.lower()
+        if key == "user-agent":
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+            continue
+        in_rules = True
+        if key != "crawl-delay":
+            continue
+        try:
+            delay = float(value)
+        except ValueError:
+            continue
+        if any(agent != "*" and agent in token for agent in agents):
+            own = delay
+        elif "*" in agents and wildcard is None:
+            wildcard = delay
+    return own if own is not None else wildcard
+
+
+# Shared across runs / Streamlit reruns in the same process.
+ROBOTS = RobotsCache()
+
+
+@dataclass
+class _Host:
+    stats: HostStats
+    queue: deque = field(default_factory=deque)
+    next_at: float = 0.0
+    busy: bool = False
+    checked_robots: bool = False
+
+
+class FetchScheduler:
+    """
+    Fetch many URLs concurrently while staying polite to each host.
+
+    Iterate ``run(urls)`` to receive ``FetchOutcome``s as they complete;
+    call ``close()`` (or break out of the loop) to drop the rest.
+    """
+
+    def __init__(
+        self,
+        fetch_fn: Callable[..., FetchResult] = http_fetch,
+        robots: RobotsCache | None = None,
+        max_workers: int = 8,
+        default_delay: float = DEFAULT_DELAY,
+        max_crawl_delay: float = MAX_CRAWL_DELAY,
+        timeout: float = FETCH_TIMEOUT,
+        user_agent: str = USER_AGENT,
+        max_bytes: int = MAX_BYTES,
+        deadline: float = FETCH_DEADLINE,
+    ):
+        self.fetch_fn = fetch_fn
+        self.robots = robots if robots is not None else ROBOTS
+        self.max_workers = max_workers
+        self.default_delay = default_delay
+        self.max_crawl_delay = max_crawl_delay
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.hosts: dict[str, _Host] = {}
+        self._cond = threading.Condition()
+        self._results: deque[FetchOutcome] = deque()
+        self._pending = 0
+        self._closed = False
+
+    # ── Public API ──
+
+    def run(self, urls: list[str]) -> Iterator[FetchOutcome]:
+        with self._cond:
+            for url in urls:
+                host = urlsplit(url).netloc.lower()
+                state = self.hosts.setdefault(host, _Host(HostStats(host, crawl_delay=self.default_delay)))
+                state.queue.append(url)
+                self._pending += 1
+            self._closed = False
+
+        workers = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(min(self.max_workers, len(self.hosts)) or 1)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while True:
+                with self._cond:
+                    while not self._results and self._pending and not self._closed:
+                        self._cond.wait()
+                    if self._results:
+                        outcome = self._results.popleft()
+                    else:
+                        return
+                yield outcome
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop handing out work; in-flight requests finish in the background."""
+        with self._cond:
+            self._closed = True
+            for state in self.hosts.values():
+                self._pending -= len(state.queue)
+                state.queue.clear()
+            self._cond.notify_all()
+
+    def drop_host(self, host: str) -> None:
+        """Forget the URLs still queued for ``host`` (e.g. its budget ran out)."""
+        with self._cond:
+            state = self.hosts.get(host)
+            if state is not None and state.queue:
+                self._pending -= len(state.queue)
+                state.queue.clear()
+                self._cond.notify_all()
+
+    def host_stats(self) -> list[dict]:
+        with self._cond:
+            return [state.stats.as_row() for state in self.hosts.values()]
+
+    # ── Workers ──
+
+    def _next_job(self) -> tuple[_Host, str] | None:
+        """Block until some host is due; None when there's nothing left."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                ready = [s for s in self.hosts.values() if s.queue and not s.busy]
+                if not ready:
+                    if not any(s.queue for s in self.hosts.values()):
+                        return None
+                    self._cond.wait()
+                    continue
+                state = min(ready, key=lambda s: s.next_at)
+                wait = state.next_at - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                state.busy = True
+                return state, state.queue.popleft()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            state, url = job
+            outcome = self._fetch(state, url)
+            with self._cond:
+                state.busy = False
+                if outcome.outcome != "disallowed":
+                    state.next_at = time.monotonic() + state.stats.crawl_delay
+                if not self._closed:
+                    self._results.append(outcome)
+                    self._pending -= 1
+                self._cond.notify_all()
+
+    def _fetch(self, state: _Host, url: str) -> FetchOutcome:
+        stats = state.stats
+        if not state.checked_robots:
+            delay = self.robots.crawl_delay(url)
+            if delay is not None:
+                stats.crawl_delay = min(max(delay, self.default_delay), self.max_crawl_delay)
+            state.checked_robots = True
+        if not self.robots.allowed(url):
+            stats.disallowed += 1
+            return FetchOutcome(url, stats.host, "disallowed")
+
+        started = time.perf_counter()
+        result = self.fetch_fn(
+            url, timeout=self.timeout, user_agent=self.user_agent, max_bytes=self.max_bytes, deadline=self.deadline
+        )
+        seconds = time.perf_counter() - started
+        stats.requests += 1
+        stats.seconds += seconds
+        stats.bytes_read += result.bytes_read
+        stats.truncated += int(result.truncated)
+
+        if result.timed_out:
+            stats.timeouts += 1
+            kind = "timeout"
+        elif result.status in BLOCK_STATUSES:
+            stats.blocked += 1
+            kind = "blocked"
+        elif result.skipped:
+            stats.skipped += 1
+            kind = "skipped"
+        elif 200 <= result.status < 300 and result.body:  # 203 from a cache is still the page
+            stats.ok += 1
+            kind = "ok"
+        else:
+            stats.errors += 1
+            kind = "error"
+        return FetchOutcome(
+            url, stats.host, kind, result.body if kind == "ok" else None, result.status, seconds,
+            result.bytes_read, result.truncated,
+        )
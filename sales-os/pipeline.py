@@ -0,0 +1,743 @@
+"""
+ANTONI SALES OS // PIPELINE
+═══════════════════════════════════════════════════════
+The three phases without any UI, shared by the Streamlit dashboard
+(app.py) and the headless batch runner (batch.py).
+Phase 1: DuckDuckGo Search + Trafilatura (Low-Cost Scanner)
+         + contact crawl for recipient addresses (contacts.py)
+         + lookalike ranking against converted leads (lookalike.py)
+Phase 2: Claude (AI Brain)
+Phase 3: Gmail SMTP (Email Sender)
+
+Progress and status are reported through plain callbacks, and prompt
+targeting is passed in explicitly, so nothing here touches Streamlit.
+The Anthropic SDK and trafilatura are imported on first use, so importing
+this module (and rendering the dashboard) stays cheap.
+"""
+
+import os
+import sys
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sales_common.llm_json import JsonStream, extract_json
+from sales_common.resilience import CircuitOpenError, RetryPolicy, breaker, call
+from cascade import CascadeStats
+from telemetry import RunMetrics, timed
+from run_store import FAILED, FETCHED, ScanRun
+from search import ddg_search, expand_queries, fan_out_search
+from fetcher import FetchScheduler
+from contacts import ContactInfo, crawl_contacts
+from lookalike import LookalikeIndex
+
+# ══════════════════════════════════════════════════════
+# CONFIGURATION & CONSTANTS
+# ══════════════════════════════════════════════════════
+
+CLAUDE_MODEL = "claude-4-6-opus-20260205"
+TRIAGE_MODEL = "claude-3-5-haiku-20241022"
+
+# Triage only needs the gist of the site — keep its input small and cheap.
+TRIAGE_TEXT_CHARS = 1500
+
+# Rough chars per output token (Polish prose in JSON), to estimate the
+# tokens of a stream cut short before the API reported a count.
+CHARS_PER_TOKEN = 3.5
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+
+# Retries live here (the SDK's own are switched off); after 4 failed calls in a
+# row Phase 2 stops instead of paying a timeout per remaining lead.
+ANTHROPIC = breaker(
+    "anthropic", failure_threshold=4, reset_timeout=30.0,
+    policy=RetryPolicy(attempts=3, base_delay=1.0, max_delay=16.0),
+)
+
+ANALYSIS_PROMPT = """You are an elite B2B sales strategist for ANTONI LAB.
+Your goal is to identify high-value targets based on specific criteria.
+
+TARGET CRITERIA:
+- Location: {location}
+- Target Audience: {target_group}
+- Budget Level: {ticket_size}
+
+ADDITIONAL CONTEXT / ASSETS:
+The following context/links must be naturally integrated into the outreach (e.g., "I wanted to share..."):
+{context_links}
+
+Analyze the website text below.
+1. Does this company match the Target Criteria?
+2. Identify specific operational inefficiencies or outdated digital presence.
+
+If they are a MATCH, write a high-converting Cold Email to the decision-maker.
+The email must:
+- Be 3-4 sentences max.
+- Reference a specific observation from their site (show you did your homework).
+- Propose a concrete value-add related to their specific situation.
+- Tone: Professional, direct, "Founder-to-Founder". No marketing fluff.
+
+Return JSON:
+{{
+  "is_fit": true/false,
+  "company_name": "Name",
+  "weakness": "Specific weakness identified",
+  "email_subject": "Subject",
+  "email_body": "Body",
+  "fit_score": 1-10
+}}
+
+--- WEBSITE TEXT ---
+{website_text}
+"""
+
+TRIAGE_PROMPT = """You screen B2B leads for ANTONI LAB.
+
+TARGET CRITERIA:
+- Location: {location}
+- Target Audience: {target_group}
+- Budget Level: {ticket_size}
+
+Decide whether the company behind the website text below matches the criteria
+and has room for digital improvement. Do not write any email.
+
+Return ONLY JSON:
+{{
+  "is_fit": true/false,
+  "company_name": "Name",
+  "fit_score": 1-10
+}}
+
+--- WEBSITE TEXT (condensed) ---
+{website_text}
+"""
+
+# Defaults used when a targeting field is missing.
+DEFAULT_TARGETING = {
+    "location": "Global",
+    "target_group": "General Business",
+    "ticket_size": "Any",
+    "context_links": "",
+}
+
+
+def _no_progress(fraction: float, text: str = "") -> None:
+    """Default progress callback: ``progress(fraction, text=...)``."""
+
+
+def _no_status(message: str, level: str = "info") -> None:
+    """Default status callback; ``level`` is info / success / warning / error."""
+
+
+@lru_cache(maxsize=4)
+def _client(api_key: str):
+    """
+    One Anthropic client per key, reused across leads, runs and Streamlit
+    reruns (it keeps its HTTP connection pool). The SDK's own retries are
+    off; ``resilience.call`` retries instead.
+    """
+    import anthropic
+
+    return anthropic.Anthropic(api_key=api_key, max_retries=0)
+
+
+def _extract_text(html: str) -> str | None:
+    import trafilatura
+
+    return trafilatura.extract(html, include_comments=False, include_tables=False)
+
+
+def _retry_notice(what: str, status):
+    """``on_retry`` callback for ``resilience.call`` that reports backoffs."""
+
+    def notice(retry: int, delay: float, exc: BaseException) -> None:
+        (status or _no_status)(f"⏳ {what}: {type(exc).__name__} — retry {retry} in {delay:.1f}s", "warning")
+
+    return notice
+
+
+# ══════════════════════════════════════════════════════
+# PHASE 1: THE SCANNER (Low-Cost)
+# ══════════════════════════════════════════════════════
+
+def scan_leads(
+    query: str,
+    max_leads: int,
+    progress=None,
+    status=None,
+    region="wt-wt",
+    metrics=None,
+    run: ScanRun | None = None,
+    fan_out: bool = False,
+    targeting: dict | None = None,
+    extra_regions: list[str] | None = None,
+    fetch_limits: dict | None = None,
+    index: LookalikeIndex | None = None,
+    search_fn=ddg_search,
+) -> list[dict]:
+    """
+    Use duckduckgo-search to find URLs, fetch them through the polite
+    per-host scheduler (fetcher.py), then trafilatura to extract text.
+    Returns a list of dicts: [{url, text}, ...]
+    ``progress(fraction, text=...)`` and ``status(message, level)`` are
+    optional callbacks for the UI / CLI.
+    ``metrics`` (a telemetry ``RunMetrics``) times the search/fetch/extract phases.
+    ``run`` persists every URL as it is fetched; a resumed run reuses its
+    stored search results and page texts and only fetches the remainder.
+    With ``fan_out`` the query is expanded into variants (see search.py) and
+    searched across ``region`` + ``extra_regions`` in one parallel round.
+    ``fetch_limits`` overrides the scheduler's ``max_bytes`` / ``deadline``.
+    Each extracted page is added to the lookalike ``index`` as it arrives.
+    ``search_fn`` has ``ddg_search``'s signature (the benchmark swaps it out).
+    """
+    progress = progress or _no_progress
+    status = status or _no_status
+    leads = []
+    urls_found = run.urls() if run is not None else []
+    fetch_states = run.fetch_states() if run is not None else {}
+
+    if urls_found:
+        status(f"♻️ **PHASE 1** — Resuming run ({len(urls_found)} URLs on record)...")
+    else:
+        if fan_out:
+            urls_found = _fan_out_urls(
+                query, max_leads, status, [region, *(extra_regions or [])], targeting, metrics, search_fn
+            )
+        else:
+            urls_found = _search_urls(query, max_leads, status, region, metrics, search_fn)
+        if urls_found is None:
+            return leads
+        if run is not None:
+            run.record_urls(urls_found)
+
+    if not urls_found:
+        status("⚠️ No URLs found. Try a simpler query (e.g. 'Software House Warsaw').", "warning")
+        return leads
+
+    status(
+        f"📡 Found **{len(urls_found)}** URLs — extracting text..."
+    )
+
+    # Reuse what an earlier attempt of this run already fetched.
+    to_fetch = []
+    for url in urls_found:
+        state, saved_text = fetch_states.get(url, (None, None))
+        if state == FETCHED:
+            if len(leads) < max_leads:
+                leads.append({"url": url, "text": saved_text})
+        elif state != FAILED:
+            to_fetch.append(url)
+
+    # Pages arrive in completion order from a polite per-host scheduler.
+    scheduler = FetchScheduler(**(fetch_limits or {}))
+    done = len(urls_found) - len(to_fetch)
+    if to_fetch and len(leads) < max_leads:
+        for outcome in scheduler.run(to_fetch):
+            done += 1
+            progress(
+                done / len(urls_found),
+                text=f"Scanning {done}/{len(urls_found)}: {outcome.url[:60]}..."
+            )
+            if metrics is not None and outcome.outcome != "disallowed":
+                metrics.timings.append(("fetch", outcome.seconds))
+
+            truncated_text = None
+            if outcome.html:
+                try:
+                    with timed(metrics, "extract"):
+                        text = _extract_text(outcome.html)
+                    if text and len(text.strip()) >= 100:
+                        # Truncate to ~3000 chars to save tokens
+                        truncated_text = text[:3000]
+                        leads.append({
+                            "url": outcome.url,
+                            "text": truncated_text,
+                            "html": outcome.html,  # for the contact crawl; dropped there
+                        })
+                        if index is not None:
+                            index.add(outcome.url, truncated_text, source="scan", company="", url=outcome.url)
+                except Exception:
+                    pass
+
+            # Blocks and timeouts may be transient: leave them pending for a resume.
+            if run is not None and outcome.outcome not in ("blocked", "timeout"):
+                run.record_fetch(outcome.url, truncated_text)
+            if len(leads) >= max_leads:
+                break
+
+    # Keep search-rank order regardless of which page finished first.
+    rank = {url: i for i, url in enumerate(urls_found)}
+    leads.sort(key=lambda lead: rank[lead["url"]])
+    if metrics is not None:
+        metrics.host_stats = scheduler.host_stats()
+
+    if metrics is not None:
+        metrics.leads_scanned = len(leads)
+    progress(1.0, text="✅ Scan complete!")
+    status(
+        f"✅ **Scan complete** — Extracted text from **{len(leads)}** / {len(urls_found)} URLs"
+    )
+    return leads
+
+
+def find_contacts(
+    raw_leads: list[dict],
+    progress=None,
+    status=None,
+    metrics: RunMetrics | None = None,
+    run: ScanRun | None = None,
+    **crawl_options,
+) -> list[dict]:
+    """
+    Crawl each lead's contact pages (see contacts.py) and add ``emails``,
+    ``phones`` and ``contact_email`` to the lead dicts, in place. Uses the
+    Phase 1 page when the lead still carries it; a ``run`` stores results
+    so a resume doesn't crawl again.
+    """
+    progress = progress or _no_progress
+    status = status or _no_status
+    known = run.contacts() if run is not None else {}
+    todo = [lead for lead in raw_leads if lead["url"] not in known]
+
+    found = {url: ContactInfo(**info) for url, info in known.items()}
+    if todo:
+        status(f"📇 Looking for contact details on **{len(todo)}** sites...")
+        pages = 0
+
+        def on_page(url, outcome):
+            nonlocal pages
+            pages += 1
+            progress(min(pages / (len(todo) * 3), 1.0), text=f"Contact pages: {url[:60]}...")
+
+        with timed(metrics, "contacts"):
+            crawled = crawl_contacts(todo, on_page=on_page, **crawl_options)
+        for url, info in crawled.items():
+            found[url] = info
+            if run is not None:
+                run.record_contacts(url, info.as_dict())
+
+    for lead in raw_leads:
+        lead.pop("html", None)
+        info = found.get(lead["url"], ContactInfo())
+        lead["emails"], lead["phones"], lead["contact_email"] = info.emails, info.phones, info.best_email
+
+    with_email = sum(1 for lead in raw_leads if lead["contact_email"])
+    progress(1.0, text="✅ Contacts done!")
+    status(f"📇 Found a contact address for **{with_email}** / {len(raw_leads)} sites")
+    return raw_leads
+
+
+def rank_lookalikes(
+    raw_leads: list[dict],
+    index: LookalikeIndex,
+    seed_ids: list[str],
+    status=None,
+    top: int | None = None,
+) -> list[dict]:
+    """
+    Score each lead by similarity to the closest converted lead
+    (``seed_ids`` in the lookalike ``index``), store it as ``lookalike`` and
+    return the leads best-first, keeping the ``top`` ones when given — so
+    Phase 2 spends Claude calls on the likeliest fits first.
+    """
+    status = status or _no_status
+    scores = index.lookalike_scores([lead["text"] for lead in raw_leads], seed_ids)
+    for lead, score in zip(raw_leads, scores):
+        lead["lookalike"] = round(score, 3)
+    ranked = sorted(raw_leads, key=lambda lead: lead["lookalike"], reverse=True)
+    if top:
+        ranked = ranked[:top]
+    status(
+        f"🧲 Ranked **{len(raw_leads)}** leads against **{len(seed_ids)}** converted ones"
+        + (f" — analyzing the top {len(ranked)}" if len(ranked) < len(raw_leads) else "")
+    )
+    return ranked
+
+
+def _search_urls(
+    query: str, max_leads: int, status, region: str, metrics=None, search_fn=ddg_search
+) -> list[str] | None:
+    """
+    Run the DuckDuckGo search for Phase 1 and return up to ``max_leads * 2``
+    URLs, or None when the search itself failed.
+    """
+    urls_found = []
+
+    status(f"🔍 **PHASE 1** — Scanning Network ({region})...")
+
+    try:
+        with timed(metrics, "search"):
+            results = search_fn(query, region, max_leads * 2, on_retry=_retry_notice("Search", status))
+
+            for r in results:
+                urls_found.append(r['href'])
+                if len(urls_found) >= max_leads * 2:
+                    break
+
+    except CircuitOpenError as e:
+        status(f"⛔ Search backend degraded — {e}. Try again shortly.", "error")
+        return None
+    except Exception as e:
+        status(f"⚠️ Search error: {e}", "error")
+        return None
+
+    return urls_found
+
+
+def _fan_out_urls(
+    query: str,
+    max_leads: int,
+    status,
+    regions: list[str],
+    targeting: dict | None = None,
+    metrics=None,
+    search_fn=ddg_search,
+) -> list[str] | None:
+    """
+    Fan-out variant of ``_search_urls``: every query variant in every region,
+    merged and ranked, top ``max_leads * 2`` URLs (one per domain).
+    """
+    regions = list(dict.fromkeys(regions))
+    queries = expand_queries(query, targeting)
+    status(
+        f"🔍 **PHASE 1** — Fan-out search: {len(queries)} queries × {len(regions)} regions..."
+    )
+
+    with timed(metrics, "search"):
+        ranked, errors = fan_out_search(queries, regions, max_results=max_leads * 2, search_fn=search_fn)
+
+    if errors and not ranked:
+        status(f"⚠️ Search error: {errors[0]}", "error")
+        return None
+    if errors:
+        status(f"⚠️ {len(errors)}/{len(queries) * len(regions)} searches failed — using the rest.", "warning")
+
+    return [entry.url for entry in ranked[: max_leads * 2]]
+
+
+# ══════════════════════════════════════════════════════
+# PHASE 2: THE BRAIN (Claude 3.5 Sonnet)
+# ══════════════════════════════════════════════════════
+
+def _targeting(targeting: dict | None) -> dict:
+    """Targeting-row values (plus context links) for the prompts, with defaults."""
+    return {**DEFAULT_TARGETING, **(targeting or {})}
+
+
+def _final_json(text: str, status=None) -> dict | None:
+    """
+    The JSON object of a finished reply. Partial repair is for streaming
+    previews only: a reply cut off at ``max_tokens`` would otherwise become a
+    complete-looking draft with a truncated body, so it is rejected (and,
+    not being stored, retried on resume).
+    """
+    value = extract_json(text, dict, allow_partial=False)
+    if value is None and extract_json(text, dict) is not None:
+        (status or _no_status)("⚠️ Claude's reply was cut off (max_tokens) — lead skipped.", "warning")
+    return value
+
+
+def _aborted_usage(usage, text: str) -> SimpleNamespace:
+    """
+    Usage of a stream closed before ``message_delta``: the snapshot still has
+    output_tokens from ``message_start`` (~1), so estimate them from the text
+    received. Tokens generated but not yet delivered are not counted.
+    """
+    estimate = int(len(text) / CHARS_PER_TOKEN + 0.5)
+    return SimpleNamespace(
+        input_tokens=getattr(usage, "input_tokens", 0) or 0,
+        output_tokens=max(getattr(usage, "output_tokens", 0) or 0, estimate),
+    )
+
+
+def triage_lead(
+    api_key: str,
+    website_text: str,
+    targeting: dict | None = None,
+    stats=None,
+    metrics=None,
+    status=None,
+) -> dict | None:
+    """
+    Tier 1 of the cascade: a small, fast model decides is_fit / fit_score
+    from a condensed slice of the website text.
+    """
+    client = _client(api_key)
+    model = stats.model if stats else TRIAGE_MODEL
+    started = time.perf_counter()
+    usage = None
+
+    try:
+        message = call(
+            ANTHROPIC,
+            client.messages.create,
+            on_retry=_retry_notice("Claude (triage)", status),
+            model=model,
+            max_tokens=150,
+            messages=[
+                {
+                    "role": "user",
+                    "content": TRIAGE_PROMPT.format(
+                        website_text=website_text[:TRIAGE_TEXT_CHARS],
+                        **_targeting(targeting),
+                    ),
+                }
+            ],
+        )
+        usage = message.usage
+        return _final_json(message.content[0].text, status)
+
+    except Exception as e:
+        (status or _no_status)(f"Claude API error (triage): {e}", "error")
+        return None
+    finally:
+        if stats:
+            stats.record(started, usage)
+        if metrics is not None:
+            metrics.timings.append(("triage", time.perf_counter() - started))
+            metrics.record_llm(model, time.perf_counter() - started, usage)
+
+
+def generate_email(
+    api_key: str,
+    website_text: str,
+    targeting: dict | None = None,
+    stream: bool = False,
+    on_partial=None,
+    model: str = CLAUDE_MODEL,
+    stats=None,
+    metrics=None,
+    status=None,
+) -> dict | None:
+    """
+    Send extracted website text to Claude and get back a structured
+    cold email analysis.
+    ``targeting`` holds location / target_group / ticket_size / context_links.
+
+    With ``stream=True`` the response is parsed as it arrives: the request
+    is cancelled as soon as ``is_fit`` resolves to false, and ``on_partial``
+    is called with the growing draft for leads that are a fit.
+    ``stats`` (a cascade ``TierStats``) and ``metrics`` (a telemetry
+    ``RunMetrics``) record latency and the real ``message.usage``.
+    """
+    client = _client(api_key)
+    started = time.perf_counter()
+    usage = None
+    request = dict(
+        model=model,
+        max_tokens=1024,
+        messages=[
+            {
+                "role": "user",
+                "content": ANALYSIS_PROMPT.format(
+                    website_text=website_text,
+                    **_targeting(targeting),
+                ),
+            }
+        ],
+    )
+
+    def stream_once() -> dict | None:
+        nonlocal usage
+        parser = JsonStream(dict)
+        # Leaving the context manager closes the HTTP stream, so breaking
+        # out stops generation (and billing) of the remaining tokens.
+        with client.messages.stream(**request) as response:
+            finished = False
+            try:
+                for chunk in response.text_stream:
+                    draft = parser.feed(chunk)
+                    if not draft or "is_fit" not in draft:
+                        continue
+                    if draft["is_fit"] is False:
+                        return draft
+                    if on_partial:
+                        on_partial(draft)
+                finished = True
+            finally:
+                usage = response.current_message_snapshot.usage
+                if not finished:
+                    usage = _aborted_usage(usage, parser.text)
+        return _final_json(parser.text, status)
+
+    on_retry = _retry_notice("Claude", status)
+    try:
+        if stream:
+            return call(ANTHROPIC, stream_once, on_retry=on_retry)
+
+        message = call(ANTHROPIC, client.messages.create, on_retry=on_retry, **request)
+        usage = message.usage
+
+        raw = message.content[0].text.strip()
+
+        # Robust JSON extraction (fences, prose); a reply cut off at max_tokens is rejected.
+        return _final_json(raw, status)
+
+    except Exception as e:
+        (status or _no_status)(f"Claude API error: {e}", "error")
+        return None
+    finally:
+        if stats:
+            stats.record(started, usage)
+        if metrics is not None:
+            metrics.timings.append(("analyze", time.perf_counter() - started))
+            metrics.record_llm(model, time.perf_counter() - started, usage)
+
+
+def analyze_leads(
+    api_key: str,
+    raw_leads: list[dict],
+    progress=None,
+    status=None,
+    targeting: dict | None = None,
+    stream: bool = False,
+    on_partial=None,
+    cascade: CascadeStats | None = None,
+    metrics: RunMetrics | None = None,
+    run: ScanRun | None = None,
+) -> list[dict]:
+    """
+    Run Phase 2 on each raw lead: send text to Claude, get email drafts back.
+    When streaming, ``on_partial`` receives the growing draft for fits.
+    With a ``cascade``, a cheap triage model screens each lead first and only
+    fits at or above ``cascade.threshold`` reach the drafting model.
+    With a ``run``, each analysis is persisted as it completes and leads
+    analyzed by an earlier attempt are not sent to Claude again.
+    """
+    progress = progress or _no_progress
+    status = status or _no_status
+    analyzed = []
+    done = run.analyses() if run is not None else {}
+    status("🧠 **PHASE 2** — Claude is analyzing targets and drafting emails...")
+
+    for i, lead in enumerate(raw_leads):
+        progress(
+            (i + 1) / len(raw_leads),
+            text=f"Analyzing lead {i + 1}/{len(raw_leads)}..."
+        )
+        if lead["url"] not in done and ANTHROPIC.snapshot()["state"] == "open":
+            status(
+                f"⛔ Claude API unavailable after repeated errors — stopped at lead {i + 1}/{len(raw_leads)}. "
+                f"Resume the run once it recovers (next probe in {ANTHROPIC.retry_in():.0f}s).",
+                "error",
+            )
+            break
+
+        if lead["url"] in done:
+            result = done[lead["url"]]
+        elif cascade is None:
+            result = generate_email(
+                api_key,
+                lead["text"],
+                targeting,
+                stream=stream,
+                on_partial=on_partial,
+                metrics=metrics,
+                status=status,
+            )
+        else:
+            triage = triage_lead(
+                api_key, lead["text"], targeting, stats=cascade.triage, metrics=metrics, status=status
+            )
+            if not cascade.should_escalate(triage):
+                if run is not None and triage is not None:
+                    run.record_analysis(lead["url"], {**triage, "is_fit": False, "screened_out": True})
+                continue
+            result = generate_email(
+                api_key,
+                lead["text"],
+                targeting,
+                stream=stream,
+                on_partial=on_partial,
+                model=cascade.draft.model,
+                stats=cascade.draft,
+                metrics=metrics,
+                status=status,
+            )
+            cascade.record_agreement(triage, result)
+
+        # Failed calls (None) are not stored, so a resume retries them.
+        if run is not None and result is not None and lead["url"] not in done:
+            run.record_analysis(lead["url"], result)
+
+        if result and result.get("is_fit"):
+            analyzed.append({
+                "company": result.get("company_name", "Unknown"),
+                "url": lead["url"],
+                "weakness": result.get("weakness", "—"),
+                "fit_score": result.get("fit_score", 0),
+                "email_subject": result.get("email_subject", ""),
+                "email_body": result.get("email_body", ""),
+                "contact_email": lead.get("contact_email", ""),
+                "phones": ", ".join(lead.get("phones", [])),
+                "lookalike": lead.get("lookalike"),
+            })
+
+    if metrics is not None:
+        metrics.leads_analyzed = len(analyzed)
+    progress(1.0, text="✅ Analysis complete!")
+    status(
+        f"🧠 **Analysis complete** — **{len(analyzed)}** qualified leads out of {len(raw_leads)}"
+    )
+    return analyzed
+
+
+# ══════════════════════════════════════════════════════
+# PHASE 3: THE SENDER (SMTP)
+# ══════════════════════════════════════════════════════
+
+def send_email(
+    sender_email: str,
+    app_password: str,
+    to_email: str,
+    subject: str,
+    body: str,
+    status=None,
+    smtp_host: str = SMTP_HOST,
+    smtp_port: int = SMTP_PORT,
+    starttls: bool = True,
+) -> bool:
+    """
+    Send a single email via Gmail SMTP with TLS.
+    ``starttls=False`` is only for local sinks (the benchmark's).
+    """
+    import smtplib
+    import ssl
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart("alternative")
+    msg["From"] = sender_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+
+    # Build a styled HTML version
+    html_body = f"""
+    <html>
+    <body style="font-family: 'Segoe UI', Arial, sans-serif; color: #222; line-height: 1.6;">
+        <p>{body.replace(chr(10), '<br>')}</p>
+        <hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">
+        <p style="font-size: 11px; color: #999;">
+            Sent via ANTONI SALES OS // AUTO-PILOT
+        </p>
+    </body>
+    </html>
+    """
+
+    msg.attach(MIMEText(body, "plain"))
+    msg.attach(MIMEText(html_body, "html"))
+
+    try:
+        with smtplib.SMTP(smtp_host, smtp_port) as server:
+            server.ehlo()
+            if starttls:
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+            server.login(sender_email, app_password)
+            server.sendmail(sender_email, to_email, msg.as_string())
+        return True
+    except Exception as e:
+        (status or _no_status)(f"SMTP Error: {e}", "error")
+        return False
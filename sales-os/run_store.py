@@ -0,0 +1,258 @@
+"""
+ANTONI SALES OS // RUN STORE
+═══════════════════════════════════════════════════════
+Persists every scan run — its parameters, the URLs found, the fetched page
+text and Claude's analysis — as each item completes, so a crash, redeploy
+or new browser session can resume a run instead of paying for it again.
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+RUNS_DB_PATH = os.path.join(os.path.dirname(__file__), "runs.db")
+
+# raw_leads.status
+PENDING, FETCHED, FAILED = "pending", "fetched", "failed"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class RunStore:
+    """SQLite store of runs, raw leads and analyses."""
+
+    def __init__(self, path: str = RUNS_DB_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id      TEXT PRIMARY KEY,
+                created_at  TEXT,
+                updated_at  TEXT,
+                status      TEXT,
+                params      TEXT
+            );
+            CREATE TABLE IF NOT EXISTS raw_leads (
+                run_id      TEXT,
+                position    INTEGER,
+                url         TEXT,
+                status      TEXT,
+                text        TEXT,
+                fetched_at  TEXT,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE TABLE IF NOT EXISTS contacts (
+                run_id      TEXT,
+                url         TEXT,
+                result      TEXT,
+                found_at    TEXT,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE TABLE IF NOT EXISTS analyses (
+                run_id       TEXT,
+                url          TEXT,
+                result       TEXT,
+                analyzed_at  TEXT,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE TABLE IF NOT EXISTS conversions (
+                doc_id        TEXT PRIMARY KEY,
+                converted_at  TEXT
+            );
+            """
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        return conn
+
+    def create_run(self, params: dict) -> "ScanRun":
+        """Start a new run with its scan parameters (query, region, targeting…)."""
+        run_id = uuid.uuid4().hex[:12]
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                (run_id, _now(), _now(), "scanning", json.dumps(params)),
+            )
+        conn.close()
+        return ScanRun(self, run_id, params)
+
+    def open_run(self, run_id: str) -> "ScanRun | None":
+        conn = self._connect()
+        row = conn.execute("SELECT params FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return ScanRun(self, run_id, json.loads(row[0]))
+
+    def recent_runs(self, limit: int = 20) -> list[dict]:
+        """Runs with their progress counters, newest first."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            """
+            SELECT r.run_id, r.created_at, r.updated_at, r.status, r.params,
+                   (SELECT COUNT(*) FROM raw_leads l WHERE l.run_id = r.run_id) AS urls,
+                   (SELECT COUNT(*) FROM raw_leads l
+                     WHERE l.run_id = r.run_id AND l.status = 'fetched') AS fetched,
+                   (SELECT COUNT(*) FROM analyses a WHERE a.run_id = r.run_id) AS analyzed
+            FROM runs r ORDER BY r.created_at DESC LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        conn.close()
+        runs = []
+        for row in rows:
+            run = dict(row)
+            params = json.loads(run.pop("params"))
+            run["query"] = params.get("query", "")
+            run["region"] = params.get("region", "")
+            runs.append(run)
+        return runs
+
+    def page_texts(self, urls: list[str] | None = None, since: str | None = None) -> list[tuple[str, str, str]]:
+        """
+        ``(url, text, fetched_at)`` of fetched pages across runs, latest fetch
+        per URL: all, just ``urls``, or those fetched after ``since``.
+        """
+        where, args = "", ()
+        if urls is not None:
+            where, args = f"AND url IN ({', '.join('?' * len(urls))})", tuple(urls)
+        if since is not None:
+            where, args = where + " AND fetched_at > ?", (*args, since)
+        conn = self._connect()
+        rows = conn.execute(
+            f"""
+            SELECT url, text, fetched_at FROM raw_leads
+            WHERE status = 'fetched' AND text IS NOT NULL {where}
+            GROUP BY url HAVING fetched_at = MAX(fetched_at)
+            """,
+            args,
+        ).fetchall()
+        conn.close()
+        return rows
+
+    # ── Conversions (seeds for the lookalike ranking) ──
+
+    def converted(self) -> list[str]:
+        """Lookalike-index ids (page URLs, ``agent:<id>``) of leads marked converted."""
+        conn = self._connect()
+        rows = conn.execute("SELECT doc_id FROM conversions ORDER BY converted_at").fetchall()
+        conn.close()
+        return [doc_id for (doc_id,) in rows]
+
+    def mark_converted(self, doc_ids: list[str], converted: bool = True) -> None:
+        conn = self._connect()
+        with conn:
+            if converted:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO conversions VALUES (?, ?)", [(d, _now()) for d in doc_ids]
+                )
+            else:
+                conn.executemany("DELETE FROM conversions WHERE doc_id = ?", [(d,) for d in doc_ids])
+        conn.close()
+
+
+class ScanRun:
+    """Handle for one run; each ``record_*`` call is committed immediately."""
+
+    def __init__(self, store: RunStore, run_id: str, params: dict):
+        self.store = store
+        self.run_id = run_id
+        self.params = params
+
+    def _write(self, sql: str, args: tuple) -> None:
+        conn = self.store._connect()
+        with conn:
+            conn.execute(sql, args)
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (_now(), self.run_id))
+        conn.close()
+
+    def set_status(self, status: str) -> None:
+        self._write("UPDATE runs SET status = ? WHERE run_id = ?", (status, self.run_id))
+
+    # ── Phase 1 ──
+
+    def urls(self) -> list[str]:
+        """URLs found by the original search, in search order."""
+        conn = self.store._connect()
+        rows = conn.execute(
+            "SELECT url FROM raw_leads WHERE run_id = ? ORDER BY position", (self.run_id,)
+        ).fetchall()
+        conn.close()
+        return [url for (url,) in rows]
+
+    def record_urls(self, urls: list[str]) -> None:
+        conn = self.store._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO raw_leads (run_id, position, url, status) VALUES (?, ?, ?, ?)",
+                [(self.run_id, i, url, PENDING) for i, url in enumerate(urls)],
+            )
+        conn.close()
+
+    def fetch_states(self) -> dict[str, tuple[str, str | None]]:
+        """``{url: (status, text)}`` for every URL of the run."""
+        conn = self.store._connect()
+        rows = conn.execute(
+            "SELECT url, status, text FROM raw_leads WHERE run_id = ?", (self.run_id,)
+        ).fetchall()
+        conn.close()
+        return {url: (status, text) for url, status, text in rows}
+
+    def record_fetch(self, url: str, text: str | None) -> None:
+        """Store extracted text, or mark the URL failed when ``text`` is None."""
+        self._write(
+            "UPDATE raw_leads SET status = ?, text = ?, fetched_at = ? WHERE run_id = ? AND url = ?",
+            (FETCHED if text is not None else FAILED, text, _now(), self.run_id, url),
+        )
+
+    def contacts(self) -> dict[str, dict]:
+        """``{url: ContactInfo.as_dict()}`` from the contact crawl."""
+        conn = self.store._connect()
+        rows = conn.execute(
+            "SELECT url, result FROM contacts WHERE run_id = ?", (self.run_id,)
+        ).fetchall()
+        conn.close()
+        return {url: json.loads(result) for url, result in rows}
+
+    def record_contacts(self, url: str, result: dict) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)",
+            (self.run_id, url, json.dumps(result), _now()),
+        )
+
+    # ── Phase 2 ──
+
+    def analyses(self) -> dict[str, dict]:
+        conn = self.store._connect()
+        rows = conn.execute(
+            "SELECT url, result FROM analyses WHERE run_id = ?", (self.run_id,)
+        ).fetchall()
+        conn.close()
+        return {url: json.loads(result) for url, result in rows}
+
+    def record_analysis(self, url: str, result: dict) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)",
+            (self.run_id, url, json.dumps(result), _now()),
+        )
+
+    def finish(self, urls: list[str]) -> str:
+        """
+        Mark the run "complete" when every URL sent to Phase 2 has an
+        analysis, else "stopped" (e.g. the Claude circuit opened) so Saved
+        Runs shows it still needs a resume. Returns the status set.
+        """
+        done = self.analyses()
+        status = "complete" if all(url in done for url in urls) else "stopped"
+        self.set_status(status)
+        return status
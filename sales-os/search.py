@@ -0,0 +1,182 @@
+"""
+ANTONI SALES OS // FAN-OUT SEARCH
+═══════════════════════════════════════════════════════
+One query in one region rarely fills Phase 1. This stage expands the query
+into variants (synonyms, the city alone, the Location / Target fields),
+runs every (variant, region) pair concurrently and merges the results
+into one deduplicated, ranked list — one URL per company domain.
+"""
+
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sales_common.resilience import RetryPolicy, breaker, call
+
+# Lower-case term → alternatives worth searching as well (PL / EN market).
+SYNONYMS = {
+    "logistics": ["transport", "freight forwarding"],
+    "logistyka": ["transport", "spedycja"],
+    "transport": ["logistics"],
+    "software house": ["IT company", "software development"],
+    "manufacturing": ["factory", "production company"],
+    "produkcja": ["zakład produkcyjny", "fabryka"],
+    "construction": ["building contractor"],
+    "budownictwo": ["firma budowlana"],
+    "law firm": ["kancelaria prawna"],
+    "kancelaria": ["law firm"],
+    "dental clinic": ["dentist"],
+    "restaurant": ["restauracja"],
+}
+
+# Directories / social sites: they list companies but aren't leads themselves.
+AGGREGATOR_DOMAINS = {
+    "facebook.com", "linkedin.com", "instagram.com", "youtube.com", "twitter.com", "x.com",
+    "wikipedia.org", "yelp.com", "tripadvisor.com", "clutch.co", "glassdoor.com",
+    "panoramafirm.pl", "pkt.pl", "aleo.com", "gowork.pl", "oferteo.pl", "indeed.com",
+}
+AGGREGATOR_PENALTY = 0.25
+
+# Hits for the user's own query weigh more than hits for generated variants.
+ORIGINAL_QUERY_WEIGHT = 1.5
+
+# DuckDuckGo rate-limits per IP: back off a little, then stop asking for a minute.
+DDG = breaker("ddg", failure_threshold=3, reset_timeout=60.0, policy=RetryPolicy(attempts=3, base_delay=2.0, max_delay=10.0))
+
+
+@dataclass
+class RankedUrl:
+    """A deduplicated search result with its fused score."""
+
+    url: str
+    domain: str
+    score: float = 0.0
+    title: str = ""
+    hits: list[tuple[str, str, int]] = field(default_factory=list)  # (query, region, rank)
+
+
+def _strip_term(text: str, term: str) -> str:
+    """Remove ``term`` (case-insensitive, whole words) from ``text``."""
+    if not term:
+        return text
+    return " ".join(re.sub(rf"(?i)\b{re.escape(term)}\b", " ", text).split())
+
+
+def expand_queries(query: str, targeting: dict | None = None, max_variants: int = 6) -> list[str]:
+    """
+    Build search variants for ``query``: the original, synonym swaps, the
+    city alone (without the rest of the location), and the Location /
+    Target fields of the targeting row appended when not already present.
+    """
+    targeting = targeting or {}
+    variants = [query.strip()]
+    lowered = query.lower()
+
+    for term, alternatives in SYNONYMS.items():
+        if re.search(rf"\b{re.escape(term)}\b", lowered):
+            for alt in alternatives:
+                variants.append(re.sub(rf"(?i)\b{re.escape(term)}\b", alt, query).strip())
+
+    location = (targeting.get("location") or "").strip()
+    if location:
+        city = location.split(",")[0].strip()
+        core = _strip_term(_strip_term(query, location), city)
+        if city.lower() not in lowered:
+            variants.append(f"{query} {location}")
+        if city and core:
+            # The city alone — without district / region / country qualifiers.
+            variants.append(f"{core} {city}")
+
+    target_group = (targeting.get("target_group") or "").strip()
+    if target_group and target_group.lower() not in lowered:
+        variants.append(f"{query} {target_group}")
+
+    seen, unique = set(), []
+    for variant in variants:
+        key = " ".join(variant.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(variant)
+    return unique[:max_variants]
+
+
+def url_domain(url: str) -> str:
+    """Lower-case host without ``www.``, credentials or port — the dedupe key."""
+    domain = urlsplit(url.strip()).netloc.lower().split("@")[-1].split(":")[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _is_aggregator(domain: str) -> bool:
+    return any(domain == agg or domain.endswith("." + agg) for agg in AGGREGATOR_DOMAINS)
+
+
+def ddg_search(query: str, region: str, max_results: int, on_retry=None) -> list[dict]:
+    """
+    One DuckDuckGo text search behind the ``ddg`` circuit breaker; a fresh
+    client per attempt so threads don't share one.
+    """
+    from duckduckgo_search import DDGS
+
+    def once():
+        return list(DDGS().text(query, region=region, max_results=max_results))
+
+    return call(DDG, once, on_retry=on_retry)
+
+
+def fan_out_search(
+    queries: list[str],
+    regions: list[str],
+    max_results: int,
+    search_fn=ddg_search,
+    max_workers: int = 8,
+) -> tuple[list[RankedUrl], list[str]]:
+    """
+    Run every (query, region) pair concurrently and fuse the results.
+
+    Scoring is reciprocal-rank fusion: each appearance adds 1 / (rank + 1),
+    weighted up for the original query (``queries[0]``) and down for
+    directory / social domains. Results are deduplicated per domain.
+    Returns ``(ranked, errors)``; a failing pair doesn't sink the others.
+    """
+    pairs = [(q, r) for q in queries for r in regions]
+    errors: list[str] = []
+
+    def run(pair):
+        q, r = pair
+        try:
+            return pair, search_fn(q, r, max_results), None
+        except Exception as e:
+            return pair, [], f"{q} ({r}): {e}"
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pairs)) or 1) as pool:
+        outcomes = list(pool.map(run, pairs))
+
+    by_domain: dict[str, RankedUrl] = {}
+    for (q, r), results, error in outcomes:
+        if error:
+            errors.append(error)
+        weight = ORIGINAL_QUERY_WEIGHT if q == queries[0] else 1.0
+        for rank, result in enumerate(results):
+            href = result.get("href")
+            if not href:
+                continue
+            domain = url_domain(href)
+            if not domain:
+                continue
+            entry = by_domain.get(domain)
+            if entry is None:
+                # First sighting picks the URL; for a domain that is usually the best page.
+                entry = by_domain[domain] = RankedUrl(url=href, domain=domain, title=result.get("title", ""))
+            entry.score += weight / (rank + 1)
+            entry.hits.append((q, r, rank))
+
+    for entry in by_domain.values():
+        if _is_aggregator(entry.domain):
+            entry.score *= AGGREGATOR_PENALTY
+
+    ranked = sorted(by_domain.values(), key=lambda e: (-e.score, e.url))
+    return ranked, errors
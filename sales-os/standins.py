@@ -0,0 +1,411 @@
+"""
+ANTONI SALES OS // STAND-INS
+═══════════════════════════════════════════════════════
+Local replacements for every external service the pipeline talks to, so
+bench.py can run all three phases offline and repeatably:
+
+- FakeSearch: a ``ddg_search``-compatible callable that "finds" fixture sites
+- FixtureSites: an HTTP proxy that serves a generated company site for
+  every ``http://site<N>.bench.test/`` host (home page, /kontakt,
+  robots.txt) with configurable latency, page size and block rate;
+  urllib reaches it through ``http_proxy``, so each site is its own host
+  to the polite fetcher
+- FakeAnthropic: the Messages API (plain and SSE streaming) with
+  time-to-first-token, output tokens/s and a usage block; the SDK reaches
+  it through ``ANTHROPIC_BASE_URL``
+- SmtpSink: an SMTP server that accepts AUTH PLAIN and swallows messages
+
+Each is a stdlib server on 127.0.0.1 with an ephemeral port and a context
+manager. ``time_scale`` multiplies every simulated delay (0.1 = 10x faster).
+"""
+
+import base64
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+SITE_DOMAIN = "bench.test"
+
+INDUSTRIES = [
+    ("Trans", "spedycja, transport drogowy, magazyn, flota ciężarówek, logistyka kontraktowa"),
+    ("Bud", "budownictwo, generalne wykonawstwo, hale przemysłowe, nadzór inwestorski"),
+    ("Med", "klinika, stomatologia, diagnostyka, rejestracja pacjentów, pakiety medyczne"),
+    ("Soft", "software house, aplikacje webowe, integracje, utrzymanie systemów, chmura"),
+    ("Prod", "produkcja, obróbka metalu, linia technologiczna, kontrola jakości, eksport"),
+]
+SUFFIXES = ["Pol", "Max", "Tech", "Serwis", "Group", "Expert", "System", "Partner"]
+SENTENCES = [
+    "Działamy na rynku od {year} roku i obsługujemy klientów w całej Polsce.",
+    "Nasza specjalność to {focus}.",
+    "Zespół {staff} specjalistów dba o terminowość i jakość realizacji.",
+    "Oferujemy kompleksową obsługę: od wyceny, przez realizację, po serwis.",
+    "Zapraszamy do współpracy firmy, które cenią sprawdzonego partnera.",
+    "Formularz zamówień wysyłamy mailem, a status zlecenia podajemy telefonicznie.",
+    "Posiadamy certyfikaty ISO 9001 oraz wieloletnie referencje.",
+    "Aktualności publikujemy nieregularnie, ostatni wpis pochodzi sprzed dwóch lat.",
+]
+
+
+def _scaled_sleep(seconds: float, time_scale: float) -> None:
+    if seconds > 0 and time_scale > 0:
+        time.sleep(seconds * time_scale)
+
+
+class _Server:
+    """Start/stop plumbing shared by the stand-ins."""
+
+    server: socketserver.BaseServer
+
+    def __enter__(self):
+        self.server.owner = self
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+
+# ══════════════════════════════════════════════════════
+# SEARCH + WEBSITES
+# ══════════════════════════════════════════════════════
+
+def site_url(n: int, path: str = "/") -> str:
+    return f"http://site{n}.{SITE_DOMAIN}{path}"
+
+
+class FakeSearch:
+    """``ddg_search(query, region, max_results, on_retry=None)`` over fixture sites."""
+
+    def __init__(self, latency: float = 0.8, time_scale: float = 1.0):
+        self.latency = latency
+        self.time_scale = time_scale
+        self.calls = 0
+
+    def __call__(self, query: str, region: str, max_results: int, on_retry=None) -> list[dict]:
+        self.calls += 1
+        _scaled_sleep(self.latency, self.time_scale)
+        # Each (query, region) pair sees an overlapping window, as real variants do.
+        start = zlib.crc32(f"{query}|{region}".encode("utf-8")) % 4 * max(max_results // 4, 1)
+        return [
+            {"title": f"Site {n}", "href": site_url(n), "body": ""}
+            for n in range(start, start + max_results)
+        ]
+
+
+def company_name(n: int) -> str:
+    rng = random.Random(n)
+    prefix, _ = INDUSTRIES[n % len(INDUSTRIES)]
+    return f"{prefix}{rng.choice(SUFFIXES).lower()} {rng.choice(SUFFIXES)} Sp. z o.o."
+
+
+def site_page(n: int, path: str, page_kb: int) -> str:
+    """The HTML of one fixture page: real-looking text padded to ~``page_kb``."""
+    rng = random.Random(n * 7919 + len(path))
+    name = company_name(n)
+    _, focus = INDUSTRIES[n % len(INDUSTRIES)]
+    paragraphs = [
+        " ".join(
+            s.format(year=rng.randint(1991, 2015), focus=focus, staff=rng.randint(5, 120))
+            for s in rng.sample(SENTENCES, 4)
+        )
+        for _ in range(4)
+    ]
+    contact = f'<p>Biuro: <a href="mailto:biuro@site{n}.{SITE_DOMAIN}">biuro@site{n}.{SITE_DOMAIN}</a>, tel. +48 22 {n % 1000:03d} 45 67</p>'
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    if path.startswith("/kontakt"):
+        body = f"<h2>Kontakt</h2>{contact}"
+    html = (
+        f"<!doctype html><html lang=\"pl\"><head><meta charset=\"utf-8\"><title>{name}</title></head><body>"
+        f"<nav><a href=\"/\">Start</a> <a href=\"/o-nas\">O nas</a> <a href=\"/kontakt\">Kontakt</a></nav>"
+        f"<main><h1>{name}</h1>{body}</main>"
+    )
+    # Inline scripts/styles make up most of a real page's weight.
+    filler = "<script>window.dataLayer=window.dataLayer||[];/* " + "x" * 1000 + " */</script>"
+    while len(html) < page_kb * 1024:
+        html += filler
+    return html + f"<footer>{contact}<p>© {name}</p></footer></body></html>"
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        owner: FixtureSites = self.server.owner
+        parts = urlsplit(self.path if "://" in self.path else f"http://{self.headers.get('Host', '')}{self.path}")
+        match = re.fullmatch(rf"site(\d+)\.{re.escape(SITE_DOMAIN)}", (parts.hostname or "").lower())
+        if match is None:
+            self.send_error(502, "unknown fixture host")
+            return
+        n = int(match.group(1))
+        owner.count(parts.path)
+        owner.sleep()
+        if parts.path == "/robots.txt":
+            self._send(200, "text/plain", "User-agent: *\nAllow: /\n")
+        elif owner.is_blocked(n):
+            self._send(403, "text/html", "<h1>Forbidden</h1>")
+        else:
+            self._send(200, "text/html; charset=utf-8", site_page(n, parts.path, owner.page_kb))
+
+    def _send(self, status: int, content_type: str, text: str) -> None:
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):  # the fetcher hit its byte cap
+            pass
+
+
+class FixtureSites(_Server):
+    """
+    HTTP proxy serving ``site<N>.bench.test``. Point urllib at it with
+    ``http_proxy=<proxy_url>``. ``latency`` is the median time to first
+    byte (log-normal spread); ``blocked_share`` of sites answer 403.
+    """
+
+    def __init__(self, latency: float = 0.3, page_kb: int = 80, blocked_share: float = 0.05,
+                 time_scale: float = 1.0, seed: int = 1):
+        self.latency = latency
+        self.page_kb = page_kb
+        self.blocked_share = blocked_share
+        self.time_scale = time_scale
+        self.requests: dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SiteHandler)
+        self.server.daemon_threads = True
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def count(self, path: str) -> None:
+        kind = "robots" if path == "/robots.txt" else "page"
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def sleep(self) -> None:
+        with self._lock:
+            delay = self.latency * self._rng.lognormvariate(0, 0.5)
+        _scaled_sleep(delay, self.time_scale)
+
+    def is_blocked(self, n: int) -> bool:
+        return zlib.crc32(f"blocked{n}".encode()) % 1000 < self.blocked_share * 1000
+
+
+# ══════════════════════════════════════════════════════
+# CLAUDE
+# ══════════════════════════════════════════════════════
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        owner: FakeAnthropic = self.server.owner
+        if urlsplit(self.path).path.rstrip("/") != "/v1/messages":
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = "".join(
+            m["content"] if isinstance(m["content"], str) else "".join(b.get("text", "") for b in m["content"])
+            for m in request["messages"]
+        )
+        reply = owner.reply(prompt)
+        usage = {"input_tokens": max(len(prompt) // 4, 1), "output_tokens": max(len(reply) // 4, 1)}
+        message = {
+            "id": f"msg_bench{owner.next_id()}", "type": "message", "role": "assistant",
+            "model": request.get("model", ""), "stop_reason": None, "stop_sequence": None,
+        }
+        owner.record(usage)
+        owner.sleep(owner.ttft)
+        try:
+            if request.get("stream"):
+                self._stream(owner, message, reply, usage)
+            else:
+                owner.sleep(usage["output_tokens"] / owner.tokens_per_s)
+                body = json.dumps({
+                    **message, "stop_reason": "end_turn", "content": [{"type": "text", "text": reply}], "usage": usage,
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            owner.record_abort()  # the pipeline closed a non-fit stream early
+
+    def _stream(self, owner: "FakeAnthropic", message: dict, reply: str, usage: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(name: str, data: dict) -> None:
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event("message_start", {"type": "message_start", "message": {
+            **message, "content": [], "usage": {"input_tokens": usage["input_tokens"], "output_tokens": 1},
+        }})
+        event("content_block_start", {"type": "content_block_start", "index": 0,
+                                       "content_block": {"type": "text", "text": ""}})
+        chunk = 32  # ~8 tokens per delta
+        for i in range(0, len(reply), chunk):
+            owner.sleep(chunk / 4 / owner.tokens_per_s)
+            event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                           "delta": {"type": "text_delta", "text": reply[i:i + chunk]}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": usage["output_tokens"]}})
+        event("message_stop", {"type": "message_stop"})
+
+
+class FakeAnthropic(_Server):
+    """
+    Messages API stand-in; point the SDK at it with ``ANTHROPIC_BASE_URL=<url>``.
+    Roughly ``fit_share`` of sites are judged a fit (stable per site text).
+    """
+
+    def __init__(self, ttft: float = 0.6, tokens_per_s: float = 80.0, fit_share: float = 0.6,
+                 time_scale: float = 1.0):
+        self.ttft = ttft
+        self.tokens_per_s = tokens_per_s
+        self.fit_share = fit_share
+        self.time_scale = time_scale
+        self.requests = 0
+        self.aborted = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _MessagesHandler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def next_id(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def record(self, usage: dict) -> None:
+        with self._lock:
+            self.input_tokens += usage["input_tokens"]
+            self.output_tokens += usage["output_tokens"]
+
+    def record_abort(self) -> None:
+        with self._lock:
+            self.aborted += 1
+
+    def sleep(self, seconds: float) -> None:
+        _scaled_sleep(seconds, self.time_scale)
+
+    def reply(self, prompt: str) -> str:
+        site_text = prompt.split("--- WEBSITE TEXT", 1)[-1]
+        name = re.search(r"[A-ZŁŚŻ]\w+ [A-ZŁŚŻ]\w+ Sp\. z o\.o\.", site_text)
+        name = name.group(0) if name else "Unknown"
+        roll = zlib.crc32(site_text.encode("utf-8")) % 1000 / 1000
+        fit = roll < self.fit_share
+        score = 6 + int(roll * 4 / max(self.fit_share, 0.01)) if fit else 1 + int(roll * 4)
+        if "Do not write any email" in prompt:  # triage tier
+            return json.dumps({"is_fit": fit, "company_name": name, "fit_score": score}, ensure_ascii=False)
+        draft = {"is_fit": fit, "company_name": name, "weakness": "", "email_subject": "", "email_body": ""}
+        if fit:
+            draft.update(
+                weakness="Zamówienia tylko mailem i telefonicznie, brak panelu klienta; blog nieaktualny od dwóch lat.",
+                email_subject=f"Panel zamówień dla {name}",
+                email_body=(
+                    f"Dzień dobry, przeglądając stronę {name} zauważyłem, że zamówienia przyjmujecie mailem, "
+                    "a status podajecie telefonicznie. Budujemy proste panele klienta, które odciążają biuro "
+                    "i skracają obsługę zlecenia o kilka minut. Czy znajdzie Pan 15 minut w przyszłym tygodniu, "
+                    "żebym pokazał, jak to wygląda u podobnej firmy?"
+                ),
+            )
+        draft["fit_score"] = score
+        return json.dumps(draft, ensure_ascii=False, indent=2)
+
+
+# ══════════════════════════════════════════════════════
+# SMTP
+# ══════════════════════════════════════════════════════
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def _reply(self, *lines: str) -> None:
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("ascii"))
+
+    def handle(self) -> None:
+        owner: SmtpSink = self.server.owner
+        self._reply("220 bench-sink ESMTP")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-bench-sink", "250-AUTH PLAIN", "250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 bench-sink")
+            elif verb == "AUTH":
+                parts = line.split()
+                if len(parts) < 3:  # no initial response: ask for it
+                    self._reply("334 ")
+                    parts.append(self.rfile.readline().decode("ascii").strip())
+                base64.b64decode(parts[2])
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data in iter(self.rfile.readline, b""):
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    size += len(data)
+                owner.deliver(size)
+                self._reply("250 OK queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SmtpSink(_Server):
+    """Accepts any login and message; ``latency`` is spent per accepted message."""
+
+    def __init__(self, latency: float = 0.25, time_scale: float = 1.0):
+        self.latency = latency
+        self.time_scale = time_scale
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.server = _ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+
+    def deliver(self, size: int) -> None:
+        _scaled_sleep(self.latency, self.time_scale)
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
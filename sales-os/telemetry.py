@@ -0,0 +1,256 @@
+"""
+ANTONI SALES OS // TELEMETRY
+═══════════════════════════════════════════════════════
+Per-run metrics: phase wall times (search, fetch, extract, analyze, send)
+and the real token usage reported by every Claude call, persisted in a
+local SQLite store so the dashboard can show run history.
+"""
+
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from cascade import percentile, usage_cost
+
+METRICS_DB_PATH = os.path.join(os.path.dirname(__file__), "metrics.db")
+
+PHASES = ("search", "fetch", "extract", "contacts", "triage", "analyze", "send")
+
+
+class RunMetrics:
+    """Everything measured during one scan run."""
+
+    def __init__(self, query: str = "", region: str = "", run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.utcnow().isoformat()
+        self._started = time.perf_counter()
+        self._finished: float | None = None
+        self.query = query
+        self.region = region
+        self.timings: list[tuple[str, float]] = []
+        self.llm_calls: list[tuple[str, int, int, float]] = []
+        self.leads_scanned = 0
+        self.leads_analyzed = 0
+        self.emails_sent = 0
+        self.host_stats: list[dict] = []  # fetcher.HostStats rows
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of work under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - started))
+
+    def record_llm(self, model: str, seconds: float, usage=None) -> None:
+        """Record one Claude call from its ``message.usage``."""
+        self.llm_calls.append((
+            model,
+            getattr(usage, "input_tokens", 0) or 0,
+            getattr(usage, "output_tokens", 0) or 0,
+            seconds,
+        ))
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call[1] for call in self.llm_calls)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call[2] for call in self.llm_calls)
+
+    @property
+    def cost(self) -> float:
+        return sum(usage_cost(model, tin, tout) for model, tin, tout, _ in self.llm_calls)
+
+    def finish(self) -> None:
+        """Stop the wall clock (a later send phase still adds its own timing)."""
+        if self._finished is None:
+            self._finished = time.perf_counter()
+
+    @property
+    def wall_seconds(self) -> float:
+        """Elapsed time from start to ``finish()`` (or now)."""
+        return (self._finished or time.perf_counter()) - self._started
+
+    @property
+    def busy_seconds(self) -> float:
+        """Sum of the phase timings; concurrent fetches make it exceed wall time."""
+        return sum(seconds for _, seconds in self.timings)
+
+
+def timed(metrics: RunMetrics | None, name: str):
+    """``metrics.phase(name)``, or a no-op when telemetry is off."""
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+class MetricsStore:
+    """SQLite-backed history of ``RunMetrics``."""
+
+    def __init__(self, path: str = METRICS_DB_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id          TEXT PRIMARY KEY,
+                started_at      TEXT,
+                query           TEXT,
+                region          TEXT,
+                leads_scanned   INTEGER,
+                leads_analyzed  INTEGER,
+                emails_sent     INTEGER,
+                input_tokens    INTEGER,
+                output_tokens   INTEGER,
+                cost_usd        REAL,
+                wall_s          REAL
+            );
+            CREATE TABLE IF NOT EXISTS timings (
+                run_id  TEXT,
+                phase   TEXT,
+                seconds REAL
+            );
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                run_id        TEXT,
+                model         TEXT,
+                input_tokens  INTEGER,
+                output_tokens INTEGER,
+                seconds       REAL
+            );
+            CREATE TABLE IF NOT EXISTS host_stats (
+                run_id      TEXT,
+                host        TEXT,
+                requests    INTEGER,
+                ok          INTEGER,
+                blocked     INTEGER,
+                timeouts    INTEGER,
+                errors      INTEGER,
+                disallowed  INTEGER,
+                seconds     REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_timings_run ON timings (run_id);
+            CREATE INDEX IF NOT EXISTS idx_host_stats_host ON host_stats (host);
+            CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls (run_id);
+            """
+        )
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        return conn
+
+    def save(self, run: RunMetrics) -> None:
+        """Write (or rewrite) a run — safe to call again after the send phase."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run.run_id, run.started_at, run.query, run.region,
+                    run.leads_scanned, run.leads_analyzed, run.emails_sent,
+                    run.input_tokens, run.output_tokens, run.cost, run.wall_seconds,
+                ),
+            )
+            conn.execute("DELETE FROM timings WHERE run_id = ?", (run.run_id,))
+            conn.execute("DELETE FROM llm_calls WHERE run_id = ?", (run.run_id,))
+            conn.execute("DELETE FROM host_stats WHERE run_id = ?", (run.run_id,))
+            conn.executemany(
+                "INSERT INTO timings VALUES (?, ?, ?)",
+                [(run.run_id, name, seconds) for name, seconds in run.timings],
+            )
+            conn.executemany(
+                "INSERT INTO llm_calls VALUES (?, ?, ?, ?, ?)",
+                [(run.run_id, *call) for call in run.llm_calls],
+            )
+            conn.executemany(
+                "INSERT INTO host_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run.run_id, h["host"], h["requests"], h["ok"], h["blocked"],
+                        h["timeouts"], h["errors"], h["disallowed"], h["seconds"],
+                    )
+                    for h in run.host_stats
+                ],
+            )
+        conn.close()
+
+    def recent_runs(self, limit: int = 20) -> list[dict]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def phase_stats(self, limit: int = 20) -> list[dict]:
+        """p50 / p95 / total seconds per phase over the last ``limit`` runs."""
+        conn = self._connect()
+        rows = conn.execute(
+            """
+            SELECT phase, seconds FROM timings
+            WHERE run_id IN (SELECT run_id FROM runs ORDER BY started_at DESC LIMIT ?)
+            """,
+            (limit,),
+        ).fetchall()
+        conn.close()
+
+        by_phase: dict[str, list[float]] = {}
+        for phase, seconds in rows:
+            by_phase.setdefault(phase, []).append(seconds)
+        order = {name: i for i, name in enumerate(PHASES)}
+        return [
+            {
+                "phase": phase,
+                "count": len(values),
+                "p50_s": round(percentile(values, 50), 3),
+                "p95_s": round(percentile(values, 95), 3),
+                "total_s": round(sum(values), 2),
+            }
+            for phase, values in sorted(by_phase.items(), key=lambda kv: order.get(kv[0], len(order)))
+        ]
+
+    def host_rates(self, limit: int = 50) -> list[dict]:
+        """Block / timeout rates per host across all runs, worst offenders first."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            """
+            SELECT host,
+                   SUM(requests) AS requests,
+                   SUM(ok) AS ok,
+                   SUM(blocked) AS blocked,
+                   SUM(timeouts) AS timeouts,
+                   SUM(disallowed) AS disallowed,
+                   ROUND(1.0 * SUM(blocked) / MAX(SUM(requests), 1), 3) AS block_rate,
+                   ROUND(1.0 * SUM(timeouts) / MAX(SUM(requests), 1), 3) AS timeout_rate,
+                   ROUND(SUM(seconds) / MAX(SUM(requests), 1), 3) AS avg_s
+            FROM host_stats GROUP BY host
+            ORDER BY (SUM(blocked) + SUM(timeouts)) DESC, requests DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def cost_per_lead(self, limit: int = 20) -> float | None:
+        """Average actual spend per scanned lead, or None without history."""
+        conn = self._connect()
+        row = conn.execute(
+            """
+            SELECT SUM(cost_usd), SUM(leads_scanned) FROM
+            (SELECT cost_usd, leads_scanned FROM runs ORDER BY started_at DESC LIMIT ?)
+            """,
+            (limit,),
+        ).fetchone()
+        conn.close()
+        cost, leads = row
+        if not leads:
+            return None
+        return cost / leads
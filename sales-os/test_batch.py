@@ -0,0 +1,50 @@
+import importlib.util
+import json
+
+import pytest
+
+import batch
+from batch import load_jobs, write_results
+from pipeline import DEFAULT_TARGETING
+
+
+def test_load_jobs_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text(
+        "query,region,max_leads,location,target,budget\n"
+        "Logistics Warsaw,pl-pl,3,Warsaw,CEO,High\n"
+        ",,,,,\n"
+        "Software House Berlin,,,Berlin,,\n",
+        encoding="utf-8",
+    )
+    jobs = load_jobs(str(csv_path), default_region="de-de", default_max_leads=7)
+    assert [job["query"] for job in jobs] == ["Logistics Warsaw", "Software House Berlin"]
+    assert jobs[0]["max_leads"] == 3
+    assert jobs[0]["targeting"] == {
+        "location": "Warsaw", "target_group": "CEO", "ticket_size": "High", "context_links": "",
+    }
+    assert (jobs[1]["regions"], jobs[1]["max_leads"], jobs[1]["job"]) == (["de-de"], 7, 1)
+    assert jobs[1]["targeting"] == {**DEFAULT_TARGETING, "location": "Berlin"}  # blanks as in the dashboard
+
+    jsonl_path = tmp_path / "jobs.jsonl"
+    jsonl_path.write_text(
+        json.dumps({"query": "Cargo Gdańsk", "region": "pl-pl|wt-wt", "budget": "Mid"}) + "\n\n", encoding="utf-8"
+    )
+    [job] = load_jobs(str(jsonl_path))
+    assert job["targeting"]["ticket_size"] == "Mid"
+    assert job["regions"] == ["pl-pl", "wt-wt"]
+
+
+def test_write_results_jsonl(tmp_path):
+    out = tmp_path / "leads.jsonl"
+    write_results([{"job": 0, "company": "Łódź Trans"}], str(out))
+    assert json.loads(out.read_text(encoding="utf-8")) == {"job": 0, "company": "Łódź Trans"}
+
+
+def test_parquet_without_pyarrow_fails_before_any_job(tmp_path, monkeypatch):
+    pytest.importorskip("dotenv")
+    jobs = tmp_path / "jobs.csv"
+    jobs.write_text("query\nLogistics Warsaw\n", encoding="utf-8")
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-test")
+    assert batch.main([str(jobs), "-o", str(tmp_path / "leads.parquet")]) == 2
@@ -0,0 +1,28 @@
+import time
+from types import SimpleNamespace
+
+from cascade import CascadeStats, usage_cost
+
+
+def test_usage_cost_uses_model_pricing():
+    assert usage_cost("claude-3-5-haiku-20241022", 1_000_000, 0) == 0.80
+    assert usage_cost("unknown-model", 0, 1_000_000) == 75.00
+
+
+def test_cascade_escalation_and_agreement():
+    cascade = CascadeStats.for_models("claude-3-5-haiku-20241022", "claude-4-6-opus-20260205", threshold=6)
+
+    assert not cascade.should_escalate(None)
+    assert not cascade.should_escalate({"is_fit": False, "fit_score": 9})
+    assert not cascade.should_escalate({"is_fit": True, "fit_score": 5})
+    assert cascade.should_escalate({"is_fit": True, "fit_score": "7"})
+
+    for _ in range(3):
+        cascade.triage.record(time.perf_counter(), SimpleNamespace(input_tokens=400, output_tokens=30))
+    cascade.record_agreement({"is_fit": True, "fit_score": 7}, {"is_fit": True, "fit_score": 8})
+    cascade.record_agreement({"is_fit": True, "fit_score": 8}, {"is_fit": False, "fit_score": 4})
+
+    assert cascade.escalation_rate == 2 / 3
+    assert cascade.agreement_rate == 0.5
+    assert cascade.mean_score_delta == -1.5
+    assert cascade.triage.summary()["input_tokens"] == 1200
@@ -0,0 +1,121 @@
+from functools import partial
+from urllib.parse import urlsplit
+
+from contacts import (
+    ContactInfo,
+    _Site,
+    candidate_links,
+    crawl_contacts,
+    extract_contacts,
+    normalize_phone,
+    rank_emails,
+    valid_email,
+)
+from fetcher import FetchResult, FetchScheduler, RobotsCache
+
+# Two small company sites, served from memory.
+SITES = {
+    "https://acme-logistics.pl/": """
+        <html><head><script>var x = "tracker@sentry.io";</script></head><body>
+        <nav><a href="/oferta">Oferta</a> <a href="/o-nas">O nas</a> <a href="/blog/kontakt-z-klientem-2019">Blog</a></nav>
+        <p>Transport i spedycja od 1998 roku.</p>
+        <img src="logo@2x.png">
+        <div class="site-footer">
+          <a href="/kontakt">Kontakt</a> <a href="https://facebook.com/acme">FB</a>
+          <a href="/files/katalog.pdf">Katalog</a>
+          NIP: 525-000-00-00
+        </div>
+        </body></html>
+    """,
+    "https://acme-logistics.pl/kontakt": """
+        <html><body><footer>
+          <a href="mailto:biuro@acme-logistics.pl?subject=Zapytanie">napisz do nas</a>
+          Handlowy: jan.kowalski [at] acme-logistics [dot] pl
+          Tel. <a href="tel:+48221234567">+48 22 123 45 67</a>, fax (22) 765-43-21
+          <a href="mailto:noreply@acme-logistics.pl">noreply</a>
+        </footer></body></html>
+    """,
+    "https://acme-logistics.pl/o-nas": "<html><body>Zespół: kontakt@partner-agency.com</body></html>",
+    "https://acme-logistics.pl/oferta": "<html><body>Never fetched: no contact hint.</body></html>",
+    "https://bud-max.pl/": """
+        <html><body><a href="/about-us">About us</a>
+        <a href="/contact">Contact</a></body></html>
+    """,
+    "https://bud-max.pl/contact": "<html><body>office&#64;bud-max.pl · +48 600 100 200</body></html>",
+    "https://bud-max.pl/about-us": "<html><body>Founded 2004.</body></html>",
+}
+
+
+def fake_fetch(url, **kwargs):
+    if urlsplit(url).path == "/robots.txt":
+        return FetchResult(status=404)
+    fake_fetch.calls.append(url)
+    html = SITES.get(url)
+    return FetchResult(status=200, body=html) if html else FetchResult(status=404)
+
+
+def test_candidate_links_rank_contact_pages_first():
+    links = candidate_links(SITES["https://acme-logistics.pl/"], "https://acme-logistics.pl/")
+    assert links[0] == "https://acme-logistics.pl/kontakt"  # contact hint + footer
+    assert "https://acme-logistics.pl/o-nas" in links
+    assert not any("facebook" in url or url.endswith(".pdf") or url.endswith("/oferta") for url in links)
+
+
+def test_extract_and_validate():
+    emails, phones = extract_contacts(SITES["https://acme-logistics.pl/kontakt"])
+    assert emails == ["biuro@acme-logistics.pl", "jan.kowalski@acme-logistics.pl"]
+    assert phones == ["+48221234567", "227654321"]
+
+    emails, phones = extract_contacts(SITES["https://acme-logistics.pl/"])
+    assert emails == [] and phones == []  # script, image name and NIP are ignored
+
+    site_emails = ["kontakt@partner-agency.com", "jan@acme-logistics.pl", "biuro@acme-logistics.pl"]
+    assert rank_emails(site_emails, "acme-logistics.pl") == [
+        "biuro@acme-logistics.pl", "jan@acme-logistics.pl", "kontakt@partner-agency.com",
+    ]
+    assert valid_email("info@firma.com.pl")
+    assert not valid_email("user@example.com")
+    assert normalize_phone("0048 600 100 200") == "+48600100200"
+    assert normalize_phone("2019-05-01") is None
+
+
+def test_crawl_contacts_offline_within_budget():
+    fake_fetch.calls = []
+    scheduler = partial(FetchScheduler, fetch_fn=fake_fetch, robots=RobotsCache(fetch_fn=fake_fetch), default_delay=0.2)
+    leads = [
+        # Phase 1 kept this page's HTML: it is parsed, not fetched again.
+        {"url": "https://acme-logistics.pl/", "html": SITES["https://acme-logistics.pl/"]},
+        # A resumed lead without HTML: its page is fetched first.
+        {"url": "https://bud-max.pl/"},
+    ]
+
+    found = crawl_contacts(leads, scheduler_factory=scheduler, max_pages=2)
+
+    acme = found["https://acme-logistics.pl/"]
+    assert acme.emails == ["biuro@acme-logistics.pl", "jan.kowalski@acme-logistics.pl"]
+    assert "+48221234567" in acme.phones
+
+    bud = found["https://bud-max.pl/"]
+    assert bud.emails == ["office@bud-max.pl"] and bud.phones == ["+48600100200"]
+
+    assert "https://acme-logistics.pl/" not in fake_fetch.calls
+    assert "https://acme-logistics.pl/oferta" not in fake_fetch.calls
+    # /kontakt already gave an own-domain address and a phone, so /o-nas was dropped.
+    assert "https://acme-logistics.pl/o-nas" not in fake_fetch.calls
+    # Page budget: bud-max.pl used one page for its homepage, one for /contact.
+    assert [u for u in fake_fetch.calls if "bud-max" in u] == ["https://bud-max.pl/", "https://bud-max.pl/contact"]
+
+
+def test_only_an_own_domain_address_satisfies_the_crawl():
+    def satisfied(email: str) -> bool:
+        return _Site("https://acme.pl/", "acme.pl", ContactInfo([email], ["+48221234567"]), []).satisfied()
+
+    assert satisfied("biuro@acme.pl") and satisfied("jan@mail.acme.pl")
+    assert not satisfied("kontakt@notacme.pl")  # same suffix, someone else's domain
+
+
+def test_dates_and_times_are_not_phones():
+    page = "<footer>Tel. 22 123 45 67 · Aktualizacja: 2024-03-15 14:30 · Wersja z 15.03.2024 09:05</footer>"
+    assert extract_contacts(page) == ([], ["221234567"])
+    assert normalize_phone("2024-03-15 14:30") is None
+    assert normalize_phone("15.03.2024 14") is None
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from search import expand_queries, fan_out_search, url_domain
+
+
+def test_expand_queries_variants():
+    variants = expand_queries("Logistics Warsaw", {"location": "Warsaw, Poland", "target_group": "CEO"})
+    assert variants[0] == "Logistics Warsaw"
+    assert "transport Warsaw" in variants
+    assert "Logistics Warsaw CEO" in variants
+    assert len(variants) == len({v.lower() for v in variants})
+
+    variants = expand_queries("Software House", {"location": "Kraków, Małopolska"})
+    assert "Software House Kraków, Małopolska" in variants
+    assert "Software House Kraków" in variants
+
+
+def test_url_domain():
+    assert url_domain("https://WWW.Acme.pl:443/kontakt#form") == "acme.pl"
+
+
+def test_fan_out_merges_ranks_and_tolerates_errors():
+    results = {
+        ("Logistics Warsaw", "pl-pl"): ["https://acme.pl/", "https://pl.linkedin.com/company/x", "https://baltic.pl"],
+        ("Logistics Warsaw", "wt-wt"): ["https://www.acme.pl/o-nas", "https://cargo.pl"],
+        ("transport Warsaw", "pl-pl"): ["https://cargo.pl", "https://baltic.pl"],
+    }
+    active, peak, lock = 0, 0, threading.Lock()
+
+    def fake_search(query, region, max_results):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        if (query, region) == ("transport Warsaw", "wt-wt"):
+            raise RuntimeError("202 Ratelimit")
+        return [{"href": href, "title": href} for href in results.get((query, region), [])]
+
+    ranked, errors = fan_out_search(
+        ["Logistics Warsaw", "transport Warsaw"], ["pl-pl", "wt-wt"], 10, search_fn=fake_search
+    )
+
+    assert peak > 1  # pairs ran concurrently
+    assert errors == ["transport Warsaw (wt-wt): 202 Ratelimit"]
+    domains = [entry.domain for entry in ranked]
+    assert domains[0] == "acme.pl"  # rank 0 in both regions of the original query
+    assert domains[-1] == "pl.linkedin.com"  # aggregators sink
+    assert len(domains) == len(set(domains)) == 4
+    assert ranked[0].url == "https://acme.pl/"
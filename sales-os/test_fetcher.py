@@ -0,0 +1,187 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from fetcher import FetchResult, FetchScheduler, RobotsCache, http_fetch
+
+ROBOTS = {
+    "slow.pl": "User-agent: *\nCrawl-delay: 0.3\n",
+    "private.pl": "User-agent: *\nDisallow: /admin\n",
+}
+
+
+class FakeWeb:
+    """In-memory sites: records request times and concurrency per host."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, float]] = []
+        self.in_flight: dict[str, int] = {}
+        self.max_in_flight: dict[str, int] = {}
+
+    def __call__(self, url, **kwargs):
+        parts = urlsplit(url)
+        host = parts.netloc
+        if parts.path == "/robots.txt":
+            body = ROBOTS.get(host)
+            return FetchResult(status=200, body=body) if body else FetchResult(status=404)
+        with self.lock:
+            self.requests.append((url, time.monotonic()))
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight[host] -= 1
+        if host == "blocked.pl":
+            return FetchResult(status=429)
+        if host == "hang.pl":
+            return FetchResult(error="timed out", timed_out=True)
+        if host == "cached.pl":
+            return FetchResult(status=203, body=f"<html>{url}</html>")  # via a transforming proxy
+        return FetchResult(status=200, body=f"<html>{url}</html>")
+
+
+def test_scheduler_is_polite_per_host_and_interleaves():
+    web = FakeWeb()
+    scheduler = FetchScheduler(fetch_fn=web, robots=RobotsCache(fetch_fn=web), max_workers=4, default_delay=0.05)
+    urls = (
+        [f"https://slow.pl/p{i}" for i in range(3)]
+        + [f"https://fast{i}.pl/" for i in range(6)]
+        + ["https://private.pl/admin", "https://private.pl/", "https://blocked.pl/", "https://hang.pl/"]
+        + ["https://cached.pl/"]
+    )
+
+    outcomes = {o.url: o for o in scheduler.run(urls)}
+
+    assert len(outcomes) == len(urls)
+    assert outcomes["https://private.pl/admin"].outcome == "disallowed"
+    assert outcomes["https://private.pl/"].outcome == "ok"
+    assert outcomes["https://blocked.pl/"].outcome == "blocked"
+    assert outcomes["https://hang.pl/"].outcome == "timeout"
+    assert outcomes["https://cached.pl/"].outcome == "ok"
+    assert all(n == 1 for n in web.max_in_flight.values())
+
+    slow_times = [t for url, t in web.requests if "slow.pl" in url]
+    gaps = [b - a for a, b in zip(slow_times, slow_times[1:])]
+    assert min(gaps) >= 0.28  # Crawl-delay honoured
+    # Fast hosts were not stuck behind slow.pl's delay.
+    fast_done = max(t for url, t in web.requests if "fast" in url)
+    assert fast_done < slow_times[-1]
+
+    stats = {row["host"]: row for row in scheduler.host_stats()}
+    assert stats["blocked.pl"]["block_rate"] == 1.0
+    assert stats["hang.pl"]["timeout_rate"] == 1.0
+    assert stats["private.pl"]["disallowed"] == 1
+    assert stats["slow.pl"]["crawl_delay"] == 0.3
+
+
+def test_closing_early_drops_the_rest():
+    web = FakeWeb()
+    scheduler = FetchScheduler(fetch_fn=web, robots=RobotsCache(fetch_fn=web), max_workers=2, default_delay=0.2)
+    urls = [f"https://one.pl/p{i}" for i in range(10)]
+    for i, _ in enumerate(scheduler.run(urls)):
+        if i == 1:
+            break
+    time.sleep(0.3)
+    assert len(web.requests) <= 3
+
+
+# ── http_fetch against a local server ──
+
+PAGE = ("<html><body>" + "Zażółć gęślą jaźń. " * 4000 + "</body></html>").encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/report.pdf":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        elif self.path == "/cp1250":
+            body = LEGACY_PAGE.encode("cp1250")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")  # charset only in <meta>
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/late-meta":
+            body = LEGACY_PAGE.encode("cp1250")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(body[:20])  # "<html><head><meta ht" — the charset arrives in a later read
+            self.wfile.flush()
+            time.sleep(0.1)
+            self.wfile.write(body[20:])
+        elif self.path == "/stall":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b"<p>first</p>")
+            self.wfile.flush()
+            time.sleep(3)
+            self.wfile.write(b"<p>late</p>")
+        elif self.path == "/drip":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            for _ in range(20):
+                self.wfile.write(b"<p>x</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+
+LEGACY_PAGE = '<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1250"></head>' \
+              "<body>Przedsiębiorstwo Spedycyjne Łódź</body></html>"
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_http_fetch_streams_within_limits():
+    server, base = _serve()
+    try:
+        full = http_fetch(base + "/")
+        assert full.status == 200 and not full.truncated
+        assert full.body == PAGE.decode("utf-8")  # multi-byte chars split across chunks survive
+
+        capped = http_fetch(base + "/", max_bytes=10_001)
+        assert capped.truncated and capped.bytes_read == 10_001
+        assert capped.body.startswith("<html><body>Zażółć")
+
+        pdf = http_fetch(base + "/report.pdf")
+        assert pdf.skipped and pdf.body is None and pdf.content_type == "application/pdf"
+
+        started = time.monotonic()
+        drip = http_fetch(base + "/drip", timeout=1.0, deadline=0.5)
+        assert drip.timed_out
+        assert time.monotonic() - started < 1.0
+
+        # A stalled read waits at most the deadline, however long the per-read timeout.
+        started = time.monotonic()
+        stall = http_fetch(base + "/stall", timeout=15.0, deadline=0.5)
+        assert stall.timed_out
+        assert time.monotonic() - started < 1.5
+
+        legacy = http_fetch(base + "/cp1250")
+        assert "Przedsiębiorstwo Spedycyjne Łódź" in legacy.body
+        late = http_fetch(base + "/late-meta")
+        assert "Przedsiębiorstwo Spedycyjne Łódź" in late.body
+    finally:
+        server.shutdown()
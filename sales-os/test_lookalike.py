@@ -0,0 +1,150 @@
+"""
+Tests for the lookalike index. Timings are in ``python bench_lookalike.py``.
+"""
+
+import pickle
+import sqlite3
+
+from bench_lookalike import synthetic_index
+from lookalike import INDEX_VERSION, LookalikeIndex, build_index, load_or_build
+from pipeline import rank_lookalikes
+from run_store import RunStore
+
+LOGISTICS = "Spedycja i transport drogowy, magazyn, flota ciężarówek, logistyka kontraktowa, chłodnie, TSL. " * 3
+SOFTWARE = "Software house: aplikacje webowe, React, Python, chmura AWS, wdrożenia SaaS dla startupów. " * 3
+DENTAL = "Gabinet stomatologiczny: implanty, ortodoncja, higienizacja, wybielanie zębów, protetyka. " * 3
+
+
+def test_query_ranks_by_topic_and_excludes():
+    index = LookalikeIndex()
+    index.add("https://trans.pl", LOGISTICS + "Warszawa", source="scan")
+    index.add("https://soft.pl", SOFTWARE + "Kraków", source="scan")
+    index.add("https://dent.pl", DENTAL, source="scan")
+    assert not index.add("https://empty.pl", "123 456 — ok")
+
+    [best, *_] = index.query("Szukamy firmy transportowej: flota ciężarówek i magazyn")
+    assert best.doc_id == "https://trans.pl" and 0 < best.score <= 1
+    assert best.as_dict()["source"] == "scan"
+
+    batch = index.query_many([SOFTWARE, DENTAL], k=1, exclude={"https://soft.pl"})
+    assert batch[0] == []  # nothing else shares a word with it
+    assert batch[1][0].doc_id == "https://dent.pl" and batch[1][0].score > 0.99
+
+    # Re-adding replaces; removing hides the document from results.
+    index.add("https://dent.pl", SOFTWARE)
+    assert [m.doc_id for m in index.similar_to("https://soft.pl", k=1)] == ["https://dent.pl"]
+    index.remove("https://dent.pl")
+    assert "https://dent.pl" not in index and len(index) == 2
+    assert all(m.doc_id != "https://dent.pl" for m in index.query(SOFTWARE))
+
+
+def test_rank_lookalikes_orders_leads_by_converted_seed():
+    index = LookalikeIndex()
+    index.add("https://won.pl", LOGISTICS)
+    leads = [
+        {"url": "https://a.pl", "text": DENTAL},
+        {"url": "https://b.pl", "text": "Transport i spedycja, własna flota ciężarówek i magazyn pod Łodzią."},
+        {"url": "https://c.pl", "text": SOFTWARE},
+    ]
+    ranked = rank_lookalikes(leads, index, ["https://won.pl", "https://gone.pl"], top=2)
+    assert [lead["url"] for lead in ranked][0] == "https://b.pl"
+    assert len(ranked) == 2 and ranked[0]["lookalike"] > ranked[1]["lookalike"]
+    assert rank_lookalikes(leads, index, [])[0]["lookalike"] == 0.0
+
+
+def test_build_index_from_runs_and_agent_leads(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    run = store.create_run({"query": "Logistics Warsaw"})
+    run.record_urls(["https://trans.pl", "https://down.pl"])
+    run.record_fetch("https://trans.pl", LOGISTICS)
+    run.record_fetch("https://down.pl", None)
+    store.mark_converted(["https://trans.pl", "agent:1"])
+    store.mark_converted(["agent:1"], converted=False)
+    assert store.converted() == ["https://trans.pl"]
+
+    leads_db = str(tmp_path / "leads.db")
+    conn = sqlite3.connect(leads_db)
+    conn.execute("CREATE TABLE leads (id INTEGER PRIMARY KEY, company TEXT, website TEXT, phone TEXT,"
+                 " rating INTEGER, email_draft TEXT, industry TEXT, city TEXT, created_at TEXT)")
+    conn.execute("INSERT INTO leads (company, website, email_draft, industry, city) VALUES (?, ?, ?, ?, ?)",
+                 ("Dent-Med", "https://dent.pl", DENTAL, "Dental", "Kraków"))
+    conn.commit()
+    conn.close()
+
+    index = build_index(store, leads_db)
+    assert len(index) == 2 and "https://trans.pl" in index and "agent:1" in index
+    [match] = index.query("implanty i ortodoncja", k=1)
+    assert match.as_dict() == {"score": match.score.__round__(3), "source": "agent", "company": "Dent-Med",
+                               "url": "https://dent.pl", "id": "agent:1"}
+
+
+def test_saved_index_is_caught_up_incrementally(tmp_path, monkeypatch):
+    store = RunStore(str(tmp_path / "runs.db"))
+    run = store.create_run({"query": "Logistics Warsaw"})
+    run.record_urls(["https://trans.pl", "https://soft.pl"])
+    run.record_fetch("https://trans.pl", LOGISTICS)
+    path, leads_db = str(tmp_path / "lookalike.idx"), str(tmp_path / "leads.db")
+
+    assert len(load_or_build(store, path, leads_db)) == 1  # first use: full build, saved
+
+    run.record_fetch("https://soft.pl", SOFTWARE)
+    tokenized = []
+    original_add = LookalikeIndex.add
+
+    def counting_add(self, doc_id, *args, **kwargs):
+        tokenized.append(doc_id)
+        return original_add(self, doc_id, *args, **kwargs)
+
+    monkeypatch.setattr(LookalikeIndex, "add", counting_add)
+    index = load_or_build(store, path, leads_db)
+    assert len(index) == 2 and tokenized == ["https://soft.pl"]  # only the page stored since
+    assert index.query(SOFTWARE, k=1)[0].doc_id == "https://soft.pl"
+
+    # A page fetched again is re-indexed only when its text changed.
+    tokenized.clear()
+    rerun = store.create_run({"query": "Software Kraków"})
+    rerun.record_urls(["https://soft.pl", "https://trans.pl"])
+    rerun.record_fetch("https://trans.pl", LOGISTICS)
+    rerun.record_fetch("https://soft.pl", DENTAL)  # the domain changed hands
+    index = load_or_build(store, path, leads_db)
+    assert tokenized == ["https://soft.pl"]
+    assert index.query(DENTAL, k=1)[0].doc_id == "https://soft.pl"
+
+    assert len(LookalikeIndex.load(path)) == 2
+    open(path, "wb").write(b"not a pickle")
+    assert LookalikeIndex.load(path) is None
+
+
+def test_unloadable_saved_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "lookalike.idx")
+    index = LookalikeIndex()
+    index.add("https://trans.pl", LOGISTICS)
+    index.save(path)
+    state = pickle.load(open(path, "rb"))
+
+    broken = [
+        {**state, "version": INDEX_VERSION - 1},  # older release
+        {k: v for k, v in state.items() if k != "_postings"},  # older layout
+        {**state, "_ids": {}},  # a field whose type changed
+        ["not", "a", "dict"],
+    ]
+    for saved in broken:
+        pickle.dump(saved, open(path, "wb"))
+        assert LookalikeIndex.load(path) is None
+    open(path, "wb").write(b"cmoved_module\nLookalikeIndex\n.")  # a class that moved
+    assert LookalikeIndex.load(path) is None
+
+    store = RunStore(str(tmp_path / "runs.db"))
+    assert len(load_or_build(store, path, str(tmp_path / "leads.db"))) == 0  # rebuilt, not crashed
+    assert LookalikeIndex.load(path) is not None
+
+
+def test_queries_walk_a_small_share_of_a_large_index():
+    index, queries = synthetic_index(10_000)
+    total = sum(len(slots) for slots, _ in index._postings.values())
+    results = index.query_many(queries[:20], k=10)
+    assert all(len(r) == 10 for r in results)
+    # Work, not wall time: the top-weight terms, minus near-stopword columns.
+    per_query = index.postings_walked / 20
+    assert per_query <= index.query_terms * index.max_df * len(index)
+    assert per_query < 0.02 * total
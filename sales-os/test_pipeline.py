@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pipeline
+
+COMPLETE = '{"is_fit": true, "fit_score": 8, "company_name": "Acme", "email_subject": "Hi", "email_body": "Hi Marta, we build"}'
+
+
+class CannedStream:
+    """``messages.stream()``: ``text`` in chunks; final usage only once it all arrived."""
+
+    def __init__(self, text: str, usage):
+        self.chunks = [text[i:i + 8] for i in range(0, len(text), 8)]
+        self.current_message_snapshot = SimpleNamespace(usage=SimpleNamespace(input_tokens=100, output_tokens=1))
+        self.usage = usage
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    @property
+    def text_stream(self):
+        yield from self.chunks
+        self.current_message_snapshot.usage = self.usage
+
+
+class CannedClient:
+    """An Anthropic client whose ``messages.create`` / ``messages.stream`` always answer ``text``."""
+
+    def __init__(self, text: str):
+        usage = SimpleNamespace(input_tokens=100, output_tokens=40)
+        reply = SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+        self.messages = SimpleNamespace(
+            create=lambda **request: reply, stream=lambda **request: CannedStream(text, usage)
+        )
+
+
+def test_truncated_reply_is_not_turned_into_a_draft(monkeypatch):
+    notices = []
+    status = lambda message, level="info": notices.append(level)
+
+    monkeypatch.setattr(pipeline, "_client", lambda api_key: CannedClient(COMPLETE))
+    assert pipeline.generate_email("sk", "text", status=status)["email_body"] == "Hi Marta, we build"
+
+    monkeypatch.setattr(pipeline, "_client", lambda api_key: CannedClient(COMPLETE[:-12]))  # cut off at max_tokens
+    assert pipeline.generate_email("sk", "text", status=status) is None
+    assert pipeline.triage_lead("sk", "text", status=status) is None
+    assert notices == ["warning", "warning"]
+
+
+def test_aborted_stream_estimates_its_output_tokens(monkeypatch):
+    metrics = pipeline.RunMetrics()
+    unfit = '{"is_fit": false, "fit_score": 2, "reason": "' + "x" * 200 + '"}'
+    monkeypatch.setattr(pipeline, "_client", lambda api_key: CannedClient(unfit))
+    assert pipeline.generate_email("sk", "text", stream=True, metrics=metrics)["is_fit"] is False
+    [(_, input_tokens, output_tokens, _)] = metrics.llm_calls
+    # Stopped right after "is_fit": a few tokens, not the snapshot's 1 or the full reply's 40.
+    assert input_tokens == 100 and 1 < output_tokens < 40
+
+    metrics = pipeline.RunMetrics()
+    monkeypatch.setattr(pipeline, "_client", lambda api_key: CannedClient(COMPLETE))
+    assert pipeline.generate_email("sk", "text", stream=True, metrics=metrics)["company_name"] == "Acme"
+    assert metrics.llm_calls[0][1:3] == (100, 40)  # finished: the API's own count
@@ -0,0 +1,38 @@
+from run_store import FAILED, FETCHED, PENDING, RunStore
+
+
+def test_run_progress_survives_reopen(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    run = store.create_run({"query": "Logistics Warsaw", "region": "pl-pl", "max_leads": 2})
+    run.record_urls(["https://a.pl", "https://b.pl", "https://c.pl"])
+    run.record_fetch("https://a.pl", "About Acme " * 20)
+    run.record_fetch("https://b.pl", None)
+    run.record_analysis("https://a.pl", {"is_fit": True, "company_name": "Acme"})
+    run.record_contacts("https://a.pl", {"emails": ["biuro@a.pl"], "phones": [], "pages": [], "seconds": 0.1})
+
+    # A new session (or a restarted server) opens the same run from disk.
+    resumed = RunStore(str(tmp_path / "runs.db")).open_run(run.run_id)
+    assert resumed.params["max_leads"] == 2
+    assert resumed.urls() == ["https://a.pl", "https://b.pl", "https://c.pl"]
+    states = resumed.fetch_states()
+    assert states["https://a.pl"][0] == FETCHED
+    assert states["https://b.pl"] == (FAILED, None)
+    assert states["https://c.pl"] == (PENDING, None)
+    assert resumed.analyses() == {"https://a.pl": {"is_fit": True, "company_name": "Acme"}}
+    assert resumed.contacts()["https://a.pl"]["emails"] == ["biuro@a.pl"]
+
+    [summary] = store.recent_runs()
+    assert (summary["urls"], summary["fetched"], summary["analyzed"]) == (3, 1, 1)
+    assert store.open_run("missing") is None
+
+
+def test_run_is_complete_only_when_every_lead_was_analyzed(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"))
+    run = store.create_run({"query": "Logistics Warsaw"})
+    run.record_analysis("https://a.pl", {"is_fit": True})
+    # The circuit opened before b.pl: the run needs a resume.
+    assert run.finish(["https://a.pl", "https://b.pl"]) == "stopped"
+    assert store.recent_runs()[0]["status"] == "stopped"
+
+    run.record_analysis("https://b.pl", {"is_fit": False})
+    assert run.finish(["https://a.pl", "https://b.pl"]) == "complete"
@@ -0,0 +1,81 @@
+"""
+Tests for the benchmark stand-ins (standins.py) and a small bench.py run.
+"""
+
+import json
+import urllib.request
+
+import pytest
+
+from pipeline import send_email
+from sales_common.llm_json import JsonStream
+from standins import FakeAnthropic, FakeSearch, FixtureSites, SmtpSink, company_name, site_url
+
+
+def test_fake_search_returns_fixture_sites():
+    search = FakeSearch(time_scale=0)
+    results = search("Logistics Warsaw", "pl-pl", 8)
+    assert len(results) == 8 and all(r["href"].startswith("http://site") for r in results)
+    assert search("Logistics Warsaw", "pl-pl", 8) == results
+
+
+def test_fixture_sites_serve_each_host_through_the_proxy():
+    with FixtureSites(page_kb=20, blocked_share=0, time_scale=0) as sites:
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": sites.proxy_url}))
+        page = opener.open(site_url(3)).read().decode("utf-8")
+        robots = opener.open(site_url(3, "/robots.txt")).read().decode("utf-8")
+        contact = opener.open(site_url(3, "/kontakt")).read().decode("utf-8")
+    assert company_name(3) in page and len(page) >= 20 * 1024
+    assert "User-agent: *" in robots
+    assert "biuro@site3.bench.test" in contact
+    assert sites.requests == {"page": 2, "robots": 1}
+
+
+def _post(url: str, payload: dict):
+    request = urllib.request.Request(
+        f"{url}/v1/messages", data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    return urllib.request.build_opener(urllib.request.ProxyHandler({})).open(request)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_fake_anthropic_messages(stream):
+    prompt = f"Analyze...\n--- WEBSITE TEXT ---\n{company_name(1)} — spedycja i transport."
+    with FakeAnthropic(time_scale=0, fit_share=1.0) as llm:
+        response = _post(llm.url, {"model": "m", "max_tokens": 100, "stream": stream,
+                                   "messages": [{"role": "user", "content": prompt}]})
+        raw = response.read().decode("utf-8")
+
+    if stream:
+        events = [json.loads(line[6:]) for line in raw.splitlines() if line.startswith("data: ")]
+        assert events[0]["type"] == "message_start" and events[-1]["type"] == "message_stop"
+        parser = JsonStream(dict)
+        for event in events:
+            if event["type"] == "content_block_delta":
+                parser.feed(event["delta"]["text"])
+        draft = json.loads(parser.text)
+    else:
+        message = json.loads(raw)
+        assert message["usage"]["input_tokens"] == len(prompt) // 4
+        draft = json.loads(message["content"][0]["text"])
+    assert draft["is_fit"] is True and draft["company_name"] == company_name(1)
+    assert 6 <= draft["fit_score"] <= 10 and draft["email_body"]
+    assert llm.requests == 1 and llm.output_tokens > 0
+
+
+def test_send_email_reaches_the_sink():
+    with SmtpSink(time_scale=0) as sink:
+        ok = send_email("me@antoni.lab", "secret", "lead@site1.bench.test", "Subject", "Body",
+                        smtp_host="127.0.0.1", smtp_port=sink.port, starttls=False)
+    assert ok and sink.messages == 1 and sink.bytes > 0
+
+
+def test_bench_end_to_end():
+    pytest.importorskip("trafilatura")
+    pytest.importorskip("anthropic")
+    from bench import run_size
+
+    report = run_size(10, time_scale=0.05, stream=True)
+    assert report["scanned"] == 10 and report["errors"] == []
+    assert report["qualified"] == report["sent"] > 0
+    assert {"search", "fetch", "extract", "analyze", "send"} <= set(report["latency"])
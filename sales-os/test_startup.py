@@ -0,0 +1,95 @@
+"""
+Cold start of the sales-os dashboard.
+
+Each probe runs in a fresh interpreter, like a new container would, and
+checks what got loaded rather than how long it took (timings vary too
+much between machines to fail on):
+- importing the pipeline must not pull in the Anthropic SDK, trafilatura,
+  duckduckgo-search or pandas
+- the first render of the Streamlit app (via streamlit's AppTest) must not
+  import them either
+
+The timings are recorded as test properties (``--junitxml``); run
+``python test_startup.py`` to print them, plus the slowest imports.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Imported by a phase, never by rendering.
+PHASE_ONLY = ("anthropic", "trafilatura", "duckduckgo_search", "pandas")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import pipeline
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": sorted(m for m in sys.modules if "." not in m)}))
+"""
+
+_RENDER_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": sorted(m for m in sys.modules if "." not in m),
+}))
+"""
+
+
+def _probe(code: str, *args: str, cwd: str = HERE) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code, *args], cwd=cwd, capture_output=True, text=True, timeout=120, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_pipeline_import_is_light(record_property):
+    result = _probe(_IMPORT_PROBE)
+    record_property("import_s", round(result["seconds"], 3))
+    assert not set(PHASE_ONLY) & set(result["loaded"])
+
+
+def test_first_render_is_light(record_property):
+    pytest.importorskip("streamlit.testing.v1")
+    result = _probe(_RENDER_PROBE, os.path.join(HERE, "app.py"))
+    record_property("first_render_s", round(result["seconds"], 3))
+    assert result["exceptions"] == []
+    assert not set(PHASE_ONLY) & set(result["loaded"])
+
+
+def _slowest_imports(module: str, n: int = 10) -> list[tuple[int, str]]:
+    """Largest cumulative import times (microseconds) under ``module``, from ``-X importtime``."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=HERE, capture_output=True, text=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[1].isdigit() and parts[2] != module:
+            rows.append((int(parts[1]), parts[2]))
+    return sorted(rows, reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    result = _probe(_IMPORT_PROBE)
+    print(f"import pipeline: {result['seconds'] * 1000:.0f} ms")
+    for micros, name in _slowest_imports("pipeline"):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        print("first render: streamlit not installed, skipped")
+    else:
+        render = _probe(_RENDER_PROBE, os.path.join(HERE, "app.py"))
+        print(f"first render: {render['seconds']:.2f} s")
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from telemetry import MetricsStore, RunMetrics, timed
+
+
+def test_run_metrics_roundtrip(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    assert store.cost_per_lead() is None
+
+    run = RunMetrics("Logistics Warsaw", "pl-pl")
+    for phase in ("search", "fetch", "fetch", "extract"):
+        with timed(run, phase):
+            pass
+    run.record_llm("claude-4-6-opus-20260205", 2.5, SimpleNamespace(input_tokens=4000, output_tokens=500))
+    run.record_llm("claude-4-6-opus-20260205", 1.0, None)  # failed call: no usage
+    run.leads_scanned = 2
+    store.save(run)
+
+    # Saving again (e.g. after the send phase) replaces rather than duplicates.
+    with timed(run, "send"):
+        pass
+    run.emails_sent = 1
+    store.save(run)
+
+    [saved] = store.recent_runs()
+    assert saved["input_tokens"] == 4000 and saved["emails_sent"] == 1
+    assert abs(saved["cost_usd"] - 0.0975) < 1e-9
+    phases = {row["phase"]: row["count"] for row in store.phase_stats()}
+    assert phases == {"search": 1, "fetch": 2, "extract": 1, "send": 1}
+    assert abs(store.cost_per_lead() - 0.0975 / 2) < 1e-9
+
+
+def test_wall_time_is_elapsed_not_the_sum_of_phases():
+    run = RunMetrics("Logistics Warsaw", "pl-pl")
+    run.timings += [("fetch", 5.0)] * 8  # eight fetch workers, side by side
+    run.finish()
+    assert run.busy_seconds == 40.0
+    assert 0 <= run.wall_seconds < 5.0
+    assert run.wall_seconds == run.wall_seconds  # frozen by finish()
+
+
+def test_timed_is_noop_without_metrics():
+    with timed(None, "search"):
+        pass
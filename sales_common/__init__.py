@@ -0,0 +1,6 @@
+"""
+ANTONI SALES — shared helpers for sales-os and sales-agent
+==========================================================
+Pure-stdlib building blocks used by both Streamlit dashboards.
+Each app puts the repository root on ``sys.path`` before importing.
+"""
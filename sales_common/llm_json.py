@@ -0,0 +1,187 @@
+"""
+Robust JSON extraction from LLM output
+======================================
+Models rarely return *only* JSON: they wrap it in ```json fences, add a
+chatty preface, append "Let me know if…" prose, or get cut off by
+``max_tokens``.  This module finds every top-level JSON object/array in
+such text in a single pass and decodes it with ``JSONDecoder.raw_decode``.
+
+The scanner walks the text once, tracking string/escape state and a
+bracket stack.  Each balanced ``{…}`` / ``[…]`` span is decoded exactly
+once; if a span is not valid JSON (prose like "{see below}") its closed
+child spans are tried instead.  When the text ends inside an open
+structure (truncated output) the tail is repaired by closing the open
+string and brackets, falling back to the last complete member.
+"""
+
+import json
+import re
+from typing import Any, Callable, NamedTuple
+
+_DECODER = json.JSONDecoder()
+
+# Only these characters can change scanner state — everything else is skipped.
+_TOKENS = re.compile(r'[\[\]{}",\\]')
+_CLOSERS = {"[": "]", "{": "}"}
+
+
+class JsonMatch(NamedTuple):
+    """A decoded top-level JSON value and where it was found."""
+
+    value: Any
+    start: int
+    end: int
+    complete: bool  # False when the value was repaired from truncated text
+
+
+class _Span(NamedTuple):
+    start: int
+    end: int
+    children: list
+
+
+def _decode_span(text: str, span: _Span, out: list[JsonMatch]) -> None:
+    """Decode a balanced span, descending into its children if it isn't JSON."""
+    # Decode a slice, not ``text`` at an offset: JSONDecodeError counts lines
+    # from the start of its document, which would make failures O(n) each.
+    try:
+        value, end = _DECODER.raw_decode(text[span.start:span.end])
+        if end == span.end - span.start:
+            out.append(JsonMatch(value, span.start, span.end, True))
+            return
+    except json.JSONDecodeError:
+        pass
+    for child in span.children:
+        _decode_span(text, child, out)
+
+
+def _repair_tail(text: str, start: int, closers: str, in_string: bool, cut) -> JsonMatch | None:
+    """Close a truncated structure so the part that did arrive can be used."""
+    candidates = [text[start:].rstrip() + ('"' if in_string else "") + closers]
+    if cut is not None and cut[0] > start:
+        candidates.append(text[start:cut[0]] + cut[1])
+    for candidate in candidates:
+        try:
+            value, _ = _DECODER.raw_decode(candidate)
+            return JsonMatch(value, start, len(text), False)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def find_json(text: str) -> list[JsonMatch]:
+    """
+    Return every top-level JSON object/array embedded in ``text``, in order.
+    A trailing truncated structure is included with ``complete=False``.
+    """
+    matches: list[JsonMatch] = []
+    # Each frame: [start, closer, children]
+    stack: list[list] = []
+    in_string = False
+    skip_at = -1  # position of a character escaped by a backslash
+    cut = None  # (position, closers) of the last comma inside a structure
+
+    for m in _TOKENS.finditer(text):
+        pos = m.start()
+        if pos == skip_at:
+            continue
+        ch = m.group()
+
+        if in_string:
+            if ch == "\\":
+                skip_at = pos + 1
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch in _CLOSERS:
+            stack.append([pos, _CLOSERS[ch], []])
+        elif not stack:
+            # Quotes, commas and stray closers in prose are irrelevant.
+            continue
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            cut = (pos, "".join(frame[1] for frame in reversed(stack)))
+        elif ch == stack[-1][1]:
+            start, _, children = stack.pop()
+            span = _Span(start, pos + 1, children)
+            if stack:
+                stack[-1][2].append(span)
+            else:
+                _decode_span(text, span, matches)
+                cut = None
+        elif ch in "]}":
+            # Mismatched closer: this wasn't JSON.  Salvage what closed cleanly.
+            for frame in stack:
+                for child in frame[2]:
+                    _decode_span(text, child, matches)
+            stack.clear()
+            cut = None
+
+    if stack:
+        closers = "".join(frame[1] for frame in reversed(stack))
+        repaired = _repair_tail(text, stack[0][0], closers, in_string, cut)
+        if repaired is not None:
+            matches.append(repaired)
+        else:
+            for frame in stack:
+                for child in frame[2]:
+                    _decode_span(text, child, matches)
+            matches.sort(key=lambda match: match.start)
+
+    return matches
+
+
+def extract_json(
+    text: str,
+    kind: type | tuple[type, ...] = (dict, list),
+    accept: Callable[[Any], bool] | None = None,
+    allow_partial: bool = True,
+) -> Any:
+    """
+    Return the last JSON value of type ``kind`` found in ``text``, or None.
+
+    ``accept`` can further filter candidates (e.g. "a list of dicts"), and
+    ``allow_partial=False`` ignores values repaired from truncated output.
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    # Fast path: the model did as it was told.
+    try:
+        value = json.loads(text)
+        if isinstance(value, kind) and (accept is None or accept(value)):
+            return value
+    except json.JSONDecodeError:
+        pass
+
+    for match in reversed(find_json(text)):
+        if not match.complete and not allow_partial:
+            continue
+        if isinstance(match.value, kind) and (accept is None or accept(match.value)):
+            return match.value
+    return None
+
+
+class JsonStream:
+    """
+    Accumulates streamed model output and keeps a best-effort parse of it.
+
+    ``feed`` returns the current (possibly partial) value, so callers can act
+    on fields as soon as they arrive — e.g. stop once ``is_fit`` is false.
+    """
+
+    def __init__(self, kind: type | tuple[type, ...] = dict):
+        self.kind = kind
+        self.text = ""
+        self.value: Any = None
+
+    def feed(self, chunk: str) -> Any:
+        self.text += chunk
+        # Outputs are a few KB at most, so a linear rescan per chunk is cheap.
+        value = extract_json(self.text, self.kind)
+        if value is not None:
+            self.value = value
+        return self.value
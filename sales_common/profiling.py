@@ -0,0 +1,321 @@
+"""
+Per-run profiling
+=================
+An opt-in profile of a single scan or hunt, for when one is unexpectedly
+slow and it isn't clear whether the time went to fetching, extraction,
+pandas, SQLite or waiting on an API.
+
+``RunProfile`` runs one of two passes, because tracemalloc hooks every
+allocation and slows Python code 2-3x, which would skew the timings:
+
+- time (default): a sampling profiler. A background thread reads
+  ``sys._current_frames()`` every ``interval`` seconds and counts each
+  stack, rooted at the active section and thread name. Sampled threads
+  are the one that started the profile, threads started while it runs
+  (fetch workers, executors) and any listed by name in ``threads`` (e.g.
+  the leads.db writer). Blocked calls show up as their waiting frame, so
+  API waits are visible too.
+- allocations (``trace_allocations=True``): no sampling; tracemalloc
+  around each ``section()`` records the allocation sites that grew the
+  most during it, and its traced peak. Its wall times include the
+  tracing overhead.
+
+``profiled(profile, name)`` is a plain ``nullcontext`` when ``profile`` is
+None: with the mode off nothing is sampled, traced or written.
+
+``stop()`` writes ``<out_dir>/<run_id>/``: ``profile.folded`` (collapsed
+stacks for flamegraph.pl / speedscope) and ``flamegraph.svg``, or
+``allocations.txt``; and ``summary.json``. ``render_profile()`` shows a
+summary in either dashboard.
+"""
+
+import html
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+SAMPLE_INTERVAL = 0.005  # 200 Hz
+TOP_ALLOCATIONS = 25
+MAX_STACK_DEPTH = 96
+
+FLAME_WIDTH = 1200
+FLAME_ROW = 17
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class RunProfile:
+    """Sampling profiler, or tracemalloc, for one run; use as a context manager."""
+
+    def __init__(
+        self,
+        run_id: str,
+        out_dir: str,
+        interval: float = SAMPLE_INTERVAL,
+        threads: tuple[str, ...] = (),
+        trace_allocations: bool = False,
+        top: int = TOP_ALLOCATIONS,
+    ):
+        self.run_id = run_id
+        self.dir = os.path.join(out_dir, run_id)
+        self.interval = interval
+        self.thread_names = set(threads)
+        self.trace_allocations = trace_allocations
+        self.top = top
+        self.stacks: dict[str, int] = {}
+        self.samples = 0
+        self.sections: list[dict] = []
+        self.allocations: list[tuple[str, list[str]]] = []
+        self.summary: dict = {}
+        self._section: str | None = None
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._owner = 0
+        self._preexisting: set[int] = set()
+        self._started_tracing = False
+        self._started = 0.0
+
+    def __enter__(self) -> "RunProfile":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── Lifecycle ──
+
+    def start(self) -> None:
+        self._owner = threading.get_ident()
+        self._preexisting = {t.ident for t in threading.enumerate() if t.name not in self.thread_names}
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._started = time.perf_counter()
+        if not self.trace_allocations:
+            self._sampler = threading.Thread(target=self._sample_loop, name="run-profiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> dict:
+        """Stop sampling or tracing, write the artifacts and return the summary."""
+        if not self._started or self.summary:
+            return self.summary
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        seconds = time.perf_counter() - self._started
+        peak = tracemalloc.get_traced_memory()[1] if self.trace_allocations and tracemalloc.is_tracing() else 0
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        os.makedirs(self.dir, exist_ok=True)
+        artifacts = {"summary": os.path.join(self.dir, "summary.json")}
+        if self.trace_allocations:
+            artifacts["allocations"] = os.path.join(self.dir, "allocations.txt")
+            with open(artifacts["allocations"], "w", encoding="utf-8") as f:
+                for name, lines in self.allocations:
+                    f.write(f"── {name}: top allocation sites (net growth) ──\n")
+                    f.writelines(f"{line}\n" for line in lines)
+                    f.write("\n")
+        else:
+            artifacts["folded"] = os.path.join(self.dir, "profile.folded")
+            artifacts["flamegraph"] = os.path.join(self.dir, "flamegraph.svg")
+            with open(artifacts["folded"], "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+            with open(artifacts["flamegraph"], "w", encoding="utf-8") as f:
+                f.write(flamegraph_svg(self.stacks, f"run {self.run_id} · {self.samples} samples"))
+        self.summary = {
+            "run_id": self.run_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "mode": "allocations" if self.trace_allocations else "time",
+            "seconds": round(seconds, 2),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "peak_traced_kib": round(peak / 1024, 1),
+            "sections": self.sections,
+            "artifacts": artifacts,
+        }
+        with open(artifacts["summary"], "w", encoding="utf-8") as f:
+            json.dump(self.summary, f, indent=2)
+        return self.summary
+
+    @contextmanager
+    def section(self, name: str):
+        """Label samples with ``name`` and record its wall time (and allocations, when tracing)."""
+        before = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        previous, self._section = self._section, name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._section = previous
+            row = {"name": name, "seconds": round(time.perf_counter() - started, 3)}
+            if before is not None and tracemalloc.is_tracing():
+                row["peak_traced_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                after = tracemalloc.take_snapshot()
+                self.allocations.append((name, self._top_allocations(before, after)))
+            self.sections.append(row)
+
+    def _top_allocations(self, before, after) -> list[str]:
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        diffs = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        return [str(stat) for stat in diffs[: self.top] if stat.size_diff > 0]
+
+    # ── Sampler ──
+
+    def _watched(self) -> dict[int, str]:
+        return {
+            t.ident: t.name
+            for t in threading.enumerate()
+            if t.ident is not None
+            and t is not threading.current_thread()
+            and (t.ident == self._owner or t.ident not in self._preexisting or t.name in self.thread_names)
+        }
+
+    def _sample_loop(self) -> None:
+        watched, refreshed = self._watched(), time.perf_counter()
+        while not self._stop.wait(self.interval):
+            if time.perf_counter() - refreshed > 0.1:  # pick up newly started workers
+                watched, refreshed = self._watched(), time.perf_counter()
+            frames = sys._current_frames()
+            section = self._section or "(between sections)"
+            for ident, name in watched.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                key = ";".join([section, name, *reversed(stack)])
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+
+def profiled(profile: RunProfile | None, name: str):
+    """``profile.section(name)``, or a no-op when profiling is off."""
+    return profile.section(name) if profile is not None else nullcontext()
+
+
+def load_summary(out_dir: str, run_id: str) -> dict | None:
+    path = os.path.join(out_dir, run_id, "summary.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ──────────────────────────────────────────────
+# Flamegraph
+# ──────────────────────────────────────────────
+
+def _tree(stacks: dict[str, int]) -> dict:
+    root = {"name": "all", "count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def _color(name: str) -> str:
+    h = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + h % 50},{80 + (h >> 8) % 120},{30 + (h >> 16) % 40})"
+
+
+def flamegraph_svg(stacks: dict[str, int], title: str = "") -> str:
+    """A self-contained SVG flamegraph (hover a frame for its share) of folded ``stacks``."""
+    root = _tree(stacks)
+    total = root["count"] or 1
+    rects: list[tuple[int, str]] = []
+    max_depth = 0
+
+    def draw(node: dict, x: float, depth: int) -> None:
+        nonlocal max_depth
+        width = node["count"] / total * FLAME_WIDTH
+        if width < 0.5:
+            return
+        max_depth = max(max_depth, depth)
+        label = html.escape(node["name"])
+        share = node["count"] / total * 100
+        text = ""
+        if width > 30:
+            short = node["name"][: int(width / 7)]
+            text = f'<text x="{x + 3:.1f}" y="{{y}}">{html.escape(short)}</text>'
+        rects.append((depth, (
+            f'<g><title>{label} — {node["count"]} samples ({share:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{{y_rect}}" width="{width:.1f}" height="{FLAME_ROW - 1}" '
+            f'fill="{_color(node["name"])}" rx="2"/>{text}</g>'
+        )))
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            draw(child, x, depth + 1)
+            x += child["count"] / total * FLAME_WIDTH
+
+    draw(root, 0.0, 0)
+    height = (max_depth + 1) * FLAME_ROW + 30
+    body = []
+    for depth, template in rects:
+        y_rect = height - (depth + 1) * FLAME_ROW
+        body.append(template.replace("{y_rect}", str(y_rect)).replace("{y}", str(y_rect + FLAME_ROW - 5)))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="16" font-size="13">{html.escape(title)}</text>'
+        + "".join(body)
+        + "</svg>\n"
+    )
+
+
+# ──────────────────────────────────────────────
+# Streamlit
+# ──────────────────────────────────────────────
+
+_DOWNLOADS = (
+    ("flamegraph", "🔥 Flamegraph (SVG)", "image/svg+xml"),
+    ("folded", "📄 Folded Stacks", "text/plain"),
+    ("allocations", "🧠 Top Allocations", "text/plain"),
+)
+
+
+def render_profile(summary: dict) -> None:
+    """Where a profiled run spent its time (or memory), with its artifacts to download."""
+    import streamlit as st  # only the dashboards render; the module stays stdlib-only
+
+    allocations = summary.get("mode") == "allocations"
+    with st.expander(f"🔬 Run Profile ({summary['run_id']})" + (" · allocations" if allocations else "")):
+        p1, p2 = st.columns(2)
+        p1.metric("Wall Time", f"{summary['seconds']:.1f} s",
+                  help="Includes tracemalloc's overhead." if allocations else None)
+        if allocations:
+            p2.metric("Peak Traced Memory", f"{summary['peak_traced_kib'] / 1024:.1f} MiB")
+        else:
+            p2.metric("Samples", f"{summary['samples']:,}")
+        st.dataframe(summary["sections"], use_container_width=True, hide_index=True)
+        artifacts = summary["artifacts"]
+        downloads = [(key, label, mime) for key, label, mime in _DOWNLOADS
+                     if key in artifacts and os.path.exists(artifacts[key])]
+        for column, (key, label, mime) in zip(st.columns(max(len(downloads), 1)), downloads):
+            with open(artifacts[key], "rb") as f:
+                column.download_button(
+                    label, f.read(), os.path.basename(artifacts[key]), mime,
+                    use_container_width=True, key=f"profile-{key}",
+                )
+        st.caption(f"Saved in {os.path.dirname(artifacts['summary'])}")
@@ -0,0 +1,266 @@
+"""
+Retries and circuit breakers for external calls
+===============================================
+DuckDuckGo rate-limits and Anthropic has bad minutes. Without a guard
+every lead pays the full timeout, and every retry adds load to a backend
+that is already struggling.
+
+``call(endpoint, fn)`` wraps one external call:
+
+- transient failures (timeouts, connection errors, 429 / 5xx / overloaded)
+  are retried with full-jitter exponential backoff; a ``Retry-After``
+  header is honoured when the error carries one
+- each endpoint has a ``CircuitBreaker``: after ``failure_threshold``
+  consecutive transient failures it opens and calls fail fast with
+  ``CircuitOpenError``; after ``reset_timeout`` one probe is let through
+  (half-open) and its result closes or re-opens the circuit
+- breakers live in a process-wide registry, so state survives Streamlit
+  reruns and ``breaker_states()`` can be shown in the UI
+
+Errors are classified by status code and class name, so neither the
+Anthropic SDK nor duckduckgo-search has to be importable here.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+TRANSIENT_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+TRANSIENT_NAMES = {
+    # stdlib / httpx / requests
+    "TimeoutError", "ConnectionError", "TimeoutException", "ConnectTimeout", "ReadTimeout",
+    "ConnectError", "RemoteProtocolError",
+    # anthropic
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "OverloadedError",
+    # duckduckgo-search (its TimeoutException is covered above)
+    "RatelimitException",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} unavailable (circuit open, next probe in {retry_in:.0f}s)")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors worth retrying: timeouts, dropped connections, 429 / 5xx."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUSES
+    return any(cls.__name__ in TRANSIENT_NAMES for cls in type(exc).__mro__)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds from a ``Retry-After`` header on the error's response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 3  # total tries, including the first
+    base_delay: float = 1.0
+    max_delay: float = 16.0
+
+    def delay(self, retry: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, base_delay * 2**retry)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        policy: RetryPolicy | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0  # consecutive
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        # Lifetime counters for the UI.
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
+        self.trips = 0
+        self.last_error = ""
+
+    def retry_in(self) -> float:
+        return max(self.opened_at + self.reset_timeout - self.clock(), 0.0)
+
+    def before_call(self) -> bool:
+        """Admit a call or raise ``CircuitOpenError``; True when the call is the half-open probe."""
+        with self._lock:
+            if self.state == OPEN and self.retry_in() <= 0:
+                self.state = HALF_OPEN
+            probe = self.state == HALF_OPEN and not self._probing
+            if probe:
+                self._probing = True
+            elif self.state != CLOSED:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.retry_in())
+            self.calls += 1
+            return probe
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state, self.failures, self._probing = CLOSED, 0, False
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"[:200]
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state, self.opened_at = OPEN, self.clock()
+            self._probing = False
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def release(self) -> None:
+        """A call ended in an error that says nothing about backend health."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            if self.state == OPEN and self.retry_in() <= 0:
+                state = HALF_OPEN  # the next call will probe
+            else:
+                state = self.state
+            return {
+                "endpoint": self.name,
+                "state": state,
+                "consecutive_failures": self.failures,
+                "calls": self.calls,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "trips": self.trips,
+                "retry_in_s": round(self.retry_in(), 1) if state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+
+_REGISTRY: dict[str, CircuitBreaker] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def breaker(endpoint: str, **settings) -> CircuitBreaker:
+    """The process-wide breaker for ``endpoint``; ``settings`` apply on first use."""
+    with _REGISTRY_LOCK:
+        if endpoint not in _REGISTRY:
+            _REGISTRY[endpoint] = CircuitBreaker(endpoint, **settings)
+        return _REGISTRY[endpoint]
+
+
+def breaker_states() -> list[dict]:
+    with _REGISTRY_LOCK:
+        breakers = list(_REGISTRY.values())
+    return [b.snapshot() for b in breakers]
+
+
+def _backoff(guard: CircuitBreaker, attempt: int, exc: Exception, on_retry) -> float | None:
+    """Book a failed attempt; the delay before the next one, or None to give up."""
+    if not is_transient(exc):
+        guard.release()
+        return None
+    guard.record_failure(exc)
+    if attempt + 1 >= guard.policy.attempts or guard.state == OPEN:
+        return None
+    delay = retry_after(exc)
+    delay = min(delay, guard.policy.max_delay) if delay is not None else guard.policy.delay(attempt)
+    guard.record_retry()
+    if on_retry is not None:
+        on_retry(attempt + 1, delay, exc)
+    return delay
+
+
+def call(
+    endpoint: str | CircuitBreaker,
+    fn: Callable[..., Any],
+    *args,
+    on_retry: Callable[[int, float, BaseException], None] | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    **kwargs,
+) -> Any:
+    """
+    ``fn(*args, **kwargs)`` behind ``endpoint``'s breaker, retrying transient
+    errors per its ``RetryPolicy``. ``on_retry(retry, delay, exc)`` is
+    called before each backoff sleep. Non-transient errors propagate at
+    once and don't count against the circuit.
+    """
+    guard = endpoint if isinstance(endpoint, CircuitBreaker) else breaker(endpoint)
+    for attempt in range(guard.policy.attempts):
+        probe = guard.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            delay = _backoff(guard, attempt, exc, on_retry)
+            if delay is None:
+                raise
+            sleep(delay)
+        except BaseException:
+            # Cancelled, interrupted or a Streamlit rerun: no verdict on the backend,
+            # but a probe must not stay in flight or the circuit never closes again.
+            if probe:
+                guard.release()
+            raise
+        else:
+            guard.record_success()
+            return result
+
+
+async def acall(
+    endpoint: str | CircuitBreaker,
+    fn: Callable[..., Awaitable[Any]],
+    *args,
+    on_retry: Callable[[int, float, BaseException], None] | None = None,
+    **kwargs,
+) -> Any:
+    """``call`` for coroutine functions; backs off with ``asyncio.sleep``."""
+    import asyncio
+
+    guard = endpoint if isinstance(endpoint, CircuitBreaker) else breaker(endpoint)
+    for attempt in range(guard.policy.attempts):
+        probe = guard.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as exc:
+            delay = _backoff(guard, attempt, exc, on_retry)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+        except BaseException:
+            if probe:
+                guard.release()
+            raise
+        else:
+            guard.record_success()
+            return result
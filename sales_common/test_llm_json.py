@@ -0,0 +1,245 @@
+"""
+Fuzz + benchmark suite for sales_common.llm_json.
+Run: python -m pytest -q sales_common/test_llm_json.py
+     python sales_common/test_llm_json.py   (prints benchmark numbers)
+"""
+
+import json
+import random
+import re
+import time
+
+from sales_common import llm_json
+from sales_common.llm_json import JsonStream, extract_json, find_json
+
+ANALYSIS = {
+    "is_fit": True,
+    "company_name": "Trans-Pol Logistyka Sp. z o.o.",
+    "weakness": "Quote form is a PDF [download] with no {online} tracking",
+    "email_subject": "Your \"Track & Trace\" page",
+    "email_body": "Hi Marek,\nI noticed your fleet map is a static JPG…\n\nAntoni",
+    "fit_score": 8,
+}
+
+LEADS = [
+    {"company": "Acme Logistics", "website": "https://acme.pl", "phone": "+48 123 456 789",
+     "rating": 8, "email_draft": "Hi Acme team, [quick idea] about your {site}."},
+    {"company": "Baltic Cargo", "website": "", "phone": "", "rating": 6,
+     "email_draft": "Saw \"Baltic Cargo\" on Maps — no website yet?"},
+]
+
+PROSE = [
+    "Here is the analysis you asked for:",
+    "Sure! Based on the site text (see [1]) I think:",
+    "Note: I couldn't verify {revenue} figures.",
+    "Let me know if you'd like a shorter version :]",
+    "The company's \"About\" page is thin.",
+]
+
+
+# ──────────────────────────────────────────────
+# Real-world shaped outputs
+# ──────────────────────────────────────────────
+
+def test_plain_object():
+    assert extract_json(json.dumps(ANALYSIS), dict) == ANALYSIS
+
+
+def test_code_fence_with_prose():
+    raw = f"Here you go:\n```json\n{json.dumps(ANALYSIS, indent=2)}\n```\nLet me know {{anything}} else!"
+    assert extract_json(raw, dict) == ANALYSIS
+
+
+def test_nested_array_not_cut_at_first_bracket():
+    # The old non-greedy regex stopped at the first "]" inside the strings.
+    raw = "Final answer:\n" + json.dumps(LEADS)
+    assert extract_json(raw, list) == LEADS
+
+
+def test_agent_transcript_prefers_last_array():
+    raw = (
+        "Step 1: opened maps [ok]\n"
+        'Intermediate: [{"company": "draft"}]\n'
+        f"Final: {json.dumps(LEADS)}\nDone [100%]."
+    )
+    assert extract_json(raw, list, accept=lambda v: all(isinstance(x, dict) for x in v)) == LEADS
+
+
+def test_stray_prose_brace_before_json():
+    raw = "Notes { unfinished thought\n" + json.dumps(LEADS) + "\nthanks"
+    assert extract_json(raw, list) == LEADS
+
+
+def test_truncated_object_is_repaired():
+    full = json.dumps(ANALYSIS)
+    cut = full[: full.index('"email_body"') + len('"email_body": "Hi Mar')]
+    result = extract_json(cut, dict)
+    assert result["is_fit"] is True
+    assert result["email_body"] == "Hi Mar"
+    assert extract_json(cut, dict, allow_partial=False) is None
+
+
+def test_truncated_lead_list_is_not_repaired_when_partial_is_off():
+    full = json.dumps(LEADS)
+    cut = full[: full.index("Baltic") + 3]  # the agent's answer ends mid-lead: {"company": "Bal
+    is_leads = lambda value: any(isinstance(item, dict) for item in value)
+    assert extract_json(cut, list, accept=is_leads)[-1] == {"company": "Bal"}
+    assert extract_json(cut, list, accept=is_leads, allow_partial=False) is None
+
+
+def test_truncated_after_key_falls_back_to_last_member():
+    raw = '{"is_fit": false, "company_name": "X", "weak'
+    assert extract_json(raw, dict) == {"is_fit": False, "company_name": "X"}
+
+
+def test_truncated_array_keeps_complete_items():
+    full = json.dumps(LEADS)
+    result = extract_json(full[: len(full) - 20], list)
+    assert result[0] == LEADS[0]
+    assert result[1]["company"] == "Baltic Cargo"
+
+
+def test_no_json():
+    assert extract_json("I could not find any companies.", dict) is None
+    assert extract_json("", list) is None
+    assert find_json("a ] stray } closer") == []
+
+
+def test_stream_resolves_is_fit_early():
+    raw = json.dumps({"is_fit": False, **{k: v for k, v in ANALYSIS.items() if k != "is_fit"}})
+    stream = JsonStream()
+    seen_at = None
+    for i in range(0, len(raw), 3):
+        value = stream.feed(raw[i:i + 3])
+        if value and value.get("is_fit") is False:
+            seen_at = i
+            break
+    assert seen_at is not None and seen_at < 20
+
+
+def test_stream_partial_values_grow():
+    raw = "```json\n" + json.dumps(ANALYSIS) + "\n```"
+    stream = JsonStream()
+    bodies = []
+    for i in range(0, len(raw), 7):
+        value = stream.feed(raw[i:i + 7]) or {}
+        bodies.append(value.get("email_body", ""))
+    assert bodies[-1] == ANALYSIS["email_body"]
+    assert all(ANALYSIS["email_body"].startswith(b) for b in bodies)
+
+
+# ──────────────────────────────────────────────
+# Fuzz
+# ──────────────────────────────────────────────
+
+_ALPHABET = 'abcXYZ ąęł[]{}",:\\/\n\t€😀'
+
+
+def _rand_value(rng: random.Random, depth: int = 0):
+    roll = rng.random()
+    if depth < 3 and roll < 0.25:
+        return {_rand_str(rng): _rand_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if depth < 3 and roll < 0.4:
+        return [_rand_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if roll < 0.7:
+        return _rand_str(rng)
+    return rng.choice([True, False, None, rng.randint(-100, 100), rng.random()])
+
+
+def _rand_str(rng: random.Random) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 12)))
+
+
+def _wrap(rng: random.Random, payload: str) -> str:
+    before = " ".join(rng.sample(PROSE, rng.randint(0, 2)))
+    after = " ".join(rng.sample(PROSE, rng.randint(0, 2)))
+    if rng.random() < 0.5:
+        payload = f"```json\n{payload}\n```"
+    return f"{before}\n{payload}\n{after}"
+
+
+def test_fuzz_wrapped_values_roundtrip():
+    rng = random.Random(1234)
+    for _ in range(500):
+        value = {"is_fit": rng.random() < 0.5, "data": _rand_value(rng)}
+        raw = _wrap(rng, json.dumps(value, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2])))
+        assert extract_json(raw, dict, accept=lambda v: "is_fit" in v) == value
+
+
+def test_fuzz_truncation_never_raises():
+    rng = random.Random(99)
+    for _ in range(300):
+        value = {"is_fit": True, "data": _rand_value(rng), "fit_score": 5}
+        raw = json.dumps(value)
+        cut = raw[: rng.randint(0, len(raw))]
+        result = extract_json(cut, dict)
+        assert result is None or isinstance(result, dict)
+        if result and "is_fit" in result:
+            assert result["is_fit"] is True
+
+
+# ──────────────────────────────────────────────
+# Benchmark
+# ──────────────────────────────────────────────
+
+def _transcript(n_steps: int) -> str:
+    steps = [f"Step {i}: clicked [result {i}] on {{map}} pane" for i in range(n_steps)]
+    return "\n".join(steps) + "\nFinal:\n" + json.dumps(LEADS * 5)
+
+
+def _legacy_extract(text: str):
+    for match in reversed(re.findall(r"\[[\s\S]*?\]", text)):
+        try:
+            return json.loads(match)
+        except json.JSONDecodeError:
+            continue
+    return []
+
+
+def _best_of(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+class _CountingDecoder(json.JSONDecoder):
+    """Counts ``raw_decode`` calls and the characters handed to them."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = self.chars = 0
+
+    def raw_decode(self, s, idx=0):
+        self.calls += 1
+        self.chars += len(s) - idx
+        return super().raw_decode(s, idx)
+
+
+def _decode_work(text: str, monkeypatch) -> tuple[int, int]:
+    decoder = _CountingDecoder()
+    monkeypatch.setattr(llm_json, "_DECODER", decoder)
+    assert find_json(text)[-1].value == LEADS * 5
+    return decoder.calls, decoder.chars
+
+
+def test_scan_is_linear(monkeypatch):
+    # Work done, not wall time: each span is decoded once, from a slice of its own length.
+    small_calls, small_chars = _decode_work(_transcript(2_000), monkeypatch)
+    large_calls, large_chars = _decode_work(_transcript(16_000), monkeypatch)
+    # 8x the steps: 8x the work, give or take longer step numbers.
+    assert large_calls <= 8 * small_calls
+    assert large_chars <= 8 * small_chars * 1.2
+    assert large_chars <= 2 * len(_transcript(16_000))
+
+
+if __name__ == "__main__":
+    for n in (1_000, 4_000, 16_000):
+        text = _transcript(n)
+        print(
+            f"{len(text) / 1024:8.0f} KiB  "
+            f"find_json {_best_of(find_json, text) * 1000:8.2f} ms   "
+            f"legacy regex {_best_of(_legacy_extract, text) * 1000:8.2f} ms"
+        )
@@ -0,0 +1,77 @@
+"""
+Tests for sales_common.profiling — run with ``python -m pytest sales_common``.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+
+from sales_common.profiling import RunProfile, flamegraph_svg, load_summary, profiled
+
+
+def busy_scan(seconds: float) -> list[bytearray]:
+    kept = [bytearray(1024) for _ in range(2000)]
+    busy_worker(seconds)
+    return kept
+
+
+def busy_worker(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def test_profile_samples_sections_and_new_threads(tmp_path):
+    idle = threading.Event()
+    bystander = threading.Thread(target=idle.wait, name="bystander", daemon=True)
+    bystander.start()
+
+    with RunProfile("run1", str(tmp_path), interval=0.002) as profile:
+        assert not tracemalloc.is_tracing()  # the time pass doesn't slow allocations down
+        with profiled(profile, "scan_leads"):
+            busy_scan(0.2)
+        with profiled(profile, "analyze_leads"):
+            worker = threading.Thread(target=busy_worker, args=(0.2,), name="fetch-worker")
+            worker.start()
+            worker.join()
+    idle.set()
+
+    summary = profile.summary
+    assert summary["mode"] == "time"
+    assert [s["name"] for s in summary["sections"]] == ["scan_leads", "analyze_leads"]
+    assert summary["samples"] > 20
+    assert set(summary["artifacts"]) == {"folded", "flamegraph", "summary"}
+
+    folded = open(summary["artifacts"]["folded"], encoding="utf-8").read()
+    assert "scan_leads;MainThread;" in folded and "busy_scan (" in folded
+    assert "analyze_leads;fetch-worker;" in folded and "busy_worker (" in folded
+    assert "bystander" not in folded
+    assert open(summary["artifacts"]["flamegraph"], encoding="utf-8").read().startswith("<svg")
+    assert load_summary(str(tmp_path), "run1") == json.loads(json.dumps(summary))
+
+
+def test_allocation_pass_traces_sections_without_sampling(tmp_path):
+    with RunProfile("run2", str(tmp_path), trace_allocations=True) as profile:
+        with profiled(profile, "scan_leads"):
+            kept = busy_scan(0.05)
+    assert not tracemalloc.is_tracing()
+
+    summary = profile.summary
+    assert summary["mode"] == "allocations" and summary["samples"] == 0
+    assert summary["sections"][0]["peak_traced_kib"] >= len(kept)  # ~1 KiB each
+    assert set(summary["artifacts"]) == {"allocations", "summary"}
+    allocations = open(summary["artifacts"]["allocations"], encoding="utf-8").read()
+    assert "── scan_leads" in allocations and "test_profiling.py" in allocations
+
+
+def test_profiled_is_a_no_op_when_off():
+    with profiled(None, "scan_leads") as section:
+        assert section is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_flamegraph_widths_follow_sample_counts():
+    svg = flamegraph_svg({"a;b": 3, "a;c": 1}, "t")
+    assert 'width="900.0"' in svg and 'width="300.0"' in svg  # b: 3/4, c: 1/4 of 1200px
+    assert "b — 3 samples (75.0%)" in svg
@@ -0,0 +1,160 @@
+"""
+Tests for sales_common.resilience — run with ``python -m pytest sales_common``.
+"""
+
+import asyncio
+
+import pytest
+
+from sales_common.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    acall,
+    call,
+    is_transient,
+    retry_after,
+)
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class RatelimitException(Exception):
+    pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def flaky(*outcomes):
+    """A callable that raises / returns ``outcomes`` in order and counts calls."""
+    queue = list(outcomes)
+
+    def fn():
+        fn.calls += 1
+        outcome = queue.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    fn.calls = 0
+    return fn
+
+
+def test_classification():
+    assert is_transient(APIStatusError(529)) and is_transient(APIStatusError(429))
+    assert not is_transient(APIStatusError(400)) and not is_transient(APIStatusError(401))
+    assert is_transient(RatelimitException("202 Ratelimit")) and is_transient(TimeoutError())
+    assert not is_transient(ValueError("bad json"))
+    assert retry_after(APIStatusError(429, {"retry-after": "7"})) == 7.0
+
+
+def test_retries_with_backoff_then_succeeds():
+    guard = CircuitBreaker("t", policy=RetryPolicy(attempts=3, base_delay=1.0, max_delay=4.0))
+    sleeps, notices = [], []
+    fn = flaky(APIStatusError(503), APIStatusError(429, {"retry-after": "30"}), "ok")
+
+    assert call(guard, fn, sleep=sleeps.append, on_retry=lambda *a: notices.append(a)) == "ok"
+    assert fn.calls == 3
+    assert 0 <= sleeps[0] <= 1.0  # full jitter on base_delay * 2**0
+    assert sleeps[1] == 4.0  # Retry-After, capped at max_delay
+    assert [n[0] for n in notices] == [1, 2]
+    assert guard.state == CLOSED and guard.failures == 0 and guard.retries == 2
+
+
+def test_non_transient_errors_are_not_retried_or_counted():
+    guard = CircuitBreaker("t", failure_threshold=1)
+    fn = flaky(APIStatusError(401))
+    with pytest.raises(APIStatusError):
+        call(guard, fn, sleep=lambda s: None)
+    assert fn.calls == 1 and guard.state == CLOSED
+
+
+def test_breaker_opens_fails_fast_and_probes():
+    clock = Clock()
+    guard = CircuitBreaker("t", failure_threshold=2, reset_timeout=30, policy=RetryPolicy(attempts=5), clock=clock)
+    fn = flaky(*[RatelimitException("rl")] * 3, "ok")
+
+    with pytest.raises(RatelimitException):
+        call(guard, fn, sleep=lambda s: None)
+    assert fn.calls == 2  # stopped retrying as soon as the circuit opened
+    assert guard.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        call(guard, fn, sleep=lambda s: None)
+    assert fn.calls == 2 and guard.rejected == 1
+
+    clock.now = 31  # half-open: a single probe, which fails and re-opens
+    assert guard.snapshot()["state"] == HALF_OPEN
+    with pytest.raises(RatelimitException):
+        call(guard, fn, sleep=lambda s: None)
+    assert fn.calls == 3 and guard.state == OPEN and guard.trips == 2
+
+    clock.now = 62  # the next probe succeeds and closes the circuit
+    assert call(guard, fn, sleep=lambda s: None) == "ok"
+    assert guard.state == CLOSED
+
+
+def test_half_open_admits_one_probe_at_a_time():
+    clock = Clock()
+    guard = CircuitBreaker("t", failure_threshold=1, reset_timeout=10, clock=clock)
+    guard.record_failure(TimeoutError())
+    clock.now = 11
+    guard.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        guard.before_call()
+    guard.record_success()
+    guard.before_call()
+
+
+class RerunException(BaseException):
+    """Like Streamlit's rerun / stop signals: not an ``Exception``."""
+
+
+def test_base_exception_in_a_probe_releases_it():
+    clock = Clock()
+    guard = CircuitBreaker("t", failure_threshold=1, reset_timeout=10, clock=clock)
+    guard.record_failure(TimeoutError())
+    clock.now = 11
+
+    def rerun():
+        raise RerunException()
+
+    with pytest.raises(RerunException):
+        call(guard, rerun, sleep=lambda s: None)
+    assert guard.state == HALF_OPEN  # no verdict, but the next call may probe
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(acall(guard, cancelled))
+    assert call(guard, flaky("ok"), sleep=lambda s: None) == "ok"
+    assert guard.state == CLOSED
+
+
+def test_async_call():
+    guard = CircuitBreaker("t", policy=RetryPolicy(attempts=2, base_delay=0.0))
+    attempts = []
+
+    async def run():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise APIStatusError(529)
+        return "done"
+
+    assert asyncio.run(acall(guard, run)) == "done"
+    assert len(attempts) == 2 and guard.retries == 1